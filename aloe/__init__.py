@@ -6,6 +6,7 @@ Main module.
 
 import sys
 import threading
+from importlib import import_module
 
 from aloe.registry import (
     after,
@@ -13,20 +14,55 @@ from aloe.registry import (
     before,
     step,
 )
-from aloe.runner import Runner
+from aloe.utils import CONTEXT_VARS, ContextLocal
 
-world = threading.local()  # pylint:disable=invalid-name
+if CONTEXT_VARS:
+    world = ContextLocal()  # pylint:disable=invalid-name
+else:  # pragma: no cover
+    world = threading.local()  # pylint:disable=invalid-name
+
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        """
+        Import the Nose runner on first use, as importing Nose is slow and
+        not needed by the native runner.
+        """
+
+        if name == 'Runner':
+            from aloe import runner
+            return runner.Runner
+
+        raise AttributeError(
+            "module {0!r} has no attribute {1!r}".format(__name__, name))
+else:  # pragma: no cover
+    # Modules can't have lazy attributes before Python 3.7
+    from aloe.runner import Runner
 
 
 def main(argv=None):  # pragma: no cover
     """
     Entry point for running Aloe.
+
+    'aloe run ...' uses the native runner, 'aloe serve ...' starts the server
+    for it, anything else is passed to Nose.
     """
 
     if argv is None:
         argv = sys.argv
 
-    Runner(argv)
+    # The runners import the world from here, so they are looked up by name
+    commands = {
+        'run': ('aloe.native', 'NativeRunner'),
+        'serve': ('aloe.server', 'Server'),
+    }
+
+    if argv[1:2] and argv[1] in commands:
+        module, name = commands[argv[1]]
+        getattr(import_module(module), name)(argv[:1] + argv[2:])
+    else:
+        from aloe import runner
+        runner.Runner(argv)
 
 
 if __name__ == '__main__':  # pragma: no cover
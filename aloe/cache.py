@@ -0,0 +1,476 @@
+"""
+Caches of the collection results persisted between runs.
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import tempfile
+from contextlib import contextmanager
+from importlib.util import MAGIC_NUMBER
+
+from aloe.codegen import RELOCATABLE, TEMPLATES, record_templates
+from aloe.fs import FeatureLoader
+
+DEFAULT_CACHE_DIR = '.aloe_cache'
+
+
+def distribution_version(name):
+    """
+    The version of the installed distribution, or None if it can't be
+    determined.
+    """
+
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:  # Python < 3.8
+        from pkg_resources import (
+            get_distribution,
+            DistributionNotFound as PackageNotFoundError,
+        )
+
+        def version(name):
+            """The version of the distribution."""
+            return get_distribution(name).version
+
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def gherkin_version():
+    """
+    The version of the installed Gherkin parser, or None if it can't be
+    determined.
+    """
+
+    return distribution_version('gherkin-official')
+
+
+def read_json(path):
+    """
+    Read a JSON file, returning None if it doesn't exist or is corrupted.
+    """
+
+    try:
+        with open(path, encoding='utf-8') as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    """
+    Atomically replace a JSON file with the given data, creating the
+    directory if needed.
+
+    Failures are ignored, as the caches are only an optimization.
+    """
+
+    directory = os.path.dirname(path)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8',
+                                         dir=directory, suffix='.tmp',
+                                         delete=False) as json_file:
+            json.dump(data, json_file)
+        os.replace(json_file.name, path)
+    except OSError:
+        pass
+
+
+def remove(path):
+    """Remove a file if it exists."""
+
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class FileCache(object):
+    """
+    A cache of the results computed from the feature files.
+
+    The entries are checked against the file modification time, size and
+    contents, the variant (e.g. language) they were computed for and the
+    versions of the tools computing them.
+    """
+
+    # The subdirectory of the cache directory to keep the entries in
+    subdirectory = None
+
+    # The extension of the entry files
+    extension = None
+
+    # The names of the arguments the entries are computed for
+    variant = ()
+
+    # Increment when the format of the stored entries changes
+    FORMAT = 1
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = os.path.join(directory, self.subdirectory)
+        self.used = set()
+
+    def versions(self):
+        """The versions of the tools computing the entries."""
+        return {}
+
+    def read_entry(self, path):
+        """Read a cache entry, returning None if it can't be read."""
+        raise NotImplementedError()
+
+    def write_entry(self, path, entry):
+        """Write a cache entry, ignoring failures."""
+        raise NotImplementedError()
+
+    def entry_path(self, filename, **variant):
+        """The path to the cache entry for a file and variant."""
+
+        key = '\0'.join(
+            [os.path.abspath(filename)]
+            + [str(variant[name] or '') for name in self.variant]
+        )
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+        return os.path.join(self.directory, digest + self.extension)
+
+    def entry_key(self, filename, content=None, **variant):
+        """
+        The values a cache entry must match to be valid.
+
+        If the content is not given, the content hash is not included.
+        """
+
+        stat = os.stat(filename)
+
+        key = {
+            'format': self.FORMAT,
+            'path': os.path.abspath(filename),
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+        }
+        key.update(variant)
+        key.update(self.versions())
+
+        if content is not None:
+            key['sha256'] = hashlib.sha256(content).hexdigest()
+
+        return key
+
+    def lookup(self, filename, **variant):
+        """
+        Return the file contents, the path to its cache entry, the key the
+        entry must match and the entry itself if it is valid (None
+        otherwise).
+        """
+
+        with open(filename, 'rb') as feature_file:
+            content = feature_file.read()
+
+        path = self.entry_path(filename, **variant)
+        key = self.entry_key(filename, content, **variant)
+        self.used.add(path)
+
+        entry = self.read_entry(path)
+        if entry is None or entry.get('key') != key:
+            entry = None
+
+        return content, path, key, entry
+
+    def prune(self):
+        """
+        Remove the entries for the files that changed or disappeared since
+        they were stored.
+        """
+
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            return
+
+        for entry_name in entries:
+            path = os.path.join(self.directory, entry_name)
+
+            if path in self.used:
+                continue
+
+            entry = self.read_entry(path)
+
+            try:
+                key = dict(entry['key'])
+                key.pop('sha256', None)
+                variant = {name: key[name] for name in self.variant}
+                stale = key != self.entry_key(key['path'], **variant)
+            except (OSError, KeyError, TypeError, ValueError):
+                stale = True
+
+            if stale:
+                remove(path)
+
+
+class ParseCache(FileCache):
+    """
+    A cache of the parsed Gherkin documents for the feature files.
+
+    The entries are also checked against the Gherkin version.
+    """
+
+    subdirectory = 'parse'
+    extension = '.json'
+    variant = ('language',)
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        super().__init__(directory)
+        self.gherkin_version = gherkin_version()
+
+    def versions(self):
+        return {
+            'gherkin': self.gherkin_version,
+        }
+
+    def read_entry(self, path):
+        return read_json(path)
+
+    def write_entry(self, path, entry):
+        write_json(path, entry)
+
+    def parse(self, filename, language, parse):
+        """
+        Return the Gherkin document for the file, either from the cache or
+        by calling parse() with the file contents and storing the result.
+        """
+
+        content, path, key, entry = self.lookup(filename, language=language)
+
+        if entry is not None:
+            return entry['document']
+
+        document = parse(content.decode('utf-8'))
+
+        self.write_entry(path, {
+            'key': key,
+            'document': document,
+        })
+
+        return document
+
+
+class CodeCache(FileCache):
+    """
+    A cache of the compiled code of the functions generated for the feature
+    files, see aloe.codegen.make_function_from_template.
+
+    The entries are also checked against the Python bytecode version and
+    the version of Aloe, and the templates are stored by a digest of the
+    functions making their source. The generated code doesn't depend on the
+    step definitions, which are only passed in the function globals, so the
+    entries stay valid when the step modules change.
+    """
+
+    subdirectory = 'code'
+    extension = '.marshal'
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        super().__init__(directory)
+        self.aloe_version = distribution_version('aloe')
+
+    def versions(self):
+        return {
+            'python': MAGIC_NUMBER.hex(),
+            'aloe': self.aloe_version,
+        }
+
+    def read_entry(self, path):
+        try:
+            with open(path, 'rb') as code_file:
+                entry = marshal.load(code_file)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if not isinstance(entry, dict):
+            return None
+
+        return entry
+
+    def write_entry(self, path, entry):
+        directory = os.path.dirname(path)
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp',
+                                             delete=False) as code_file:
+                marshal.dump(entry, code_file)
+            os.replace(code_file.name, path)
+        except OSError:
+            pass
+
+    @contextmanager
+    def feature(self, filename):
+        """
+        A context manager to make the functions for a feature file.
+
+        The code compiled for the file before is made available to
+        make_function_from_template, and the entry is updated if any new
+        code was compiled.
+        """
+
+        if not RELOCATABLE:
+            # Each function is compiled separately
+            yield
+            return
+
+        _, path, key, entry = self.lookup(filename)
+        templates = entry['templates'] if entry is not None else {}
+
+        for template_key, code in templates.items():
+            TEMPLATES.setdefault(template_key, code)
+
+        with record_templates() as recorded:
+            yield
+
+        if not recorded.keys() <= templates.keys():
+            templates = dict(templates)
+            templates.update(recorded)
+
+            self.write_entry(path, {
+                'key': key,
+                'templates': templates,
+            })
+
+
+class FeatureManifest(object):
+    """
+    The feature directories found under each root directory, kept with the
+    modification times of the directories examined to find them.
+
+    The directories are only searched again when any of these changes, or
+    when the exclude globs are different.
+    """
+
+    filename = 'manifest.json'
+
+    # Increment when the format of the stored manifest changes
+    FORMAT = 1
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.path = os.path.join(directory, self.filename)
+
+        data = read_json(self.path)
+        if not isinstance(data, dict) or data.get('format') != self.FORMAT:
+            data = {}
+
+        self.roots = data.get('roots', {})
+
+    @staticmethod
+    def unchanged(directories):
+        """Whether the directories have the given modification times."""
+
+        try:
+            return all(
+                os.stat(path).st_mtime_ns == mtime
+                for path, mtime in directories.items()
+            )
+        except OSError:
+            return False
+
+    def feature_directories(self, root, exclude=()):
+        """The feature directories under the root directory."""
+
+        entry = self.roots.get(root)
+        if entry is not None and entry['exclude'] == list(exclude) and \
+                self.unchanged(entry['directories']):
+            return entry['feature_dirs']
+
+        directories = {}
+        feature_dirs = list(FeatureLoader.find_feature_directories(
+            root, exclude, directories))
+
+        self.roots[root] = {
+            'exclude': list(exclude),
+            'directories': directories,
+            'feature_dirs': feature_dirs,
+        }
+        self.save()
+
+        return feature_dirs
+
+    def save(self):
+        """Write the manifest, ignoring failures."""
+
+        write_json(self.path, {
+            'format': self.FORMAT,
+            'roots': self.roots,
+        })
+
+
+class StepManifest(object):
+    """
+    The step sentences defined by each step definition file, kept with the
+    modification time of the file, to import the files only when one of
+    their steps is needed.
+    """
+
+    filename = 'steps.json'
+
+    # Increment when the format of the stored manifest changes
+    FORMAT = 1
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.path = os.path.join(directory, self.filename)
+
+        data = read_json(self.path)
+        if not isinstance(data, dict) or data.get('format') != self.FORMAT:
+            data = {}
+
+        # The modification time and the sentences by the absolute file name
+        self.files = data.get('files', {})
+        self.changed = False
+
+    def sentences(self, filename):
+        """
+        The step sentences the file defines, or None if they are not known
+        or the file changed since.
+        """
+
+        entry = self.files.get(os.path.abspath(filename))
+        if entry is None:
+            return None
+
+        try:
+            if os.stat(filename).st_mtime_ns != entry['mtime']:
+                return None
+        except OSError:
+            return None
+
+        return entry['sentences']
+
+    def record(self, filename, sentences):
+        """Record the step sentences the file defines."""
+
+        try:
+            mtime = os.stat(filename).st_mtime_ns
+        except OSError:
+            return
+
+        self.files[os.path.abspath(filename)] = {
+            'mtime': mtime,
+            'sentences': list(sentences),
+        }
+        self.changed = True
+
+    def save(self):
+        """Write the manifest if it changed, ignoring failures."""
+
+        if not self.changed:
+            return
+
+        write_json(self.path, {
+            'format': self.FORMAT,
+            'files': self.files,
+        })
+        self.changed = False
@@ -0,0 +1,103 @@
+"""
+Running the features on the server started with "aloe serve".
+
+The output of a run comes back as frames of the standard output, the
+standard error and the exit status, over a Unix socket.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+
+# The name of the socket in the cache directory
+SOCKET_NAME = 'server.sock'
+
+# A frame is a kind byte and the length of the data, followed by the data
+HEADER = struct.Struct('!cI')
+
+# The kinds of frames
+STDOUT = b'1'
+STDERR = b'2'
+EXIT = b'x'
+
+
+def default_socket(cache_dir):
+    """The path of the server socket for the cache directory."""
+    return os.path.join(cache_dir, SOCKET_NAME)
+
+
+def send_frame(connection, kind, data):
+    """Send a frame of data."""
+    connection.sendall(HEADER.pack(kind, len(data)) + data)
+
+
+def read_exactly(reader, size):
+    """Read the given number of bytes, or raise EOFError."""
+
+    data = reader.read(size)
+    if len(data) < size:
+        raise EOFError()
+    return data
+
+
+def read_frame(reader):
+    """Read a frame, returning its kind and data."""
+
+    kind, size = HEADER.unpack(read_exactly(reader, HEADER.size))
+    return kind, read_exactly(reader, size)
+
+
+class ServerResult(object):
+    """The outcome of running the features on the server."""
+
+    def __init__(self, status):
+        self.status = status
+
+    def wasSuccessful(self):  # pylint:disable=invalid-name
+        """Whether the run succeeded."""
+        return self.status == 0
+
+
+def run_on_server(path, args, stream):
+    """
+    Run the features on the server listening at the given socket with the
+    given command line arguments, writing the output to the standard output
+    and the stream. Returns the ServerResult, or None if no server is
+    listening.
+    """
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except OSError:
+        connection.close()
+        return None
+
+    request = {
+        'args': list(args),
+        'cwd': os.getcwd(),
+        'tty': stream.isatty(),
+    }
+
+    with connection, connection.makefile('rb') as reader:
+        connection.sendall(json.dumps(request).encode('utf-8') + b'\n')
+
+        while True:
+            try:
+                kind, data = read_frame(reader)
+            except EOFError:
+                stream.write("The server exited before finishing the run.\n")
+                return ServerResult(1)
+
+            if kind == EXIT:
+                return ServerResult(int(data))
+
+            text = data.decode('utf-8')
+            if kind == STDOUT:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            else:
+                stream.write(text)
+                stream.flush()
@@ -3,12 +3,46 @@ Code generation helpers
 """
 
 import ast
+import hashlib
+import marshal
 from contextlib import contextmanager
 from textwrap import dedent
+from types import CodeType, FunctionType
 
 
 FUNCTION_DEF_SAMPLE = ast.parse('def func(): pass')
 
+# Whether code objects can be moved to a different file and line. This needs
+# CodeType.replace, added in Python 3.8.
+RELOCATABLE = hasattr(CodeType, 'replace')
+
+# Compiled function templates, see make_function_from_template
+TEMPLATES = {}
+
+# Dictionaries collecting the templates used, see record_templates
+RECORDERS = []
+
+# The names of the template source functions by their code
+TEMPLATE_NAMES = {}
+
+
+def set_line(node, line):
+    """
+    Set the line of all the statements and expressions in an AST node to
+    the given one.
+    """
+
+    for child in ast.walk(node):
+        if not hasattr(child, 'lineno'):
+            continue
+
+        child.lineno = line
+        # Python 3.8+ also checks the end positions
+        if getattr(child, 'end_lineno', None) is not None:
+            child.end_lineno = line
+            child.end_col_offset = max(child.col_offset,
+                                       child.end_col_offset)
+
 
 def make_function(source, context=None, source_file=None, name=None):
     """
@@ -17,7 +51,10 @@ def make_function(source, context=None, source_file=None, name=None):
     Optionally set the file and name of the function.
     """
 
-    func = ast.parse(source)
+    if isinstance(source, str):
+        func = ast.parse(source)
+    else:
+        func = source
 
     # Check that generated code is a function
     # pylint:disable=unidiomatic-typecheck
@@ -45,45 +82,144 @@ def make_function(source, context=None, source_file=None, name=None):
     return context[name]
 
 
-def multi_manager(*managers):
+def make_function_from_template(make_source, args, context,
+                                source_file=None, name=None, firstlineno=1):
+    """
+    Make a function from the source returned by make_source(*args) (either a
+    string or an AST), the same way make_function does, moving all its lines
+    so that the first one is at firstlineno.
+
+    The source is compiled once for the same make_source and args; the
+    functions made later only get their own globals, file, name and lines.
+    The compiled templates are stored in TEMPLATES by the qualified name of
+    make_source and the arguments.
     """
-    A context manager invoking all the given context managers in order.
 
-    Returns a tuple with all the manager results.
+    if source_file is None:
+        source_file = '<generated>'
+
+    key = (template_name(make_source), args)
+    if not RELOCATABLE:
+        key += (source_file, name, firstlineno)
+
+    try:
+        code = TEMPLATES[key]
+    except KeyError:
+        source = make_source(*args)
+        if isinstance(source, str):
+            source = ast.parse(source)
+
+        if not RELOCATABLE:
+            ast.increment_lineno(source, firstlineno - 1)
+            return make_function(source, context=context,
+                                 source_file=source_file, name=name)
+
+        template = make_function(source, context={})
+        code = TEMPLATES[key] = template.__code__
+
+    for recorder in RECORDERS:
+        recorder[key] = code
+
+    if name is None:
+        name = code.co_name
+
+    changes = {
+        'co_filename': source_file,
+        'co_firstlineno': code.co_firstlineno + firstlineno - 1,
+        'co_name': name,
+    }
+    if hasattr(code, 'co_qualname'):
+        # Python 3.11+
+        changes['co_qualname'] = name
+
+    return FunctionType(code.replace(**changes), context, name)
+
+
+def template_name(make_source):
+    """
+    The qualified name of a template source function, with a digest of its
+    code, so that the templates compiled by a different version of it are
+    not reused.
     """
 
-    if not managers:
-        source = dedent(
-            """
-            def null_manager(*args, **kwargs):
-                yield ()
-            """
-        )
-    else:
-        with_stmt = ', '.join(
-            "manager{i}(*args, **kwargs) as result{i}".format(i=i)
-            for i in range(len(managers))
-        )
+    code = make_source.__code__
+    try:
+        return TEMPLATE_NAMES[code]
+    except KeyError:
+        pass
 
-        result_tuple = '(' + ', '.join(
-            "result{i}".format(i=i)
-            for i in range(len(managers))
-        ) + ')'
+    digest = hashlib.sha1(marshal.dumps(code)).hexdigest()
+    name = TEMPLATE_NAMES[code] = '{0}.{1}:{2}'.format(
+        make_source.__module__, make_source.__qualname__, digest)
 
-        source = dedent(
-            """
-            def multi_manager(*args, **kwargs):
-                with {with_stmt}:
-                    yield {result_tuple}
-            """
-        ).format(with_stmt=with_stmt, result_tuple=result_tuple)
+    return name
+
+
+@contextmanager
+def record_templates():
+    """
+    A context manager collecting the templates used by
+    make_function_from_template while it is active.
+
+    Yields a dictionary of the template keys and compiled code.
+    """
+
+    recorder = {}
+    RECORDERS.append(recorder)
+
+    try:
+        yield recorder
+    finally:
+        RECORDERS.remove(recorder)
+
+
+def multi_manager(*managers):
+    """
+    A context manager invoking all the given context managers in order.
+
+    Returns a tuple with all the manager results.
+    """
 
     context = {
         'manager' + str(i): manager
         for i, manager in enumerate(managers)
     }
 
-    return contextmanager(make_function(
-        source=source,
+    return contextmanager(make_function_from_template(
+        multi_manager_source,
+        (len(managers),),
         context=context,
     ))
+
+
+def multi_manager_source(count):
+    """
+    The source of a context manager invoking the given number of context
+    managers, named manager0, manager1, etc.
+    """
+
+    if not count:
+        return dedent(
+            """
+            def null_manager(*args, **kwargs):
+                yield ()
+            """
+        )
+
+    with_stmt = ', '.join(
+        "manager{i}(*args, **kwargs) as result{i}".format(i=i)
+        for i in range(count)
+    )
+
+    result_tuple = '(' + ', '.join(
+        "result{i}".format(i=i)
+        for i in range(count)
+    ) + ')'
+
+    return dedent(
+        """
+        def multi_manager(*args, **kwargs):
+            with {with_stmt}:
+                yield {result_tuple}
+        """
+    ).format(with_stmt=with_stmt, result_tuple=result_tuple)
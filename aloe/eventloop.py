@@ -0,0 +1,151 @@
+"""
+Running coroutine steps and hooks.
+
+The coroutines run on an event loop kept for the whole run, so the clients
+and connection pools the steps create survive across steps and scenarios.
+Each thread running the scenarios has its own loop, unless it delegates the
+coroutines to the loop of another thread, as the concurrent scenarios do.
+"""
+
+import asyncio
+import inspect
+import sys
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+# The event loop of each thread
+LOCAL = threading.local()
+
+# All the event loops created, to close at the end of the run
+LOOPS = []
+LOOPS_LOCK = threading.Lock()
+
+try:
+    all_tasks = asyncio.all_tasks  # pylint:disable=invalid-name
+except AttributeError:  # pragma: no cover
+    # Python < 3.7
+    all_tasks = asyncio.Task.all_tasks  # pylint:disable=invalid-name,no-member
+
+
+def get_event_loop():
+    """The event loop to run the coroutines of the current thread on."""
+
+    loop = getattr(LOCAL, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        LOCAL.loop = loop
+        with LOOPS_LOCK:
+            LOOPS.append(loop)
+
+    return loop
+
+
+def close_event_loops():
+    """
+    Close all the event loops, cancelling the remaining tasks and finishing
+    the asynchronous generators, as asyncio.run does.
+    """
+
+    with LOOPS_LOCK:
+        loops = LOOPS[:]
+        del LOOPS[:]
+
+    for loop in loops:
+        if loop.is_closed():
+            continue
+
+        try:
+            tasks = [task for task in all_tasks(loop) if not task.done()]
+            if tasks:
+                for task in tasks:
+                    task.cancel()
+                loop.run_until_complete(
+                    asyncio.gather(*tasks, return_exceptions=True))
+            # Python 3.5 has no asynchronous generators
+            if hasattr(loop, 'shutdown_asyncgens'):
+                loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+
+@contextmanager
+def delegate_to(loop):
+    """
+    Run the coroutines of the current thread on the given event loop,
+    running in another thread, until the end of the block.
+
+    The coroutines run as tasks in a copy of the current context, so they
+    see the context variables (e.g. the isolated world) of the thread.
+    """
+
+    previous = getattr(LOCAL, 'delegate', None)
+    LOCAL.delegate = loop
+    try:
+        yield
+    finally:
+        LOCAL.delegate = previous
+
+
+def run_coroutine(coro):
+    """Run a coroutine to completion and return its result."""
+
+    delegate = getattr(LOCAL, 'delegate', None)
+    if delegate is not None:
+        return asyncio.run_coroutine_threadsafe(coro, delegate).result()
+
+    return get_event_loop().run_until_complete(coro)
+
+
+def sync_function(func):
+    """
+    A function running the given coroutine function to completion, or the
+    function itself if it is not a coroutine function.
+    """
+
+    if not inspect.iscoroutinefunction(func):
+        return func
+
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        """Run the coroutine function."""
+        return run_coroutine(func(*args, **kwargs))
+
+    return wrapped
+
+
+@contextmanager
+def sync_context(manager):
+    """A context manager entering and exiting an asynchronous one."""
+
+    result = run_coroutine(manager.__aenter__())
+    try:
+        yield result
+    except BaseException:
+        if not run_coroutine(manager.__aexit__(*sys.exc_info())):
+            raise
+    else:
+        run_coroutine(manager.__aexit__(None, None, None))
+
+
+def sync_manager(func):
+    """
+    A function returning the context manager returned by the given
+    function, converting an asynchronous one into a regular one.
+    """
+
+    # Functions decorated with contextlib.contextmanager are left as they are
+    if inspect.isgeneratorfunction(getattr(func, '__wrapped__', None)):
+        return func
+
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        """Call the function and convert its result if needed."""
+
+        manager = func(*args, **kwargs)
+        if not hasattr(manager, '__enter__') and \
+                hasattr(manager, '__aenter__'):
+            manager = sync_context(manager)
+        return manager
+
+    return wrapped
@@ -25,6 +25,14 @@ class StepDiscoveryError(Exception):
     pass
 
 
+class ExamplesFailed(Exception):
+    """
+    Some examples of a batched outline raised errors, and the test result
+    can't report them as separate subtests.
+    """
+    pass
+
+
 class NoDefinitionFound(Exception):
     """
     Exception raised when there is no suitable step definition for a step.
@@ -0,0 +1,173 @@
+"""
+Running the background of a feature once, and each scenario in a process
+forked after it.
+
+The feature callbacks and the background steps run once in the process
+running the feature. Each scenario then runs in a child process starting
+from a copy of its memory, including aloe.world, and sends the outcome back
+when it finishes. The state outside of the process, such as a database
+server, is not copied: the changes a scenario makes to it are seen by the
+following scenarios.
+"""
+
+import os
+import pickle
+import sys
+import traceback
+
+from aloe.parallel import RemoteTest
+from aloe.threads import ErrorHolder, RecordingResult, ThreadedSuite, \
+    thread_streams
+
+
+def read_all(fd):
+    """Read from a file descriptor until the end, and close it."""
+
+    chunks = []
+    with os.fdopen(fd, 'rb') as reader:
+        while True:
+            chunk = reader.read(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    return b''.join(chunks)
+
+
+class ForkedSuite(ThreadedSuite):
+    """
+    A test suite running the background of a single feature once and each
+    of its scenarios in a forked child process, with the class fixtures
+    (and so the feature callbacks) running once around them.
+
+    The background runs outside of the example callbacks, before any of
+    them. The scenarios run one at a time, in the order given.
+
+    :param tests: the tests of a single test class
+    :param capture: whether to capture the standard output of the tests
+        instead of displaying it with the steps
+    """
+
+    def __init__(self, tests, capture=True):
+        super().__init__(tests, 1, capture=capture)
+
+    def run_background(self, result, test):
+        """
+        Run the background steps in this process, reporting an error in
+        them. Returns whether they succeeded.
+        """
+
+        try:
+            test.background()
+        except Exception:  # pylint:disable=broad-except
+            holder = ErrorHolder('background ({0})'.format(
+                type(test).__qualname__))
+            result.startTest(holder)
+            result.addError(holder, sys.exc_info())
+            result.stopTest(holder)
+            return False
+
+        return True
+
+    def run_child(self, test, result, stdout, stderr):
+        """
+        Run a test in the child process, returning its events (with the
+        test itself as None) and its output.
+        """
+
+        # The background already ran in the parent
+        test.background = lambda: None
+
+        recorder, output = self.run_buffered(test, result, stdout, stderr)
+
+        events = [
+            (name, (None if args[0] is test else RemoteTest.from_test(
+                args[0]),) + args[1:])
+            for name, args in recorder.events
+        ]
+
+        return events, output
+
+    def fork(self, test, result, stdout, stderr):
+        """
+        Run a test in a child process, returning the pickled events and
+        output and the exit status of the child.
+        """
+
+        read_fd, write_fd = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                os.close(read_fd)
+                outcome = self.run_child(test, result, stdout, stderr)
+                with os.fdopen(write_fd, 'wb') as writer:
+                    writer.write(pickle.dumps(outcome))
+                status = 0
+            except BaseException:  # pylint:disable=broad-except
+                traceback.print_exc(file=sys.__stderr__)
+            finally:
+                # Don't run the cleanup of the parent
+                os._exit(status)  # pylint:disable=protected-access
+
+        os.close(write_fd)
+        data = read_all(read_fd)
+        _, status = os.waitpid(pid, 0)
+
+        return data, status
+
+    def run_forked(self, test, result, stdout, stderr):
+        """Run a test in a child process and report it when done."""
+
+        if result.shouldStop:
+            return
+
+        data, status = self.fork(test, result, stdout, stderr)
+
+        recorder = RecordingResult(result)
+
+        try:
+            events, output = pickle.loads(data)
+        except Exception:  # pylint:disable=broad-except
+            recorder.events = [
+                ('startTest', (test,)),
+                ('addError', (test, "Scenario process exited unexpectedly "
+                              "with status {0}.".format(status))),
+                ('stopTest', (test,)),
+            ]
+            output = ''
+        else:
+            recorder.events = [
+                (name, (test if args[0] is None else args[0],) + args[1:])
+                for name, args in events
+            ]
+
+        self.report(recorder, output, stdout)
+
+    def run(self, result):
+        """Run the background, then each test in a child process."""
+
+        if not self.tests:
+            return result
+
+        self.finish_previous_class(result)
+
+        testclass = type(self.tests[0])
+        if not self.run_fixture(result, testclass, 'setUpClass'):
+            return result
+
+        # The output is captured by the suite instead
+        buffer = getattr(result, 'buffer', False)
+        result.buffer = False
+
+        try:
+            if self.run_background(result, self.tests[0]):
+                with thread_streams() as (stdout, stderr):
+                    for test in self.tests:
+                        self.run_forked(test, result, stdout, stderr)
+        finally:
+            result.buffer = buffer
+            self.run_fixture(result, testclass, 'tearDownClass')
+
+        return result
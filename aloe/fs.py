@@ -3,13 +3,18 @@
 Filesystem-related utilities.
 """
 
+import configparser
 import os
 import fnmatch
-
-from nose.importer import Importer
+import re
+import sys
+from importlib.util import module_from_spec, spec_from_file_location
 
 from aloe.exceptions import StepDiscoveryError
 
+# A feature file with line numbers to run the scenarios at
+RE_FEATURE_LINES = re.compile(r'^(?P<filename>.+\.feature)(?P<lines>(:\d+)+)$')
+
 
 def path_to_module_name(filename):
     """Convert a path to a file to a Python module name."""
@@ -30,54 +35,322 @@ def path_to_module_name(filename):
     return '.'.join(dotted_path)
 
 
+def feature_lines(name):
+    """
+    Split a name of the form 'file.feature:LINE[:LINE...]' into the file
+    name and the set of lines. Returns None if the name doesn't have this
+    form or the file doesn't exist.
+    """
+
+    match = RE_FEATURE_LINES.match(name)
+    if not match:
+        return None
+
+    filename = match.group('filename')
+    if not os.path.isfile(filename):
+        return None
+
+    lines = set(int(line) for line in match.group('lines')[1:].split(':'))
+
+    return filename, lines
+
+
+def _same_file(module, filename):
+    """Whether the module was loaded from the given file."""
+
+    module_file = getattr(module, '__file__', None)
+    if module_file is None:
+        return False
+
+    try:
+        return os.path.samefile(module_file, filename)
+    except OSError:
+        return False
+
+
+def import_from_path(filename, module_name):
+    """
+    Import a module from a file under the given dotted name, importing the
+    parent packages from the corresponding directories first.
+
+    The modules already imported under the same names from a different
+    location are imported again, as the test applications often reuse the
+    module names. The directory containing the top-level package is added to
+    the module search path.
+    """
+
+    path_parts = os.path.normpath(os.path.abspath(filename)).split(os.sep)
+    if path_parts[-1] == '__init__.py':
+        path_parts.pop()
+
+    name_parts = module_name.split('.')
+    directory = os.sep.join(path_parts[:-len(name_parts)])
+
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+    module = parent = None
+
+    for i, part in enumerate(name_parts, 1):
+        name = '.'.join(name_parts[:i])
+        location = os.path.join(directory, *name_parts[:i])
+
+        if os.path.isdir(location):
+            search_locations = [location]
+            location = os.path.join(location, '__init__.py')
+        else:
+            search_locations = None
+            location += '.py'
+
+        if not os.path.isfile(location):
+            raise ImportError("No module named '{0}'".format(name),
+                              name=name, path=location)
+
+        module = sys.modules.get(name)
+        if module is None or not _same_file(module, location):
+            spec = spec_from_file_location(
+                name, location,
+                submodule_search_locations=search_locations)
+            module = module_from_spec(spec)
+            sys.modules[name] = module
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                del sys.modules[name]
+                raise
+
+        if parent is not None:
+            setattr(parent, part, module)
+        parent = module
+
+    return module
+
+
 class FeatureLoader(object):
     """Loader class responsible for findind features and step
     definitions along a given path on filesystem"""
 
-    importer = Importer()
-
     @classmethod
-    def find_and_load_step_definitions(cls, dir_):
+    def find_step_definitions(cls, dir_):
         """
-        Load the steps from the specified directory.
+        Find the step definition files in the specified directory, yielding
+        their names and the fully qualified names of their modules.
         """
 
         for path, _, files in os.walk(dir_):
             for filename in fnmatch.filter(files, '*.py'):
-                # Import the module using its fully qualified name
                 filename = os.path.relpath(os.path.join(path, filename))
-                module_name = path_to_module_name(filename)
+                yield filename, path_to_module_name(filename)
 
-                try:
-                    cls.importer.importFromPath(filename, module_name)
-                except ImportError as exc:
-                    raise StepDiscoveryError(
-                        "Cannot load step definition file: '%s'" % filename
-                    ) from exc
+    @classmethod
+    def load_step_definitions(cls, filename, module_name):
+        """
+        Import a step definition file as the given module.
+        """
+
+        try:
+            return import_from_path(filename, module_name)
+        except ImportError as exc:
+            raise StepDiscoveryError(
+                "Cannot load step definition file: '%s'" % filename
+            ) from exc
 
     @classmethod
-    def find_feature_directories(cls, dir_):
+    def find_and_load_step_definitions(cls, dir_):
+        """
+        Load the steps from the specified directory.
+        """
+
+        for filename, module_name in cls.find_step_definitions(dir_):
+            cls.load_step_definitions(filename, module_name)
+
+    @classmethod
+    def find_feature_directories(cls, dir_, exclude=(), directories=None):
         """
         Locate directories to load features from.
 
         The directories must be named 'features'; they must either reside
         directly in the specified directory, or otherwise all their parents
-        must be packages (have __init__.py files).
+        must be packages (have __init__.py files). Only the packages are
+        listed, the other directories are not looked into.
+
+        The directories matching any of the exclude globs, either by name or
+        by the path relative to the specified directory, are skipped. If
+        directories is given, the modification times of all the directories
+        examined are stored in it, as the result only changes when they do.
         """
 
-        # A set of package directories discovered
-        packages = set()
+        def excluded(path, name):
+            """Whether the directory matches any of the exclude globs."""
+
+            relative = os.path.relpath(path, dir_).replace(os.sep, '/')
+            return any(
+                fnmatch.fnmatch(name, pattern)
+                or fnmatch.fnmatch(relative, pattern)
+                for pattern in exclude
+            )
+
+        def record(path, stat):
+            """Record the modification time of a directory."""
+            if directories is not None:
+                directories[path] = stat.st_mtime_ns
+
+        record(dir_, os.stat(dir_))
+        seen = set()
+        pending = [dir_]
+
+        while pending:
+            path = pending.pop()
+
+            # Don't loop around the symbolic links
+            real_path = os.path.realpath(path)
+            if real_path in seen:
+                continue
+            seen.add(real_path)
+
+            try:
+                with os.scandir(path) as entries:
+                    subdirs = sorted(
+                        (entry for entry in entries if entry.is_dir()),
+                        key=lambda entry: entry.name,
+                    )
+            except OSError:
+                continue
+
+            packages = []
+            for entry in subdirs:
+                if excluded(entry.path, entry.name):
+                    continue
+
+                if entry.name == 'features':
+                    yield entry.path
+
+                record(entry.path, entry.stat())
+                if os.path.isfile(os.path.join(entry.path, '__init__.py')):
+                    packages.append(entry.path)
+
+            # Visit the packages in order
+            pending.extend(reversed(packages))
+
+
+def config_values(name, filename='setup.cfg'):
+    """
+    The values of an option in the [aloe] section of the given
+    configuration file, as a list. Values are separated by whitespace
+    (including newlines) or commas.
+    """
+
+    parser = configparser.ConfigParser()
+    parser.read(filename)
+
+    return [
+        value
+        for value in re.split(r'[\s,]+',
+                              parser.get('aloe', name, fallback=''))
+        if value
+    ]
+
+
+def discovery_config(filename='setup.cfg'):
+    """
+    The feature roots and the exclude globs from the [aloe] section of the
+    given configuration file, as lists.
+    """
+
+    return (config_values('feature_roots', filename),
+            config_values('exclude', filename))
+
+
+def discover_feature_directories(roots=(), exclude=(), manifest=None):
+    """
+    Yield the feature directories under the given roots, or the ones in
+    setup.cfg, or the current directory.
+
+    The directories matching the given exclude globs, and the ones in
+    setup.cfg, are skipped. If given, the manifest (an
+    aloe.cache.FeatureManifest) is used to avoid searching again.
+    """
+
+    config_roots, config_exclude = discovery_config()
+    roots = list(roots) or config_roots or ['.']
+    exclude = config_exclude + list(exclude)
+
+    for root in roots:
+        if manifest is None:
+            yield from FeatureLoader.find_feature_directories(root, exclude)
+        else:
+            yield from manifest.feature_directories(root, exclude)
+
+
+class DirectorySet(object):
+    """
+    A set of directories, telling quickly whether a path is in any of them
+    or above any of them.
+    """
+
+    def __init__(self, directories):
+        self.directories = set(map(os.path.abspath, directories))
+
+        # All the parent directories
+        self.parents = set()
+        for directory in self.directories:
+            parent = os.path.dirname(directory)
+            while parent not in self.parents:
+                self.parents.add(parent)
+                parent, previous = os.path.dirname(parent), parent
+                if parent == previous:
+                    break
+
+    def __contains__(self, path):
+        """Whether the path is one of the directories or inside one."""
+
+        path = os.path.abspath(path)
+        while path not in self.directories:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
+
+        return True
+
+    def leads_to(self, path):
+        """Whether the path is above any of the directories."""
+        return os.path.abspath(path) in self.parents
+
+
+def selected_feature_directories(feature_dirs, names):
+    """
+    The feature directories containing the features selected by the given
+    names (feature files, possibly with lines, or directories), in their
+    original order. All of them are selected if any name is something else,
+    or if there are no names.
+    """
+
+    directories = list(map(os.path.abspath, feature_dirs))
+    selected = set()
 
-        for path, dirs, files in os.walk(dir_, followlinks=True):
-            # Is this a package?
-            if '__init__.py' in files:
-                packages.add(path)
+    for name in names or ['.']:
+        selection = feature_lines(name)
+        path = os.path.abspath(selection[0] if selection else name)
 
-            if path == dir_ or path in packages:
-                # Does this package have a feature directory?
-                if 'features' in dirs:
-                    yield os.path.join(path, 'features')
+        if os.path.isdir(path):
+            # The feature directories under it or containing it
+            selected.update(
+                directory for directory in directories
+                if directory == path
+                or directory.startswith(path.rstrip(os.sep) + os.sep)
+                or path.startswith(directory + os.sep)
+            )
+        elif os.path.isfile(path):
+            selected.update(
+                directory for directory in directories
+                if path.startswith(directory + os.sep)
+            )
+        else:
+            return list(feature_dirs)
 
-            else:
-                # This is not a package, prune search
-                dirs[:] = []
+    return [
+        feature_dir
+        for feature_dir, directory in zip(feature_dirs, directories)
+        if directory in selected
+    ]
@@ -0,0 +1,508 @@
+"""
+The history of the previous runs, kept in the cache directory.
+"""
+
+import hashlib
+import inspect
+import marshal
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from aloe.cache import DEFAULT_CACHE_DIR, read_json, write_json
+from aloe.registry import CALLBACK_REGISTRY, STEP_REGISTRY
+from aloe.utils import unwrap_function
+
+# The reason the scenarios skipped by the pass history are reported with
+CACHED_PASS = 'cached pass'
+
+
+def feature_key(filename):
+    """The key of a feature file in the history, relative to the cwd."""
+
+    return os.path.relpath(os.path.abspath(filename)).replace(os.sep, '/')
+
+
+def test_key(test):
+    """
+    The key of a test in the history: the key of its feature file and the
+    name of its method (the scenario name, with the example number for an
+    outline example), or None for a test not generated from a scenario.
+    """
+
+    key = getattr(test, 'history_key', None)
+    if key is not None:
+        return key
+
+    try:
+        # pylint:disable=protected-access
+        method = getattr(test, test._testMethodName)
+        filename = method.scenario.feature.filename
+    except AttributeError:
+        return None
+
+    return (feature_key(filename), method.__name__)
+
+
+def scenario_id(test):
+    """
+    The identity of the scenario or outline example of a test: the key of
+    its feature file, the scenario index and the example number (None for
+    a scenario without examples, or for all the examples of a batched
+    outline), or None for a test not generated from a scenario.
+    """
+
+    identity = getattr(test, 'scenario_id', None)
+    if identity is not None:
+        return identity
+
+    # A subtest, e.g. an example of a batched outline, stands for its test
+    test = getattr(test, 'test_case', test)
+
+    try:
+        # pylint:disable=protected-access
+        method = getattr(test, test._testMethodName)
+        filename = method.scenario.feature.filename
+        return (feature_key(filename),
+                method.scenario_index,
+                method.example_index)
+    except AttributeError:
+        return None
+
+
+def example_index(scenario, outline):
+    """
+    The number (from 1) of the given outline example of the scenario, or
+    None if there is no outline.
+    """
+
+    for index, example in enumerate(scenario.outlines, 1):
+        if example is outline:
+            return index
+
+    return None
+
+
+class DurationHistory(object):
+    """
+    How long the scenarios took when they last ran, by feature file and
+    scenario.
+
+    The history is used to balance the features between the shards and to
+    start the longest features first in the worker processes.
+    """
+
+    filename = 'durations.json'
+
+    # Increment when the format of the stored history changes
+    FORMAT = 1
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.path = os.path.join(directory, self.filename)
+
+        data = read_json(self.path)
+        if not isinstance(data, dict) or data.get('format') != self.FORMAT:
+            data = {}
+
+        # Durations in seconds by feature and scenario
+        self.durations = data.get('features', {})
+
+    def record(self, durations):
+        """
+        Update the durations of the scenarios that ran, given as a
+        dictionary of the durations by the test key.
+        """
+
+        for (feature, scenario), duration in durations.items():
+            self.durations.setdefault(feature, {})[scenario] = \
+                round(duration, 6)
+
+    def save(self):
+        """Write the history, ignoring failures."""
+
+        write_json(self.path, {
+            'format': self.FORMAT,
+            'features': self.durations,
+        })
+
+    def feature_costs(self, features):
+        """
+        The expected time to run each of the given feature files. Features
+        not in the history are expected to take the average time.
+        """
+
+        costs = {
+            filename: sum(
+                self.durations.get(feature_key(filename), {}).values())
+            for filename in features
+        }
+
+        known = [cost for cost in costs.values() if cost]
+        default = sum(known) / len(known) if known else 1.0
+
+        return {
+            filename: cost or default
+            for filename, cost in costs.items()
+        }
+
+    def longest_first(self, features):
+        """The feature files ordered by their expected time, longest first."""
+
+        costs = self.feature_costs(features)
+        return sorted(features, key=lambda filename: -costs[filename])
+
+    def shard(self, features, index, count):
+        """
+        The feature files to run in the given shard (numbered from 1) of
+        the given count.
+
+        Each feature, starting with the longest, is given to the shard
+        with the least expected time so far. The shards are the same on
+        every machine using the same history and features.
+        """
+
+        costs = self.feature_costs(features)
+        totals = [0.0] * count
+        selected = set()
+
+        for filename in sorted(
+                features,
+                key=lambda filename: (-costs[filename],
+                                      feature_key(filename))):
+            shard = totals.index(min(totals))
+            totals[shard] += costs[filename]
+            if shard == index - 1:
+                selected.add(filename)
+
+        return [filename for filename in features if filename in selected]
+
+
+class FailureHistory(object):
+    """
+    The scenarios and outline examples that failed when they last ran.
+
+    A scenario is remembered until it passes, so running only some of the
+    features (e.g. only the failed ones) keeps the failures of the others.
+    """
+
+    filename = 'lastfailed.json'
+
+    # Increment when the format of the stored history changes
+    FORMAT = 1
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.path = os.path.join(directory, self.filename)
+
+        data = read_json(self.path)
+        if not isinstance(data, dict) or data.get('format') != self.FORMAT:
+            data = {}
+
+        # The scenario indices and example numbers by feature
+        self.failed = {
+            feature: set(map(tuple, scenarios))
+            for feature, scenarios in data.get('features', {}).items()
+        }
+        self.changed = False
+
+    def __bool__(self):
+        return any(self.failed.values())
+
+    def record(self, outcomes):
+        """
+        Update the failures from the outcomes of the scenarios that ran,
+        given as a dictionary of whether each passed by the scenario ID.
+        """
+
+        for (feature, index, example), passed in outcomes.items():
+            scenarios = self.failed.get(feature, set())
+            if passed:
+                # A batched outline passing passes all its examples, and
+                # its examples passing one by one pass the batch, the ones
+                # still failing being recorded by themselves
+                passing = {
+                    scenario for scenario in scenarios
+                    if scenario in ((index, example), (index, None))
+                    or (example is None and scenario[0] == index)
+                }
+                if passing:
+                    self.changed = True
+                    scenarios -= passing
+            elif (index, example) not in scenarios:
+                self.changed = True
+                scenarios.add((index, example))
+                self.failed[feature] = scenarios
+
+    def save(self):
+        """Write the failures if they changed, ignoring errors."""
+
+        if not self.changed:
+            return
+
+        write_json(self.path, {
+            'format': self.FORMAT,
+            'features': {
+                feature: sorted(scenarios, key=lambda s: (s[0], s[1] or 0))
+                for feature, scenarios in self.failed.items()
+                if scenarios
+            },
+        })
+        self.changed = False
+
+    def feature_failed(self, filename):
+        """Whether any scenario of the feature file failed."""
+        return bool(self.failed.get(feature_key(filename)))
+
+    def scenario_failed(self, filename, index, example=None):
+        """
+        Whether the scenario (or the outline example) failed. All the
+        examples of an outline that failed as a batch count as failed.
+        """
+
+        failed = self.failed.get(feature_key(filename), ())
+        return (index, example) in failed or (index, None) in failed
+
+    def test_failed(self, test):
+        """Whether the scenario of the test failed."""
+
+        identity = scenario_id(test)
+        if identity is None:
+            return False
+
+        feature, index, example = identity
+        return (index, example) in self.failed.get(feature, ())
+
+    def failed_first(self, items, failed=None):
+        """
+        The feature files (or tests, with failed=self.test_failed) ordered
+        with the failed ones first, keeping the order otherwise.
+        """
+
+        if failed is None:
+            failed = self.feature_failed
+
+        return sorted(items, key=lambda item: not failed(item))
+
+
+class PassHistory(object):
+    """
+    The scenarios and outline examples that passed, with a digest of their
+    inputs, kept in an SQLite database to skip them while the inputs don't
+    change.
+
+    The inputs of a scenario are its steps (with the background), its tags,
+    the source files of the step definitions they match and the source
+    files of all the hooks. Whole source files are used so that the changes
+    in the helpers next to the step definitions are noticed too.
+
+    The database can be inspected with any SQLite client; the passes table
+    has a row for each scenario that passed.
+    """
+
+    filename = 'passes.sqlite3'
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.path = os.path.join(directory, self.filename)
+
+        # Digests by scenario ID
+        self.passed = {}
+        # Rows to update on save, by scenario ID; None to delete
+        self.pending = {}
+
+        self.source_digests = {}
+        self._hooks_digest = None
+
+        try:
+            with closing(self.connect()) as connection, connection:
+                rows = connection.execute(
+                    'SELECT feature, scenario_index, example_index, digest '
+                    'FROM passes'
+                ).fetchall()
+        except sqlite3.Error:
+            rows = ()
+
+        for feature, index, example, digest in rows:
+            self.passed[(feature, index, example or None)] = digest
+
+    def connect(self):
+        """Open the database, creating it if needed."""
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        # Wait for the other worker processes writing at the same time
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS passes ('
+            'feature TEXT NOT NULL, '
+            'scenario_index INTEGER NOT NULL, '
+            # 0 for a scenario without examples, as NULLs are all distinct
+            'example_index INTEGER NOT NULL, '
+            'name TEXT NOT NULL, '
+            'digest TEXT NOT NULL, '
+            'passed_at REAL NOT NULL, '
+            'PRIMARY KEY (feature, scenario_index, example_index))'
+        )
+        return connection
+
+    def clear(self):
+        """Forget all the passed scenarios."""
+
+        self.passed.clear()
+        self.pending.clear()
+
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def forget_sources(self):
+        """
+        Forget the digests of the source files, to read them again after
+        they change.
+        """
+
+        self.source_digests.clear()
+        self._hooks_digest = None
+
+    def source_digest(self, func):
+        """
+        The digest of the source file defining a function, or of its code if
+        the source is not available.
+        """
+
+        try:
+            func = unwrap_function(func)
+            filename = inspect.getsourcefile(func)
+        except (AttributeError, TypeError):
+            filename = None
+
+        if filename is None:
+            code = getattr(func, '__code__', None)
+            if code is None:
+                return repr(func)
+            return hashlib.sha256(marshal.dumps(code)).hexdigest()
+
+        try:
+            return self.source_digests[filename]
+        except KeyError:
+            pass
+
+        try:
+            with open(filename, 'rb') as source_file:
+                digest = hashlib.sha256(source_file.read()).hexdigest()
+        except OSError:
+            digest = filename
+
+        self.source_digests[filename] = digest
+        return digest
+
+    def hooks_digest(self):
+        """The digest of the source files of all the hooks."""
+
+        if self._hooks_digest is None:
+            digests = sorted(set(
+                self.source_digest(func)
+                for what in CALLBACK_REGISTRY.values()
+                for when in what.values()
+                for funcs in when.values()
+                for func in funcs.values()
+            ))
+            self._hooks_digest = hashlib.sha256(
+                '\0'.join(digests).encode()).hexdigest()
+
+        return self._hooks_digest
+
+    def digest(self, test):
+        """The digest of the inputs of the scenario of a test."""
+
+        # pylint:disable=protected-access
+        method = getattr(test, test._testMethodName)
+        scenario = method.scenario
+
+        if method.example_index is not None:
+            steps = scenario.evaluate(
+                scenario.outlines[method.example_index - 1])
+        elif getattr(method, 'outlines', None):
+            # All the examples of a batched outline
+            steps = [
+                step
+                for _, outline in method.outlines
+                for step in scenario.evaluate(outline)
+            ]
+        else:
+            steps = scenario.steps
+
+        background = scenario.feature.background
+        if background is not None:
+            steps = list(background.steps) + list(steps)
+
+        digest = hashlib.sha256()
+        digest.update(repr(scenario.tags).encode())
+        digest.update(self.hooks_digest().encode())
+
+        for step in steps:
+            digest.update(repr(
+                (step.sentence, step.table, step.multiline)).encode())
+            func = STEP_REGISTRY.match_step(step)[0]
+            digest.update(self.source_digest(func).encode())
+
+        return digest.hexdigest()
+
+    def unchanged(self, test):
+        """Whether the scenario passed before with the same inputs."""
+
+        digest = self.passed.get(scenario_id(test))
+        return digest is not None and digest == self.digest(test)
+
+    def record(self, test, passed):
+        """Record whether the scenario of the test passed."""
+
+        identity = scenario_id(test)
+        if identity is None or not hasattr(test, '_testMethodName'):
+            return
+
+        if passed:
+            digest = self.digest(test)
+            self.passed[identity] = digest
+            self.pending[identity] = (str(test), digest)
+        elif self.passed.pop(identity, None) is not None:
+            self.pending[identity] = None
+
+    def save(self):
+        """Write the recorded passes, ignoring errors."""
+
+        if not self.pending:
+            return
+
+        now = time.time()
+
+        try:
+            with closing(self.connect()) as connection, connection:
+                for (feature, index, example), row in self.pending.items():
+                    if row is None:
+                        connection.execute(
+                            'DELETE FROM passes WHERE feature = ? AND '
+                            'scenario_index = ? AND example_index = ?',
+                            (feature, index, example or 0),
+                        )
+                    else:
+                        connection.execute(
+                            'INSERT OR REPLACE INTO passes VALUES '
+                            '(?, ?, ?, ?, ?, ?)',
+                            (feature, index, example or 0) + row + (now,),
+                        )
+        except (OSError, sqlite3.Error):
+            pass
+
+        self.pending.clear()
+
+
+def record_pass(test, passed):
+    """
+    Record whether a scenario passed in the pass history of its test class,
+    if it has one.
+    """
+
+    history = getattr(test, 'pass_history', None)
+    if history is not None:
+        history.record(test, passed)
@@ -0,0 +1,180 @@
+"""
+Importing the step definitions only when the selected features need them.
+
+The step definition files in the feature directories of the selected
+features and the declared step libraries are imported before the features
+are loaded. The other step definition files are only imported when a step
+matches none of the loaded step definitions: the ones known to define a
+matching sentence, or, if there are none, all the ones whose sentences
+aren't known yet.
+
+The sentences each file defines are remembered in the step manifest in the
+cache directory, until the file changes.
+"""
+
+import os
+import re
+import threading
+from importlib import import_module
+
+from aloe.cache import DEFAULT_CACHE_DIR, StepManifest
+from aloe.fs import (
+    FeatureLoader,
+    config_values,
+    path_to_module_name,
+    selected_feature_directories,
+)
+from aloe.registry import STEP_REGISTRY
+
+
+def step_libraries(libraries=()):
+    """
+    The step libraries declared in the step_libraries option of the [aloe]
+    section of setup.cfg, followed by the given ones.
+    """
+
+    return config_values('step_libraries') + list(libraries)
+
+
+class LazyStepLoader(object):
+    """
+    Import the step definition files needed by the selected features, and
+    the others when a step needs them.
+
+    :param manifest: the StepManifest to find the sentences of the step
+    definition files in
+    """
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+
+        # The module names of the files not imported yet, by file name
+        self.pending = {}
+        # The absolute names of the files imported
+        self.loaded = set()
+        # The compiled step sentences of the manifest
+        self.regexes = {}
+
+        # Importing a file can match steps again in the same thread
+        self.lock = threading.RLock()
+
+    def load(self, filename, module_name):
+        """
+        Import a step definition file, recording the sentences it defines.
+        """
+
+        self.loaded.add(os.path.abspath(filename))
+        self.pending.pop(filename, None)
+
+        before = dict(STEP_REGISTRY.steps)
+        FeatureLoader.load_step_definitions(filename, module_name)
+
+        self.manifest.record(filename, (
+            sentence
+            for sentence, definition in STEP_REGISTRY.steps.items()
+            if before.get(sentence) is not definition
+        ))
+
+    def load_library(self, library):
+        """
+        Import a step library: a directory of step definition files, a
+        Python file or, if no such path exists, a module name.
+        """
+
+        if os.path.isdir(library):
+            for filename, module_name in \
+                    FeatureLoader.find_step_definitions(library):
+                self.load(filename, module_name)
+        elif os.path.isfile(library):
+            filename = os.path.relpath(library)
+            self.load(filename, path_to_module_name(filename))
+        else:
+            import_module(library)
+
+    def load_step_definitions(self, feature_dirs, names, libraries=()):
+        """
+        Import the step libraries and the step definition files of the
+        feature directories containing the features selected by the names,
+        and start importing the others when needed.
+        """
+
+        for library in libraries:
+            self.load_library(library)
+
+        selected = selected_feature_directories(feature_dirs, names)
+
+        for feature_dir in feature_dirs:
+            for filename, module_name in \
+                    FeatureLoader.find_step_definitions(feature_dir):
+                if os.path.abspath(filename) in self.loaded:
+                    continue
+                if feature_dir in selected:
+                    self.load(filename, module_name)
+                else:
+                    self.pending[filename] = module_name
+
+        self.manifest.save()
+
+        STEP_REGISTRY.fallback = self
+
+    def defines(self, filename, sentence):
+        """
+        Whether the file is known to define a step matching the sentence;
+        None if its sentences aren't known.
+        """
+
+        sentences = self.manifest.sentences(filename)
+        if sentences is None:
+            return None
+
+        for step_sentence in sentences:
+            regex = self.regexes.get(step_sentence)
+            if regex is None:
+                regex = re.compile(step_sentence, re.I | re.U)
+                self.regexes[step_sentence] = regex
+            if regex.search(sentence):
+                return True
+
+        return False
+
+    def __call__(self, sentence):
+        """
+        Import the files needed to match a sentence none of the loaded step
+        definitions match. Returns whether any files were imported.
+        """
+
+        with self.lock:
+            matching = []
+            unknown = []
+            for filename in self.pending:
+                defines = self.defines(filename, sentence)
+                if defines:
+                    matching.append(filename)
+                elif defines is None:
+                    unknown.append(filename)
+
+            needed = matching or unknown
+            for filename in needed:
+                # Might have been imported by another file meanwhile
+                module_name = self.pending.get(filename)
+                if module_name is not None:
+                    self.load(filename, module_name)
+
+            if needed:
+                self.manifest.save()
+
+            return bool(needed)
+
+
+def load_step_definitions(feature_dirs, names, libraries=(),
+                          cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Import the step definitions the features selected by the names need,
+    along with the step libraries, using the step manifest in the cache
+    directory.
+    """
+
+    loader = LazyStepLoader(StepManifest(cache_dir))
+    loader.load_step_definitions(feature_dirs, names,
+                                 step_libraries(libraries))
+    return loader
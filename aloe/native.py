@@ -0,0 +1,952 @@
+"""
+Test runner not depending on Nose.
+"""
+
+import argparse
+import os
+import sys
+import unittest
+from importlib import import_module
+
+from aloe.cache import (
+    CodeCache,
+    DEFAULT_CACHE_DIR,
+    FeatureManifest,
+    ParseCache,
+)
+from aloe.client import default_socket, run_on_server
+from aloe.eventloop import close_event_loops
+from aloe.fs import (
+    DirectorySet,
+    FeatureLoader,
+    discover_feature_directories,
+    feature_lines,
+)
+from aloe.history import (
+    DurationHistory,
+    FailureHistory,
+    PassHistory,
+    example_index,
+    record_pass,
+    scenario_id,
+    test_key,
+)
+from aloe.parser import Feature
+from aloe.prefix import PrefixScheduler
+from aloe.registry import CALLBACK_REGISTRY
+from aloe.terminal import Terminal, TERMINAL
+from aloe.testclass import TestCase
+from aloe.threads import ConcurrentSuite, ThreadedSuite, is_concurrent
+from aloe.utils import CONTEXT_VARS
+
+MISSING = object()
+
+
+def parse_attributes(values):
+    """
+    Parse the attribute selection options, as the Nose attribute selector
+    does.
+
+    Each option is a comma-separated list of 'name', '!name' or 'name=value'
+    to be all matched; the test is selected if any of the options matches.
+    Returns a list of lists of (name, value) pairs, where value is True or
+    False for the presence of the attribute.
+    """
+
+    selection = []
+
+    for value in values:
+        group = []
+
+        for attribute in value.strip().split(','):
+            if not attribute:
+                continue
+
+            name, sep, attr_value = attribute.partition('=')
+            if not sep:
+                if name.startswith('!'):
+                    name, attr_value = name[1:], False
+                else:
+                    attr_value = True
+
+            group.append((name.strip(), attr_value))
+
+        if group:
+            selection.append(group)
+
+    return selection
+
+
+def parse_shard(value):
+    """
+    Parse the shard option, INDEX/COUNT with the index starting from 1.
+    """
+
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected INDEX/COUNT, e.g. 1/4: {0!r}".format(value)) from None
+
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            "shard index must be between 1 and {0}: {1!r}".format(
+                count, value))
+
+    return index, count
+
+
+def attribute_matches(value, expected):
+    """Whether an attribute value matches the expected one."""
+
+    if expected is True:
+        return bool(value)
+    elif expected is False:
+        return not value
+    elif isinstance(value, (list, tuple)):
+        return str(expected).lower() in (str(x).lower() for x in value)
+    else:
+        return value == expected or \
+            str(value).lower() == str(expected).lower()
+
+
+def attributes_match(selection, method, cls):
+    """
+    Whether the method (or its class, if the method doesn't have the
+    attribute) matches the parsed attribute selection.
+    """
+
+    if not selection:
+        return True
+
+    def get_attribute(name):
+        """The value of the attribute on the method or the class."""
+
+        value = getattr(method, name, MISSING)
+        if value is MISSING:
+            value = getattr(cls, name, False)
+        return value
+
+    return any(
+        all(
+            attribute_matches(get_attribute(name), value)
+            for name, value in group
+        )
+        for group in selection
+    )
+
+
+class NativeTestResult(unittest.TextTestResult):
+    """
+    Cucumber test progress display (verbosity level 3) for the native runner.
+
+    Errors can also be given already formatted, as the worker processes
+    report them.
+
+    The durations of the scenarios are collected in durations, by their
+    history key, and whether they passed in outcomes, by their scenario ID.
+    """
+
+    def __init__(self, stream, descriptions, verbosity,
+                 force_color=False, **kwargs):
+        super().__init__(stream, descriptions, verbosity, **kwargs)
+        self.showAll = verbosity == 2  # pylint:disable=invalid-name
+        self.showSteps = verbosity >= 3  # pylint:disable=invalid-name
+        self.durations = {}
+        self.outcomes = {}
+
+        if self.showSteps:
+            # Register the global terminal so that it can be accessed by
+            # the hooks.
+            TERMINAL[0] = Terminal(stream=stream, force_styling=force_color)
+        else:
+            TERMINAL[0] = None
+
+    def getDescription(self, test):  # pylint:disable=invalid-name
+        """
+        Describe the test the same way Nose does. A subtest is described
+        with its parameters.
+        """
+
+        if self.descriptions and not hasattr(test, 'test_case'):
+            return test.shortDescription() or str(test)
+
+        return str(test)
+
+    def _exc_info_to_string(self, err, test):
+        if isinstance(err, str):
+            return err
+
+        return super()._exc_info_to_string(err, test)
+
+    def record_outcome(self, test, passed):
+        """Record whether a scenario passed."""
+
+        identity = scenario_id(test)
+        if identity is not None:
+            self.outcomes[identity] = passed
+            record_pass(test, passed)
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self.record_outcome(test, True)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self.record_outcome(test, False)
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self.record_outcome(test, False)
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            self.record_outcome(test, False)
+
+    def addDuration(self, test, elapsed):  # pylint:disable=invalid-name
+        """Record the duration of a scenario."""
+
+        if hasattr(super(), 'addDuration'):
+            super().addDuration(test, elapsed)
+
+        key = test_key(test)
+        if key is not None:
+            self.durations[key] = elapsed
+
+
+class NativeTestRunner(unittest.TextTestRunner):
+    """
+    A test runner passing the color option to the result.
+    """
+
+    resultclass = NativeTestResult
+
+    def __init__(self, *args, **kwargs):
+        self.force_color = kwargs.pop('force_color', False)
+        super().__init__(*args, **kwargs)
+
+    def _makeResult(self):
+        return self.resultclass(self.stream, self.descriptions,
+                                self.verbosity, force_color=self.force_color)
+
+
+class NativeRunner(object):
+    """
+    Collect and run Gherkin tests without Nose.
+
+    Like the Nose runner, the tests are run on construction; the result is
+    available as result and success, and the process exits unless exit is
+    False.
+
+    :param argv: the command line, including the program name
+    :param stream: a stream to write the output into (default: stderr)
+    :param env: the environment to take the option defaults from
+    """
+
+    TEST_CLASS = TestCase
+
+    def __init__(self, argv=None, stream=None, exit=True, env=None):
+        # pylint:disable=redefined-builtin
+        if argv is None:
+            argv = sys.argv
+        if env is None:
+            env = os.environ
+
+        self.stream = stream or sys.stderr
+        self.options = self.make_parser(env).parse_args(argv[1:])
+
+        # Lines to select the scenarios at, by the feature file
+        self.feature_lines = {}
+
+        if self.options.server:
+            self.result = self.run_on_server(argv)
+        elif self.options.watch:
+            self.result = self.watch()
+        else:
+            self.configure()
+            self.result = self.run_tests()
+        self.success = self.result.wasSuccessful()
+
+        if exit:
+            sys.exit(not self.success)
+
+    @classmethod
+    def make_parser(cls, env):
+        """
+        The parser for the command line options.
+
+        The options mirror the ones of the Nose plugin.
+        """
+
+        test_class_name = \
+            '{c.__module__}.{c.__name__}'.format(c=cls.TEST_CLASS)
+
+        parser = argparse.ArgumentParser(
+            prog='aloe run',
+            description="Run the Gherkin features.",
+        )
+        parser.add_argument(
+            'names', nargs='*', metavar='FEATURE',
+            help='Feature files (optionally with :LINE suffixes) or '
+            'directories to run; all features by default',
+        )
+        parser.add_argument(
+            '-v', '--verbose', action='count',
+            dest='verbosity',
+            default=int(env.get('NOSE_VERBOSE', 1)),
+            help='Be more verbose',
+        )
+        parser.add_argument(
+            '--verbosity', action='store', type=int,
+            dest='verbosity',
+            help='Set the verbosity level',
+        )
+        parser.add_argument(
+            '-q', '--quiet', action='store_const', const=0,
+            dest='verbosity',
+            help='Be less verbose',
+        )
+        parser.add_argument(
+            '-x', '--stop', action='store_true',
+            dest='stop',
+            default=bool(env.get('NOSE_STOP')),
+            help='Stop running tests after the first error or failure',
+        )
+        parser.add_argument(
+            '-s', '--nocapture', action='store_false',
+            dest='capture',
+            default=not env.get('NOSE_NOCAPTURE'),
+            help="Don't capture the output of the tests",
+        )
+        parser.add_argument(
+            '--processes', action='store', type=int,
+            dest='processes',
+            default=int(env.get('NOSE_PROCESSES', 0)),
+            metavar='N',
+            help='Run the features in N worker processes '
+            '(negative for the number of CPUs)',
+        )
+        parser.add_argument(
+            '--process-max-features', action='store', type=int,
+            dest='process_max_features',
+            default=0,
+            metavar='N',
+            help='Replace each worker process after running N features',
+        )
+        parser.add_argument(
+            '--threads', action='store', type=int,
+            dest='threads',
+            default=int(env.get('NOSE_GHERKIN_THREADS', 0)),
+            metavar='N',
+            help='Run the scenarios of each feature in N threads',
+        )
+        parser.add_argument(
+            '--concurrent', action='store_true',
+            dest='concurrent',
+            default=bool(env.get('NOSE_GHERKIN_CONCURRENT')),
+            help='Run all the scenarios concurrently, not only the ones '
+            'tagged @concurrent',
+        )
+        parser.add_argument(
+            '--concurrency', action='store', type=int,
+            dest='concurrency',
+            default=int(env.get('NOSE_GHERKIN_CONCURRENCY', 10)),
+            metavar='N',
+            help='Run at most N scenarios concurrently',
+        )
+        parser.add_argument(
+            '--fork-background', action='store_true',
+            dest='fork_background',
+            default=bool(env.get('NOSE_GHERKIN_FORK_BACKGROUND')),
+            help='Run the background of each feature once, and each '
+            'scenario in a process forked after it, not only for the '
+            'features tagged @fork_background',
+        )
+        parser.add_argument(
+            '--share-prefixes', action='store_true',
+            dest='share_prefixes',
+            default=bool(env.get('NOSE_GHERKIN_SHARE_PREFIXES')),
+            help='Run the steps the scenarios of a feature start with once, '
+            'restoring a snapshot of the world after them for the others',
+        )
+        parser.add_argument(
+            '--batch-outlines', action='store_true',
+            dest='batch_outlines',
+            default=bool(env.get('NOSE_GHERKIN_BATCH_OUTLINES')),
+            help='Run all the examples of each scenario outline in a single '
+            'test, each as a subtest',
+        )
+        parser.add_argument(
+            '--shard', action='store', type=parse_shard,
+            dest='shard',
+            default=env.get('NOSE_GHERKIN_SHARD'),
+            metavar='INDEX/COUNT',
+            help='Run only the features in the given shard, balanced by '
+            'the recorded durations',
+        )
+        parser.add_argument(
+            '--record-durations', action='store_true',
+            dest='record_durations',
+            default=bool(env.get('NOSE_GHERKIN_RECORD_DURATIONS')),
+            help='Record the durations of the scenarios for balancing the '
+            'shards and processes',
+        )
+        parser.add_argument(
+            '--lf', '--last-failed', action='store_true',
+            dest='last_failed',
+            default=False,
+            help='Only run the scenarios that failed the last time they ran, '
+            'or all of them if none did',
+        )
+        parser.add_argument(
+            '--ff', '--failed-first', action='store_true',
+            dest='failed_first',
+            default=False,
+            help='Run the scenarios that failed the last time first',
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            dest='incremental',
+            default=bool(env.get('NOSE_GHERKIN_INCREMENTAL')),
+            help='Skip the scenarios that passed before, unless their steps, '
+            'step definitions or hooks changed',
+        )
+        parser.add_argument(
+            '--no-incremental', action='store_false',
+            dest='incremental',
+            help='Run all the scenarios, even if they passed before',
+        )
+        parser.add_argument(
+            '--clear-incremental', action='store_true',
+            dest='clear_incremental',
+            default=False,
+            help='Forget the scenarios that passed before',
+        )
+        parser.add_argument(
+            '--watch', action='store_true',
+            dest='watch',
+            default=False,
+            help='Run the features again when they or the step definitions '
+            'change, until interrupted',
+        )
+        parser.add_argument(
+            '--server', action='store_true',
+            dest='server',
+            default=bool(env.get('NOSE_GHERKIN_SERVER')),
+            help="Run the features on the server started with 'aloe serve'",
+        )
+        parser.add_argument(
+            '--socket', action='store',
+            dest='socket',
+            default=env.get('NOSE_GHERKIN_SOCKET'),
+            metavar='PATH',
+            help='The Unix socket the server listens on (default: '
+            'server.sock in the cache directory)',
+        )
+        parser.add_argument(
+            '--test-class', action='store',
+            dest='test_class_name',
+            default=env.get('NOSE_GHERKIN_CLASS', test_class_name),
+            metavar='TEST_CLASS',
+            help='Base class to use for the generated tests',
+        )
+        parser.add_argument(
+            '-n', '--scenario-indices', action='store',
+            dest='scenario_indices',
+            default='',
+            help='Only run scenarios with these indices (comma-separated)',
+        )
+        parser.add_argument(
+            '-a', '--attr', action='append',
+            dest='attributes',
+            default=[env['NOSE_ATTR']] if env.get('NOSE_ATTR') else [],
+            metavar='ATTR',
+            help='Only run scenarios with the given tags',
+        )
+        parser.add_argument(
+            '--color', action='store_true',
+            dest='force_color',
+            default=False,
+            help='Force colored output',
+        )
+        parser.add_argument(
+            '--cache-dir', action='store',
+            dest='cache_dir',
+            default=env.get('NOSE_GHERKIN_CACHE_DIR', DEFAULT_CACHE_DIR),
+            metavar='DIR',
+            help='Directory to keep the caches between runs in',
+        )
+        parser.add_argument(
+            '--parse-cache', action='store_true',
+            dest='parse_cache',
+            default=bool(env.get('NOSE_GHERKIN_PARSE_CACHE')),
+            help='Cache the parsed feature files between runs',
+        )
+        parser.add_argument(
+            '--no-parse-cache', action='store_false',
+            dest='parse_cache',
+            help='Parse all the feature files again',
+        )
+        parser.add_argument(
+            '--code-cache', action='store_true',
+            dest='code_cache',
+            default=bool(env.get('NOSE_GHERKIN_CODE_CACHE')),
+            help='Cache the code compiled for the scenarios between runs',
+        )
+        parser.add_argument(
+            '--no-code-cache', action='store_false',
+            dest='code_cache',
+            help='Compile the code for all the scenarios again',
+        )
+        parser.add_argument(
+            '--feature-root', action='append',
+            dest='feature_roots',
+            default=[],
+            metavar='DIR',
+            help='Look for the feature directories under DIR instead of the '
+            'current directory (or the feature_roots in setup.cfg)',
+        )
+        parser.add_argument(
+            '--exclude-dir', action='append',
+            dest='exclude_dirs',
+            default=[],
+            metavar='GLOB',
+            help='Skip the directories matching GLOB when looking for the '
+            'feature directories, in addition to the exclude in setup.cfg',
+        )
+        parser.add_argument(
+            '--manifest', action='store_true',
+            dest='manifest',
+            default=bool(env.get('NOSE_GHERKIN_MANIFEST')),
+            help='Remember the feature directories between runs, searching '
+            'again only when the directories change',
+        )
+        parser.add_argument(
+            '--no-manifest', action='store_false',
+            dest='manifest',
+            help='Search for the feature directories again',
+        )
+        parser.add_argument(
+            '--lazy-steps', action='store_true',
+            dest='lazy_steps',
+            default=bool(env.get('NOSE_GHERKIN_LAZY_STEPS')),
+            help='Only import the step definitions of the feature '
+            'directories of the selected features, and the others when a '
+            'step needs them',
+        )
+        parser.add_argument(
+            '--no-lazy-steps', action='store_false',
+            dest='lazy_steps',
+            help='Import all the step definitions',
+        )
+        parser.add_argument(
+            '--step-library', action='append',
+            dest='step_libraries',
+            default=[],
+            metavar='PATH',
+            help='Always import the step definitions in PATH (a directory, '
+            'a file or a module name) with --lazy-steps, in addition to the '
+            'step_libraries in setup.cfg',
+        )
+
+        return parser
+
+    def run_on_server(self, argv):
+        """
+        Run the features on the server with the same options, or in this
+        process if no server is listening.
+        """
+
+        path = self.options.socket or default_socket(self.options.cache_dir)
+        result = run_on_server(path, argv[1:], self.stream)
+        if result is not None:
+            return result
+
+        self.stream.write(
+            "No server is listening on {0}, running the features "
+            "here.\n".format(path))
+        self.configure()
+        return self.run_tests()
+
+    def watch(self):
+        """
+        Run the features, then run them again when they change.
+        """
+
+        from aloe.watch import Watcher
+
+        return Watcher(self).run()
+
+    def configure(self):
+        """
+        Configure the runner from the options.
+        """
+
+        options = self.options
+
+        # Step modules are imported relative to the current directory
+        if os.getcwd() not in sys.path:
+            sys.path.insert(0, os.getcwd())
+
+        module_name, class_name = options.test_class_name.rsplit('.', 1)
+        test_class_module = import_module(module_name)
+        self.test_class = getattr(test_class_module, class_name)
+
+        if options.parse_cache:
+            Feature.parse_cache = ParseCache(options.cache_dir)
+        else:
+            Feature.parse_cache = None
+
+        if options.code_cache:
+            self.test_class.code_cache = CodeCache(options.cache_dir)
+        else:
+            self.test_class.code_cache = None
+
+        self.test_class.batch_outlines = options.batch_outlines
+
+        if options.manifest:
+            self.manifest = FeatureManifest(options.cache_dir)
+        else:
+            self.manifest = None
+
+        if options.scenario_indices:
+            self.scenario_indices = tuple(
+                int(index)
+                for index in options.scenario_indices.split(',')
+            )
+        else:
+            self.scenario_indices = None
+
+        self.attributes = parse_attributes(options.attributes)
+
+        if options.incremental or options.clear_incremental:
+            passes = PassHistory(options.cache_dir)
+            if options.clear_incremental:
+                passes.clear()
+                # Not again in the worker processes
+                options.clear_incremental = False
+            self.test_class.pass_history = \
+                passes if options.incremental else None
+        else:
+            self.test_class.pass_history = None
+
+        self.failures = FailureHistory(options.cache_dir)
+        # Without any recorded failures, all the scenarios run
+        self.last_failed = options.last_failed and bool(self.failures)
+
+    def find_feature_directories(self):
+        """
+        Find the directories to load the steps and features from.
+        """
+
+        self.feature_dirs = sorted(discover_feature_directories(
+            self.options.feature_roots, self.options.exclude_dirs,
+            manifest=self.manifest,
+        ))
+        self.feature_dir_set = DirectorySet(self.feature_dirs)
+
+    def load_step_definitions(self):
+        """
+        Load all the step definitions, or only the ones the selected
+        features need if loading them lazily.
+        """
+
+        if self.options.lazy_steps:
+            # Imported here to only read the step manifest when needed
+            from aloe.lazy import load_step_definitions
+            load_step_definitions(self.feature_dirs, self.options.names,
+                                  self.options.step_libraries,
+                                  cache_dir=self.options.cache_dir)
+            return
+
+        for feature_dir in self.feature_dirs:
+            FeatureLoader.find_and_load_step_definitions(feature_dir)
+
+    def in_feature_directory(self, filename):
+        """Whether the file is in one of the features directories."""
+
+        return os.path.dirname(filename) in self.feature_dir_set
+
+    def find_features(self, directory):
+        """
+        Yield the feature files in the features directories under the given
+        one, in the same order Nose finds them.
+
+        Only the features directories and the directories leading to them
+        are looked into, so the excluded directories are skipped.
+        """
+
+        feature_dirs = self.feature_dir_set
+
+        for path, dirs, files in os.walk(directory, followlinks=True):
+            dirs[:] = sorted(
+                name for name in dirs
+                if os.path.join(path, name) in feature_dirs
+                or feature_dirs.leads_to(os.path.join(path, name))
+            )
+
+            for filename in sorted(files):
+                filename = os.path.join(path, filename)
+                if filename.endswith('.feature') and \
+                        self.in_feature_directory(filename):
+                    yield filename
+
+    def find_names(self):
+        """
+        Yield the feature files named on the command line, recording the
+        lines to run for the names with line numbers, or all the feature
+        files in the features directories if there are no names.
+        """
+
+        if not self.options.names:
+            for feature_dir in self.feature_dirs:
+                yield from self.find_features(feature_dir)
+            return
+
+        for name in self.options.names:
+            selection = feature_lines(name)
+            if selection is not None:
+                filename, lines = selection
+                key = os.path.abspath(filename)
+                self.feature_lines.setdefault(key, set()).update(lines)
+                yield filename
+            elif os.path.isdir(name):
+                for filename in self.find_features(name):
+                    yield filename
+            else:
+                yield name
+
+    def feature_files(self):
+        """
+        Yield the absolute paths of the feature files to run, each one once,
+        as Nose finds them.
+        """
+
+        seen = set()
+
+        for filename in self.find_names():
+            filename = os.path.abspath(filename)
+            if filename not in seen:
+                seen.add(filename)
+                yield filename
+
+    def scenario_matches(self, feature, scenario, scenario_index, outline):
+        """
+        Whether a given scenario is selected by the command-line options.
+
+        @feature The feature class
+        @scenario The scenario
+        @scenario_index The scenario index
+        @outline The outline example, or None if the scenario has none
+        """
+
+        if self.last_failed and not self.failures.scenario_failed(
+                feature.feature.filename, scenario_index,
+                example_index(scenario, outline)):
+            return False
+
+        if self.scenario_indices:
+            if scenario_index not in self.scenario_indices:
+                return False
+
+        lines = self.feature_lines.get(
+            os.path.abspath(feature.feature.filename))
+        if lines is not None and not scenario.at_lines(lines, outline):
+            return False
+
+        if self.attributes:
+            # Check the attributes the scenario method would have
+            method = feature.make_example(lambda self: None,
+                                          scenario, scenario_index)
+            if not attributes_match(self.attributes, method, feature):
+                return False
+
+        return True
+
+    def load_testclass(self, filename):
+        """
+        Build the test class of the selected scenarios of a feature file.
+        """
+
+        return self.test_class.from_file(
+            filename, scenario_filter=self.scenario_matches)
+
+    def load_feature(self, filename):
+        """
+        Build the test suite of the selected scenarios of a feature file.
+        """
+
+        return self.make_suite(self.load_testclass(filename))
+
+    def make_suite(self, test):
+        """
+        Build the test suite of the scenarios of a test class.
+        """
+
+        tests = [
+            test(scenario_name)
+            for _, scenario_name in test.scenarios()
+        ]
+
+        if self.options.failed_first:
+            tests = self.failures.failed_first(
+                tests, failed=self.failures.test_failed)
+
+        if test.feature.background is not None and hasattr(os, 'fork') and (
+                self.options.fork_background
+                or 'fork_background' in test.feature.tags):
+            # Imported here to avoid importing multiprocessing otherwise
+            from aloe.forked import ForkedSuite
+            return ForkedSuite(tests, capture=self.options.capture)
+
+        if self.options.share_prefixes:
+            PrefixScheduler(tests)
+
+        if self.options.threads > 1:
+            return ThreadedSuite(tests, self.options.threads,
+                                 capture=self.options.capture)
+
+        # The scenarios need separate worlds to run concurrently
+        if CONTEXT_VARS and self.options.concurrency > 1 and (
+                self.options.concurrent or any(map(is_concurrent, tests))):
+            return ConcurrentSuite(tests, self.options.concurrency,
+                                   capture=self.options.capture,
+                                   all_concurrent=self.options.concurrent)
+
+        return unittest.TestSuite(tests)
+
+    def select_features(self):
+        """
+        The feature files to run: only the ones with failed scenarios if
+        running the last failed ones, and only the ones in the selected
+        shard if sharding.
+        """
+
+        features = list(self.feature_files())
+
+        if self.last_failed:
+            features = [
+                filename for filename in features
+                if self.failures.feature_failed(filename)
+            ]
+
+        if self.options.shard:
+            features = self.history.shard(features, *self.options.shard)
+
+        return features
+
+    def load_tests(self, features):
+        """
+        Build the test suite of all the selected scenarios.
+        """
+
+        return unittest.TestSuite(
+            self.load_feature(filename)
+            for filename in features
+        )
+
+    def run_tests(self):
+        """
+        Load the steps and features and run them, along with the "all"
+        callbacks.
+
+        With multiple processes, the steps are loaded and the features are
+        run in the worker processes instead.
+        """
+
+        self.find_feature_directories()
+
+        self.history = DurationHistory(self.options.cache_dir)
+        features = self.select_features()
+
+        processes = self.options.processes
+        if processes < 0:
+            processes = os.cpu_count() or 1
+
+        if processes:
+            # Start the longest features first not to wait for them at the
+            # end
+            features = self.history.longest_first(features)
+
+        if self.options.failed_first:
+            features = self.failures.failed_first(features)
+
+        runner = self.make_test_runner(processes)
+
+        try:
+            if processes:
+                # Imported here to avoid importing multiprocessing otherwise
+                from aloe.parallel import ProcessPool
+                result = runner.run(ProcessPool(self, features, processes))
+            else:
+                result = self.run_in_process(runner, features)
+        finally:
+            if Feature.parse_cache is not None:
+                Feature.parse_cache.prune()
+
+            if self.test_class.code_cache is not None:
+                self.test_class.code_cache.prune()
+
+        self.record_result(result)
+
+        return result
+
+    def record_result(self, result):
+        """
+        Save the durations (if recording them), the failures and the passes
+        of the scenarios that ran.
+        """
+
+        if self.options.record_durations:
+            self.history.record(result.durations)
+            self.history.save()
+
+        self.failures.record(result.outcomes)
+        self.failures.save()
+
+        if self.test_class.pass_history is not None:
+            self.test_class.pass_history.save()
+
+    def make_test_runner(self, processes=0):
+        """
+        The runner of the test suite, reporting to the stream.
+        """
+
+        return NativeTestRunner(
+            stream=self.stream,
+            verbosity=self.options.verbosity,
+            failfast=self.options.stop,
+            # The workers capture the output themselves
+            buffer=self.capture_in_result(processes),
+            force_color=self.options.force_color,
+        )
+
+    def capture_in_result(self, processes=0):
+        """
+        Whether the test result should capture the output of the tests;
+        the worker processes capture the output themselves, as do the
+        threaded and concurrent suites.
+        """
+
+        return self.options.capture and not processes
+
+    def run_in_process(self, runner, features):
+        """
+        Load the steps and the given features and run them in the current
+        process.
+        """
+
+        self.load_step_definitions()
+        suite = self.load_tests(features)
+
+        before_all, after_all = CALLBACK_REGISTRY.before_after('all')
+
+        before_all()
+        try:
+            return runner.run(suite)
+        finally:
+            try:
+                after_all()
+            finally:
+                close_event_loops()
@@ -0,0 +1,404 @@
+"""
+Running the features in multiple processes.
+"""
+
+import io
+import multiprocessing
+import queue
+import traceback
+import unittest
+
+from aloe.eventloop import close_event_loops
+from aloe.history import record_pass, scenario_id, test_key
+from aloe.registry import CALLBACK_REGISTRY
+from aloe.terminal import Terminal, TERMINAL
+
+# How often to check for the workers exiting unexpectedly, in seconds
+POLL_INTERVAL = 0.5
+
+
+class RemoteTest(object):
+    """
+    A picklable stand-in for a test run in a worker process, providing what
+    the test results need to display it.
+    """
+
+    # pylint:disable=too-many-arguments
+    def __init__(self, description, short_description=None, test_id=None,
+                 history_key=None, scenario_id=None):
+        # pylint:disable=redefined-outer-name
+        self.description = description
+        self.short_description = short_description
+        self.test_id = test_id or description
+        self.history_key = history_key
+        self.scenario_id = scenario_id
+
+    @classmethod
+    def from_test(cls, test):
+        """Describe a test (or a subtest, or an error holder)."""
+
+        # A subtest is described with its parameters
+        if hasattr(test, 'test_case'):
+            short_description = None
+        else:
+            short_description = test.shortDescription()
+
+        return cls(str(test), short_description, test.id(),
+                   test_key(test), scenario_id(test))
+
+    def __str__(self):
+        return self.description
+
+    def shortDescription(self):  # pylint:disable=invalid-name
+        """The short description of the test."""
+        return self.short_description
+
+    def id(self):  # pylint:disable=invalid-name
+        """The test identifier."""
+        return self.test_id
+
+
+class WorkerResult(unittest.TestResult):
+    """
+    A test result sending the test progress to the parent process.
+
+    Errors are sent formatted, including the captured output. The output of
+    the hooks (e.g. the steps at verbosity 3) is sent along with each event.
+    """
+
+    def __init__(self, worker, verbosity, force_color):
+        super().__init__()
+        self.worker = worker
+
+        if verbosity >= 3:
+            TERMINAL[0] = Terminal(stream=worker.output,
+                                   force_styling=force_color)
+        else:
+            TERMINAL[0] = None
+
+    @property
+    def shouldStop(self):  # pylint:disable=invalid-name
+        """Stop when any of the workers (or the parent) asked to."""
+        return self.worker.stop_event.is_set()
+
+    @shouldStop.setter
+    def shouldStop(self, value):  # pylint:disable=invalid-name
+        if value:
+            self.worker.stop_event.set()
+
+    def send(self, name, test, *args):
+        """Send an event for the test to the parent process."""
+        self.worker.send('event', name, RemoteTest.from_test(test), *args)
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.send('startTest', test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.send('stopTest', test)
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        record_pass(test, True)
+        self.send('addSuccess', test)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        record_pass(test, False)
+        self.send('addError', test, self.errors[-1][1])
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        record_pass(test, False)
+        self.send('addFailure', test, self.failures[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self.send('addSkip', test, reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self.send('addExpectedFailure', test, self.expectedFailures[-1][1])
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self.send('addUnexpectedSuccess', test)
+
+    def addDuration(self, test, elapsed):  # pylint:disable=invalid-name
+        """Send the duration of a test."""
+
+        if hasattr(super(), 'addDuration'):
+            super().addDuration(test, elapsed)
+        self.send('addDuration', test, elapsed)
+
+    def _exc_info_to_string(self, err, test):
+        # The errors from the threads are already formatted
+        if isinstance(err, str):
+            return err
+
+        return super()._exc_info_to_string(err, test)
+
+    def addSubTest(self, test, subtest, err):
+        # Failed subtests are reported as separate tests
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            record_pass(test, False)
+            if issubclass(err[0], test.failureException):
+                self.send('addFailure', subtest, self.failures[-1][1])
+            else:
+                self.send('addError', subtest, self.errors[-1][1])
+
+
+class Worker(object):
+    """
+    A worker process running the features sent by the parent process, with
+    a runner of the same class as the parent's.
+
+    The steps are loaded and the "all" callbacks are run once for the
+    worker. The worker exits after running max_features features, if that
+    is set.
+    """
+
+    # pylint:disable=too-many-arguments
+    def __init__(self, runner_class, worker_id, options, feature_lines,
+                 tasks, messages, stop_event):
+        # The runner only loads the features, so it isn't constructed (which
+        # would run them)
+        self.runner = runner_class.__new__(runner_class)
+        self.runner.options = options
+        self.runner.feature_lines = feature_lines
+
+        self.worker_id = worker_id
+        self.options = options
+        self.tasks = tasks
+        self.messages = messages
+        self.stop_event = stop_event
+        self.output = io.StringIO()
+
+    def send(self, kind, *args):
+        """Send a message to the parent along with the output so far."""
+
+        output = self.output.getvalue()
+        self.output.seek(0)
+        self.output.truncate()
+
+        self.messages.put((kind, self.worker_id, output) + args)
+
+    def run(self):
+        """Run the features until told to stop."""
+
+        try:
+            self.runner.configure()
+            self.runner.find_feature_directories()
+            self.runner.load_step_definitions()
+            before_all, after_all = CALLBACK_REGISTRY.before_after('all')
+            before_all()
+        except Exception:  # pylint:disable=broad-except
+            self.send('failed', traceback.format_exc())
+            return
+
+        max_features = self.options.process_max_features
+        count = 0
+
+        try:
+            while not max_features or count < max_features:
+                self.send('ready')
+                filename = self.tasks.get()
+                if filename is None:
+                    break
+
+                count += 1
+                self.run_feature(filename)
+        finally:
+            try:
+                after_all()
+            finally:
+                close_event_loops()
+                self.send('exit')
+
+    def run_feature(self, filename):
+        """Run a single feature file."""
+
+        result = WorkerResult(self, self.options.verbosity,
+                              self.options.force_color)
+        result.failfast = self.options.stop
+        result.buffer = self.runner.capture_in_result()
+
+        try:
+            suite = self.runner.load_feature(filename)
+        except Exception:  # pylint:disable=broad-except
+            # Report the feature that can't be loaded as a failed test
+            test = RemoteTest(filename)
+            self.send('event', 'startTest', test)
+            self.send('event', 'addError', test, traceback.format_exc())
+            self.send('event', 'stopTest', test)
+            return
+
+        try:
+            suite(result)
+        finally:
+            pass_history = self.runner.test_class.pass_history
+            if pass_history is not None:
+                pass_history.save()
+
+
+def run_worker(*args):
+    """The entry point of a worker process."""
+
+    Worker(*args).run()
+
+
+class ProcessPool(object):
+    """
+    A test (callable with a result) running the given feature files in a
+    pool of worker processes, and reporting all the results to it.
+
+    :param runner: the NativeRunner with the options to use
+    :param features: the feature files to run
+    :param processes: the number of worker processes
+    """
+
+    def __init__(self, runner, features, processes):
+        self.runner = runner
+        self.pending = list(features)
+        self.processes = processes
+
+        self.context = multiprocessing.get_context()
+        self.messages = self.context.Queue()
+        self.stop_event = self.context.Event()
+
+        # Worker processes and their task queues by ID
+        self.workers = {}
+        # The feature each worker is running
+        self.running = {}
+        self.next_id = 0
+
+        self.stopping = False
+
+    def start_worker(self):
+        """Start a new worker process."""
+
+        worker_id = self.next_id
+        self.next_id += 1
+
+        tasks = self.context.Queue()
+        process = self.context.Process(
+            target=run_worker,
+            args=(type(self.runner), worker_id, self.runner.options,
+                  self.runner.feature_lines,
+                  tasks, self.messages, self.stop_event),
+        )
+        process.daemon = True
+        process.start()
+
+        self.workers[worker_id] = (process, tasks)
+
+    def start_workers(self):
+        """Start the workers needed for the pending features."""
+
+        while not self.stopping and \
+                len(self.workers) < min(self.processes, len(self.pending)):
+            self.start_worker()
+
+    def stop(self):
+        """Don't run any more features, and stop the running ones."""
+
+        self.stopping = True
+        self.stop_event.set()
+
+    def report_error(self, result, description, error):
+        """Report an error not attributable to a test."""
+
+        test = RemoteTest(description)
+        result.startTest(test)
+        result.addError(test, error)
+        result.stopTest(test)
+
+    def handle(self, result, message):
+        """Act on a message from a worker."""
+
+        kind, worker_id, output = message[:3]
+        args = message[3:]
+
+        if output:
+            result.stream.write(output)
+            result.stream.flush()
+
+        if kind == 'event':
+            name, test = args[:2]
+            getattr(result, name)(test, *args[2:])
+            if result.shouldStop:
+                self.stop()
+        elif kind == 'ready':
+            self.running.pop(worker_id, None)
+            if worker_id not in self.workers:
+                # Already reported as exited
+                return
+            tasks = self.workers[worker_id][1]
+            if self.pending and not self.stopping:
+                self.running[worker_id] = self.pending.pop(0)
+                tasks.put(self.running[worker_id])
+            else:
+                tasks.put(None)
+        elif kind == 'failed':
+            process, _ = self.workers.pop(worker_id, (None, None))
+            if process is not None:
+                process.join()
+            self.report_error(result,
+                              'Worker {0} setup'.format(worker_id), args[0])
+            self.stop()
+        elif kind == 'exit':
+            process, _ = self.workers.pop(worker_id, (None, None))
+            if process is not None:
+                process.join()
+            # Replace the worker if it exited after max_features
+            self.start_workers()
+
+    def check_workers(self, result):
+        """Report the workers exiting without telling the parent."""
+
+        # The workers exiting normally might have sent their last messages
+        # since the parent stopped waiting for them
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            self.handle(result, message)
+
+        for worker_id, (process, _) in list(self.workers.items()):
+            if process.is_alive():
+                continue
+
+            self.workers.pop(worker_id, None)
+            feature = self.running.pop(worker_id, None)
+            self.report_error(
+                result,
+                feature or 'Worker {0}'.format(worker_id),
+                "Worker process exited unexpectedly with code {0}.".format(
+                    process.exitcode),
+            )
+
+            if self.runner.options.stop:
+                self.stop()
+
+        self.start_workers()
+
+    def __call__(self, result):
+        try:
+            self.start_workers()
+
+            while self.workers:
+                try:
+                    message = self.messages.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    self.check_workers(result)
+                else:
+                    self.handle(result, message)
+        finally:
+            for process, _ in self.workers.values():
+                process.terminate()
+                process.join()
+
+        return result
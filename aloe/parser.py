@@ -3,14 +3,20 @@
 A Gherkin parser written using pyparsing.
 """
 
+import io
 import os
+import re
 from collections import OrderedDict
+from contextlib import contextmanager
 from copy import copy
+from functools import partial
 
+from gherkin.ast_builder import AstBuilder
 from gherkin.dialect import Dialect
 from gherkin.errors import ParserError
 from gherkin.parser import Parser
 from gherkin.token_matcher import TokenMatcher
+from gherkin.token_scanner import TokenScanner
 
 from aloe import strings
 from aloe.exceptions import AloeSyntaxError
@@ -33,6 +39,61 @@ class LanguageTokenMatcher(TokenMatcher):
         super()._change_dialect(self.actual_dialect_name, location=location)
 
 
+class StringTokenScanner(TokenScanner):
+    """Gherkin token scanner reading a string, never a file of that name."""
+
+    # pylint:disable=super-init-not-called
+    def __init__(self, string):
+        self.io = io.StringIO(string, newline=None)
+        self.line_number = 0
+    # pylint:enable=super-init-not-called
+
+
+class ParserPool(object):
+    """
+    Gherkin parsers and token matchers to reuse between parses, by language.
+
+    The parser resets itself and the token matcher before each use.
+    """
+
+    def __init__(self):
+        self.free = {}
+
+    @staticmethod
+    def token_matcher(language):
+        """A token matcher for the given language, or the default one."""
+
+        if language:
+            if language == 'pt-br':
+                language = 'pt'
+            return LanguageTokenMatcher(language)
+        else:
+            return TokenMatcher()
+
+    @contextmanager
+    def parser(self, language=None):
+        """
+        A context manager giving a function to parse a Gherkin document
+        (either a string, a filename or a token scanner) in the given
+        language.
+        """
+
+        try:
+            parser, token_matcher = self.free[language].pop()
+        except (KeyError, IndexError):
+            parser = Parser(ast_builder=AstBuilder())
+            token_matcher = self.token_matcher(language)
+
+        try:
+            yield partial(parser.parse, token_matcher=token_matcher)
+        finally:
+            self.free.setdefault(language, []).append(
+                (parser, token_matcher))
+
+
+PARSER_POOL = ParserPool()
+
+
 def cell_values(row):
     """Extract cell values from a table header or row."""
 
@@ -329,32 +390,7 @@ class Step(Node):
         Creates a copy of the step with any <variables> resolved.
         """
 
-        replaced = copy(self)
-
-        def replace_vars(string):
-            """Replace all the variables in a string."""
-            for key, value in outline.items():
-                key = '<{key}>'.format(key=key)
-                string = string.replace(key, value)
-            return string
-
-        replaced.sentence = replace_vars(self.sentence)
-
-        if self.multiline:
-            replaced.multiline = replace_vars(self.multiline)
-
-        if self.table:
-            replaced.table = tuple(
-                tuple(
-                    replace_vars(cell)
-                    for cell in row
-                )
-                for row in self.table
-            )
-
-        replaced.outline = outline
-
-        return replaced
+        return StepTemplate(self, outline.keys()).fill(outline)
 
     def step_keyword(self, kind):
         """
@@ -377,6 +413,90 @@ class Step(Node):
         )
 
 
+class StepTemplate(object):
+    """
+    The sentence, multiline text and table of a step compiled for the
+    outlines with the given keys, to fill in the <variables> of each outline
+    in a single pass.
+
+    Each text is split once into the literal parts and the keys in between;
+    the texts without variables are kept as they are.
+    """
+
+    def __init__(self, step, keys):
+        self.step = step
+
+        keys = tuple(keys)
+        if keys:
+            self.pattern = re.compile('<({0})>'.format(
+                '|'.join(re.escape(key) for key in keys)))
+        else:
+            self.pattern = None
+
+        self.sentence = self.compile(step.sentence)
+
+        self.multiline = None
+        if step.multiline:
+            multiline = self.compile(step.multiline)
+            if not isinstance(multiline, str):
+                self.multiline = multiline
+
+        self.table = None
+        if step.table:
+            table = tuple(
+                tuple(self.compile(cell) for cell in row)
+                for row in step.table
+            )
+            if any(not isinstance(cell, str) for row in table for cell in row):
+                self.table = table
+
+    def compile(self, string):
+        """
+        Split a string into the literal parts and the keys between them, or
+        return it as it is if it has no variables.
+        """
+
+        if self.pattern is None:
+            return string
+
+        parts = self.pattern.split(string)
+        if len(parts) == 1:
+            return string
+
+        return tuple(parts)
+
+    @staticmethod
+    def substitute(template, outline):
+        """Fill in a compiled string with the values of the outline."""
+
+        if isinstance(template, str):
+            return template
+
+        parts = list(template)
+        parts[1::2] = [outline[key] for key in template[1::2]]
+        return ''.join(parts)
+
+    def fill(self, outline):
+        """A copy of the step with the values of the outline filled in."""
+
+        replaced = copy(self.step)
+
+        replaced.sentence = self.substitute(self.sentence, outline)
+
+        if self.multiline is not None:
+            replaced.multiline = self.substitute(self.multiline, outline)
+
+        if self.table is not None:
+            replaced.table = tuple(
+                tuple(self.substitute(cell, outline) for cell in row)
+                for row in self.table
+            )
+
+        replaced.outline = outline
+
+        return replaced
+
+
 class StepContainer(Node):
     """A node containing steps, e.g. Feature:, Scenario:"""
 
@@ -503,6 +623,9 @@ class Scenario(HeaderNode, TaggedNode, StepContainer):
         # token is a list of table tokens
         self.outlines = ()
 
+        # The step templates by the outline keys
+        self._step_templates = {}
+
         for example_table in parsed.get('examples', ()):
             # the first row of the table is the column headings
             keys = cell_values(example_table['tableHeader'])
@@ -569,14 +692,43 @@ class Scenario(HeaderNode, TaggedNode, StepContainer):
         """
 
         for outline in self.outlines:
-            steps = [step.resolve_substitutions(outline)
-                     for step in self.steps]
+            yield (outline, self.evaluate(outline))
 
-            # set a backref to the scenario
-            for step in steps:
-                step.scenario = self
+    def evaluate(self, outline):
+        """
+        Return the steps with the variables from a single outline resolved.
+        """
+
+        keys = tuple(outline.keys())
+        try:
+            templates = self._step_templates[keys]
+        except KeyError:
+            templates = self._step_templates[keys] = [
+                StepTemplate(step, keys)
+                for step in self.steps
+            ]
+
+        steps = [template.fill(outline) for template in templates]
+
+        # set a backref to the scenario
+        for step in steps:
+            step.scenario = self
+
+        return steps
+
+    def at_lines(self, lines, outline=None):
+        """
+        Whether the scenario (or the given outline example of it) is at any
+        of the given lines: the scenario line, the step lines or the example
+        line.
+        """
+
+        scenario_lines = set(step.line for step in self.steps)
+        scenario_lines.add(self.line)
+        if outline is not None:
+            scenario_lines.add(outline.line)
 
-            yield (outline, steps)
+        return bool(lines & scenario_lines)
 
 
 class Description(Node):
@@ -655,6 +807,12 @@ class Feature(HeaderNode, TaggedNode):
 
     background = None
 
+    parse_cache = None
+    """
+    A :class:`aloe.cache.ParseCache` to store the parsed feature files in,
+    or None to always parse them.
+    """
+
     def __init__(self, parsed, filename=None, **kwargs):
         # Gherkin's top level definition is a GherkinDocument, which doesn't
         # have a location
@@ -688,22 +846,20 @@ class Feature(HeaderNode, TaggedNode):
         Parse either a string or a file.
         """
 
-        parser = Parser()
-        if language:
-            if language == 'pt-br':
-                language = 'pt'
-            token_matcher = LanguageTokenMatcher(language)
-        else:
-            token_matcher = TokenMatcher()
-
         try:
-            return cls(
-                parser.parse(string or filename, token_matcher=token_matcher),
-                filename=filename,
-            )
+            with PARSER_POOL.parser(language) as parse:
+                if string is None and cls.parse_cache is not None:
+                    parsed = cls.parse_cache.parse(
+                        filename, language,
+                        lambda content: parse(StringTokenScanner(content)),
+                    )
+                else:
+                    parsed = parse(string or filename)
         except ParserError as ex:
             raise AloeSyntaxError(filename, str(ex)) from ex
 
+        return cls(parsed, filename=filename)
+
     @classmethod
     def from_string(cls, string, language=None):
         """
@@ -728,7 +884,7 @@ class Feature(HeaderNode, TaggedNode):
         """
         return str(self.description_node)
 
-    @property
+    @memoizedproperty
     def dialect(self):
         """
         The Gherkin dialect for the feature.
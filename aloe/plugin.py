@@ -4,13 +4,34 @@ Gherkin plugin for Nose.
 
 import sys
 import os
+import unittest
 
 from importlib import import_module
 
 from nose.plugins import Plugin
 from nose.plugins.attrib import AttributeSelector
 
-from aloe.fs import FeatureLoader
+from aloe.cache import (
+    CodeCache,
+    DEFAULT_CACHE_DIR,
+    FeatureManifest,
+    ParseCache,
+)
+from aloe.eventloop import close_event_loops
+from aloe.fs import (
+    DirectorySet,
+    FeatureLoader,
+    discover_feature_directories,
+    feature_lines,
+)
+from aloe.history import (
+    FailureHistory,
+    PassHistory,
+    example_index,
+    record_pass,
+    scenario_id,
+)
+from aloe.parser import Feature
 from aloe.registry import CALLBACK_REGISTRY
 from aloe.testclass import TestCase
 from aloe.result import AloeTestResult
@@ -39,16 +60,31 @@ class GherkinPlugin(Plugin):
         super().__init__()
         self.attrib_plugin = AttributeSelector()
 
+        # Lines to select the scenarios at, by the feature file
+        self.feature_lines = {}
+
     def begin(self):
         """
-        Start the test suite, loading all the step definitions.
+        Start the test suite, loading all the step definitions (or only the
+        ones the selected features need).
         """
 
         if self.conf.options.version or self.conf.options.showPlugins:
             # Don't try to load anything if only called for information
             return
 
-        self.feature_dirs = list(FeatureLoader.find_feature_directories('.'))
+        self.feature_dirs = list(discover_feature_directories(
+            self.feature_roots, self.exclude_dirs, manifest=self.manifest))
+        self.feature_dir_set = DirectorySet(self.feature_dirs)
+
+        if self.lazy_steps:
+            # Imported here to only read the step manifest when needed
+            from aloe.lazy import load_step_definitions
+            load_step_definitions(self.feature_dirs, self.conf.testNames,
+                                  self.step_libraries,
+                                  cache_dir=self.cache_dir)
+            return
+
         for feature_dir in self.feature_dirs:
             FeatureLoader.find_and_load_step_definitions(feature_dir)
 
@@ -89,6 +125,124 @@ class GherkinPlugin(Plugin):
             default=False,
             help='Force colored output',
         )
+        parser.add_option(
+            '--cache-dir', action='store',
+            dest='cache_dir',
+            default=env.get('NOSE_GHERKIN_CACHE_DIR', DEFAULT_CACHE_DIR),
+            metavar='DIR',
+            help='Directory to keep the caches between runs in',
+        )
+        parser.add_option(
+            '--parse-cache', action='store_true',
+            dest='parse_cache',
+            default=bool(env.get('NOSE_GHERKIN_PARSE_CACHE')),
+            help='Cache the parsed feature files between runs',
+        )
+        parser.add_option(
+            '--no-parse-cache', action='store_false',
+            dest='parse_cache',
+            help='Parse all the feature files again',
+        )
+        parser.add_option(
+            '--code-cache', action='store_true',
+            dest='code_cache',
+            default=bool(env.get('NOSE_GHERKIN_CODE_CACHE')),
+            help='Cache the code compiled for the scenarios between runs',
+        )
+        parser.add_option(
+            '--no-code-cache', action='store_false',
+            dest='code_cache',
+            help='Compile the code for all the scenarios again',
+        )
+        parser.add_option(
+            '--feature-root', action='append',
+            dest='feature_roots',
+            default=[],
+            metavar='DIR',
+            help='Look for the feature directories under DIR instead of the '
+            'current directory (or the feature_roots in setup.cfg)',
+        )
+        parser.add_option(
+            '--exclude-dir', action='append',
+            dest='exclude_dirs',
+            default=[],
+            metavar='GLOB',
+            help='Skip the directories matching GLOB when looking for the '
+            'feature directories, in addition to the exclude in setup.cfg',
+        )
+        parser.add_option(
+            '--manifest', action='store_true',
+            dest='manifest',
+            default=bool(env.get('NOSE_GHERKIN_MANIFEST')),
+            help='Remember the feature directories between runs, searching '
+            'again only when the directories change',
+        )
+        parser.add_option(
+            '--no-manifest', action='store_false',
+            dest='manifest',
+            help='Search for the feature directories again',
+        )
+        parser.add_option(
+            '--lazy-steps', action='store_true',
+            dest='lazy_steps',
+            default=bool(env.get('NOSE_GHERKIN_LAZY_STEPS')),
+            help='Only import the step definitions of the feature '
+            'directories of the selected features, and the others when a '
+            'step needs them',
+        )
+        parser.add_option(
+            '--no-lazy-steps', action='store_false',
+            dest='lazy_steps',
+            help='Import all the step definitions',
+        )
+        parser.add_option(
+            '--step-library', action='append',
+            dest='step_libraries',
+            default=[],
+            metavar='PATH',
+            help='Always import the step definitions in PATH (a directory, '
+            'a file or a module name) with --lazy-steps, in addition to the '
+            'step_libraries in setup.cfg',
+        )
+        parser.add_option(
+            '--batch-outlines', action='store_true',
+            dest='batch_outlines',
+            default=bool(env.get('NOSE_GHERKIN_BATCH_OUTLINES')),
+            help='Run all the examples of each scenario outline in a single '
+            'test, each as a subtest',
+        )
+        parser.add_option(
+            '--lf', '--last-failed', action='store_true',
+            dest='last_failed',
+            default=False,
+            help='Only run the scenarios that failed the last time they ran, '
+            'or all of them if none did',
+        )
+        parser.add_option(
+            '--ff', '--failed-first', action='store_true',
+            dest='failed_first',
+            default=False,
+            help='Run the scenarios that failed the last time first '
+            'in each feature',
+        )
+        parser.add_option(
+            '--incremental', action='store_true',
+            dest='incremental',
+            default=bool(env.get('NOSE_GHERKIN_INCREMENTAL')),
+            help='Skip the scenarios that passed before, unless their steps, '
+            'step definitions or hooks changed',
+        )
+        parser.add_option(
+            '--no-incremental', action='store_false',
+            dest='incremental',
+            help='Run all the scenarios, even if they passed before',
+        )
+        parser.add_option(
+            '--clear-incremental', action='store_true',
+            dest='clear_incremental',
+            default=False,
+            help='Forget the scenarios that passed before',
+        )
 
         # Options for attribute plugin will be registered by its main instance
 
@@ -106,6 +260,28 @@ class GherkinPlugin(Plugin):
 
         conf.force_color = options.force_color
 
+        if options.parse_cache:
+            Feature.parse_cache = ParseCache(options.cache_dir)
+        else:
+            Feature.parse_cache = None
+
+        if options.code_cache:
+            self.test_class.code_cache = CodeCache(options.cache_dir)
+        else:
+            self.test_class.code_cache = None
+
+        self.test_class.batch_outlines = options.batch_outlines
+
+        self.lazy_steps = options.lazy_steps
+        self.step_libraries = options.step_libraries
+        self.cache_dir = options.cache_dir
+        self.feature_roots = options.feature_roots
+        self.exclude_dirs = options.exclude_dirs
+        if options.manifest:
+            self.manifest = FeatureManifest(options.cache_dir)
+        else:
+            self.manifest = None
+
         if options.scenario_indices:
             self.scenario_indices = tuple(
                 int(index)
@@ -114,6 +290,22 @@ class GherkinPlugin(Plugin):
         else:
             self.scenario_indices = None
 
+        if options.incremental or options.clear_incremental:
+            passes = PassHistory(options.cache_dir)
+            if options.clear_incremental:
+                passes.clear()
+            self.test_class.pass_history = \
+                passes if options.incremental else None
+        else:
+            self.test_class.pass_history = None
+
+        self.failures = FailureHistory(options.cache_dir)
+        # Without any recorded failures, all the scenarios run
+        self.last_failed = options.last_failed and bool(self.failures)
+        self.failed_first = options.failed_first
+        # Whether each scenario that ran passed, by the scenario ID
+        self.outcomes = {}
+
         self.attrib_plugin.configure(options, conf)
 
     def wantDirectory(self, directory):
@@ -125,31 +317,27 @@ class GherkinPlugin(Plugin):
         below to collect features from all the subdirectories.
         """
 
-        directory = os.path.abspath(directory)
-        for feature_dir in self.feature_dirs:
-            feature_dir = os.path.abspath(feature_dir)
-            if feature_dir.startswith(directory) or \
-                    directory.startswith(feature_dir):
-                return True
+        if self.feature_dir_set.leads_to(directory) or \
+                directory in self.feature_dir_set:
+            return True
 
     def wantFile(self, file_):
         """
         Load features from feature files.
         """
 
-        # Check that the feature is in one of the features directories
-        file_dir = os.path.abspath(os.path.dirname(file_))
-        if any(
-                file_dir.startswith(os.path.abspath(feature_dir))
-                for feature_dir in self.feature_dirs
-        ):
-            # Check the file extension
-            # Convert to str (not bytes) since Nose passes in both depending on
-            # whether the feature is in a Python module dir or not
-            if isinstance(file_, bytes):
-                file_ = file_.decode(sys.getfilesystemencoding())
-            if os.path.basename(file_).endswith('.feature'):
-                return True
+        # Convert to str (not bytes) since Nose passes in both depending on
+        # whether the feature is in a Python module dir or not
+        if isinstance(file_, bytes):
+            file_ = file_.decode(sys.getfilesystemencoding())
+
+        # Check the file extension and that the feature is in one of the
+        # features directories
+        if file_.endswith('.feature') and \
+                os.path.dirname(file_) in self.feature_dir_set:
+            if self.last_failed:
+                return self.failures.feature_failed(file_)
+            return True
 
     def wantPython(self, _):
         """
@@ -161,44 +349,94 @@ class GherkinPlugin(Plugin):
 
     wantClass = wantFunction = wantMethod = wantModule = wantPython
 
-    def scenario_matches(self, feature, scenario_index, scenario_name):
+    def scenario_matches(self, feature, scenario, scenario_index, outline):
         """
         Whether a given scenario is selected by the command-line options.
 
         @feature The feature class
+        @scenario The scenario
         @scenario_index The scenario index
-        @scenario_name The scenario name
+        @outline The outline example, or None if the scenario has none
         """
 
+        if self.last_failed and not self.failures.scenario_failed(
+                feature.feature.filename, scenario_index,
+                example_index(scenario, outline)):
+            return False
+
         if self.scenario_indices:
             if scenario_index not in self.scenario_indices:
                 return False
 
+        lines = self.feature_lines.get(
+            os.path.abspath(feature.feature.filename))
+        if lines is not None and not scenario.at_lines(lines, outline):
+            return False
+
         if self.attrib_plugin.enabled:
-            scenario = getattr(feature, scenario_name)
+            # Check the attributes the scenario method would have
+            method = feature.make_example(lambda self: None,
+                                          scenario, scenario_index)
             # False means "no", None means "don't care" for Nose plugins
-            if self.attrib_plugin.validateAttrib(scenario, feature) is False:
+            if self.attrib_plugin.validateAttrib(method, feature) is False:
                 return False
 
         return True
 
+    def loadTestsFromName(self, name, module=None):
+        """
+        Load the scenarios at the given lines of a feature file, named as
+        'file.feature:LINE[:LINE...]'.
+        """
+
+        if module is not None:
+            return None
+
+        selection = feature_lines(name)
+        if selection is None:
+            return None
+
+        filename, lines = selection
+
+        key = os.path.abspath(filename)
+        self.feature_lines[key] = lines
+
+        try:
+            tests = [test for test in self.loadTestsFromFile(filename) if test]
+        finally:
+            del self.feature_lines[key]
+
+        # An empty suite signals the name is handled even if all the
+        # scenarios were filtered out
+        return tests or [unittest.TestSuite()]
+
     def loadTestsFromFile(self, file_):
         """
         Load a feature from the feature file.
+
+        Only the scenarios selected by the command-line options are compiled.
         """
 
-        test = self.test_class.from_file(file_)
+        test = self.test_class.from_file(
+            file_, scenario_filter=self.scenario_matches)
 
         # About to run a feature - ensure "before all" callbacks have run
         self.ensure_before_callbacks()
 
         has_tests = False
 
-        # Filter the scenarios, if asked
-        for idx, scenario_name in test.scenarios():
-            if self.scenario_matches(test, idx, scenario_name):
-                has_tests = True
-                yield test(scenario_name)
+        tests = [
+            test(scenario_name)
+            for _, scenario_name in test.scenarios()
+        ]
+
+        if self.failed_first:
+            tests = self.failures.failed_first(
+                tests, failed=self.failures.test_failed)
+
+        for scenario in tests:
+            has_tests = True
+            yield scenario
 
         # Feature OK but no tests filtered
         if not has_tests:
@@ -214,17 +452,55 @@ class GherkinPlugin(Plugin):
             before_all()
             self.after_hook = after_all
 
+    def record_outcome(self, test, passed):
+        """Record whether a scenario passed."""
+
+        # Nose passes its own wrappers of the tests
+        test = getattr(test, 'test', test)
+        identity = scenario_id(test)
+        if identity is not None:
+            self.outcomes[identity] = passed
+            record_pass(test, passed)
+
+    def addSuccess(self, test):
+        """Record the passed scenario."""
+        self.record_outcome(test, True)
+
+    def addError(self, test, err):
+        """Record the scenario with an error."""
+        self.record_outcome(test, False)
+
+    def addFailure(self, test, err):
+        """Record the failed scenario."""
+        self.record_outcome(test, False)
+
     def finalize(self, result):
         """
-        After the last test, run the "after all" callbacks.
+        After the last test, run the "after all" callbacks, and save the
+        failed and passed scenarios.
         """
 
         # TODO: Is there a better method to do something _after_ all the tests
         # have been run?
 
         if hasattr(self, 'after_hook'):
-            self.after_hook()
-            delattr(self, 'after_hook')
+            try:
+                self.after_hook()
+            finally:
+                delattr(self, 'after_hook')
+                close_event_loops()
+
+        if Feature.parse_cache is not None:
+            Feature.parse_cache.prune()
+
+        if self.test_class.code_cache is not None:
+            self.test_class.code_cache.prune()
+
+        self.failures.record(self.outcomes)
+        self.failures.save()
+
+        if self.test_class.pass_history is not None:
+            self.test_class.pass_history.save()
 
     def prepareTestRunner(self, runner):
         """
@@ -0,0 +1,190 @@
+"""
+Running the steps the scenarios of a feature start with only once.
+
+The background and the scenario steps of each test form a sequence; the
+tests whose sequences start with the same steps share them. The first test
+to run a shared prefix saves a snapshot of the state after it, and the
+following tests restore the snapshot instead of running the prefix again,
+then run their remaining steps.
+
+Each test still runs as itself, inside its example callbacks, so the
+results are reported for every scenario. The steps restored from a
+snapshot are not run, and so not shown. A step marked with
+aloe.snapshot.side_effect, and the ones after it, always run.
+"""
+
+import threading
+from functools import update_wrapper
+
+from aloe.registry import CALLBACK_REGISTRY, STEP_REGISTRY
+from aloe.snapshot import Snapshot, has_side_effect
+
+
+def step_key(definition):
+    """
+    The key of a prepared step: the step definition it runs and the
+    sentence, table and multiline text giving its arguments.
+    """
+
+    step = definition['step']
+    func = STEP_REGISTRY.match_step(step)[0]
+    return (func, step.sentence, repr(step.table), step.multiline)
+
+
+def common_length(keys, other):
+    """The number of steps two sequences start with in common."""
+
+    length = 0
+    for key, other_key in zip(keys, other):
+        if key != other_key:
+            break
+        length += 1
+
+    return length
+
+
+class PrefixScheduler(object):
+    """
+    Make the given tests of a single test class share the steps they start
+    with, replacing their test methods.
+
+    :param tests: the tests, in the order they will run
+    """
+
+    def __init__(self, tests):
+        self.tests = list(tests)
+
+        # Snapshots by the keys of the steps run before them; False if the
+        # state after the steps can't be saved
+        self.snapshots = {}
+        self.lock = threading.Lock()
+
+        sequences = [self.sequence(test) for test in self.tests]
+
+        for index, (test, sequence) in enumerate(
+                zip(self.tests, sequences)):
+            lengths = [
+                common_length(sequence[1], other_keys)
+                for other_index, (_, other_keys, _) in enumerate(sequences)
+                if other_index != index
+            ]
+            if not any(lengths):
+                continue
+
+            # The points to save the snapshots at for the following tests
+            branches = set(lengths[index:]) - {0}
+            self.share(test, sequence, branches)
+
+    @staticmethod
+    def sequence(test):
+        """
+        The prepared steps the test runs, with the keys of the ones that can
+        be shared, up to the first step with side effects, and the prepared
+        steps of the scenario alone.
+        """
+
+        # pylint:disable=protected-access
+        method = getattr(test, test._testMethodName)
+        background = getattr(type(test).background, 'step_definitions', ())
+
+        if hasattr(method, 'prepare_steps'):
+            # The outline examples are otherwise prepared when they run
+            steps = method.prepare_steps().step_definitions
+        elif hasattr(method, 'step_definitions'):
+            steps = method.step_definitions
+        else:
+            # The examples of a batched outline share nothing
+            return (), (), ()
+
+        definitions = list(background) + list(steps)
+
+        keys = []
+        for definition in definitions:
+            if has_side_effect(STEP_REGISTRY.match_step(
+                    definition['step'])[0]):
+                break
+            keys.append(step_key(definition))
+
+        return definitions, tuple(keys), steps
+
+    def share(self, test, sequence, branches):
+        """Replace the test method to run the steps sharing the prefixes."""
+
+        definitions, keys, steps = sequence
+
+        # pylint:disable=protected-access
+        method = getattr(test, test._testMethodName)
+        scenario = method.scenario
+        if method.example_index is None:
+            outline = None
+        else:
+            outline = scenario.outlines[method.example_index - 1]
+
+        def run_steps():
+            """Run the steps, starting from the deepest snapshot."""
+            self.run_steps(test, definitions, keys, branches)
+
+        run = CALLBACK_REGISTRY.wrap(
+            'example', run_steps, scenario, outline,
+            [definition['step'] for definition in steps])
+        update_wrapper(run, method.__func__)
+
+        setattr(test, test._testMethodName, run)
+
+    def save(self, keys):
+        """Save the snapshot of the state after the given steps."""
+
+        if keys in self.snapshots:
+            return
+
+        try:
+            snapshot = Snapshot()
+        except Exception:  # pylint:disable=broad-except
+            # Don't share the steps that can't be restored
+            snapshot = False
+
+        with self.lock:
+            self.snapshots.setdefault(keys, snapshot)
+
+    def restore(self, keys):
+        """
+        Restore the deepest snapshot of the steps, returning the number of
+        steps restored.
+        """
+
+        for length in range(len(keys), 0, -1):
+            snapshot = self.snapshots.get(keys[:length])
+            if snapshot:
+                snapshot.restore()
+                return length
+
+        return 0
+
+    def run_steps(self, test, definitions, keys, branches):
+        """
+        Run the steps of a test not restored from a snapshot, saving the
+        snapshots at the branches for the following tests.
+        """
+
+        start = self.restore(keys)
+
+        for definition in definitions[:start]:
+            definition['step'].passed = True
+            definition['step'].failed = False
+
+        for index in range(start, len(definitions)):
+            if index in branches:
+                self.save(keys[:index])
+
+            definition = definitions[index]
+            step = definition['step']
+            try:
+                step.test = test
+                definition['func'](step,
+                                   *definition['args'],
+                                   **definition['kwargs'])
+            finally:
+                step.test = None
+
+        if len(definitions) in branches:
+            self.save(keys)
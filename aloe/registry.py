@@ -4,15 +4,18 @@ Registry of steps and hooks called when running scenarios.
 """
 
 import re
-from collections import OrderedDict
+import threading
+from collections import OrderedDict, namedtuple
 from functools import wraps, partial
+from operator import itemgetter
 
 from aloe.codegen import multi_manager
+from aloe.eventloop import sync_function, sync_manager
 from aloe.exceptions import (
     undefined_step,
     StepLoadingError,
 )
-from aloe.utils import unwrap_function
+from aloe.utils import function_module, unwrap_function
 
 
 # What part of the test to hook
@@ -95,6 +98,24 @@ class CallbackDict(dict):
         funcs[name] = function
     # pylint:enable=too-many-arguments
 
+    def unload_module(self, module_name):
+        """
+        Remove the callbacks defined in the given module. Returns whether
+        there were any.
+        """
+
+        removed = False
+
+        for what_dict in self.values():
+            for when_dict in what_dict.values():
+                for callback_list in when_dict.values():
+                    for name, function in list(callback_list.items()):
+                        if function_module(function) == module_name:
+                            del callback_list[name]
+                            removed = True
+
+        return removed
+
     def clear(self, name=None, priority_class=None):
         """
         Remove matching callbacks.
@@ -128,18 +149,34 @@ class CallbackDict(dict):
             for func in self[what][when][priority].values()
         )
 
+    def sync_hooks(self, what):
+        """
+        Get the before, around and after hooks for a certain event, with the
+        coroutine functions and asynchronous context managers converted to
+        run on the event loop.
+        """
+
+        return (
+            tuple(map(sync_function, self.hook_list(what, 'before'))),
+            tuple(map(sync_manager, self.hook_list(what, 'around'))),
+            tuple(map(sync_function, self.hook_list(what, 'after'))),
+        )
+
     def wrap(self, what, function, *hook_args, **hook_kwargs):
         """
         Return a function that executes all the callbacks in proper relations
         to the given test part.
+
+        A coroutine function (e.g. an async step) is run to completion on
+        the event loop.
         """
 
-        before_hooks = self.hook_list(what, 'before')
-        around_hooks = self.hook_list(what, 'around')
-        after_hooks = self.hook_list(what, 'after')
+        before_hooks, around_hooks, after_hooks = self.sync_hooks(what)
 
         multi_hook = multi_manager(*around_hooks)
 
+        function = sync_function(function)
+
         @wraps(function)
         def wrapped(*args, **kwargs):
             """Run all the hooks in proper relations to the event."""
@@ -161,27 +198,25 @@ class CallbackDict(dict):
         Return a pair of functions to execute before and after the event.
         """
 
-        before_hooks = self.hook_list(what, 'before')
-        around_hooks = self.hook_list(what, 'around')
-        after_hooks = self.hook_list(what, 'after')
+        before_hooks, around_hooks, after_hooks = self.sync_hooks(what)
 
         multi_hook = multi_manager(*around_hooks)
 
-        # Save in a closure for both functions
-        around_hook = [None]
+        # Save in a closure for both functions, separately for each thread
+        around_hook = threading.local()
 
         def before_func(*args, **kwargs):
             """All hooks to be called before the event."""
             for before_hook in before_hooks:
                 before_hook(*args, **kwargs)
 
-            around_hook[0] = multi_hook(*args, **kwargs)
-            around_hook[0].__enter__()
+            around_hook.manager = multi_hook(*args, **kwargs)
+            around_hook.manager.__enter__()
 
         def after_func(*args, **kwargs):
             """All hooks to be called after the event."""
-            around_hook[0].__exit__(None, None, None)
-            around_hook[0] = None
+            around_hook.manager.__exit__(None, None, None)
+            around_hook.manager = None
 
             for after_hook in after_hooks:
                 after_hook(*args, **kwargs)
@@ -189,19 +224,226 @@ class CallbackDict(dict):
         return before_func, after_func
 
 
+# Characters that only match themselves in a step regular expression
+LITERAL_CHARS = frozenset(
+    'abcdefghijklmnopqrstuvwxyz'
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    '0123456789'
+    ' !"#%&\',-/:;<=>@_`~'
+)
+
+# Characters starting a quantifier
+QUANTIFIERS = frozenset('?*+{')
+
+# Inline flags can change the meaning of the literal characters
+RE_INLINE_FLAGS = re.compile(r'\(\?[-aiLmsux]')
+
+RE_REPEAT = re.compile(r'\{\d*,?\d*\}')
+
+RE_WORD = re.compile(r'[a-z0-9]+')
+
+# Characters matching ASCII letters case-insensitively which str.lower()
+# doesn't convert into them
+CASE_FOLD = str.maketrans({
+    '\u0130': 'i',  # LATIN CAPITAL LETTER I WITH DOT ABOVE
+    '\u0131': 'i',  # LATIN SMALL LETTER DOTLESS I
+    '\u017f': 's',  # LATIN SMALL LETTER LONG S
+})
+
+
+def sentence_words(sentence):
+    """
+    The words of a sentence, in the form used by the step index.
+    """
+
+    return set(RE_WORD.findall(sentence.translate(CASE_FOLD).lower()))
+
+
+def _skip_class(pattern, pos):
+    """
+    Return the position after the character class starting at the given
+    position.
+    """
+
+    pos += 1
+    if pattern[pos:pos + 1] == '^':
+        pos += 1
+    if pattern[pos:pos + 1] == ']':
+        pos += 1
+    while pos < len(pattern) and pattern[pos] != ']':
+        pos += 2 if pattern[pos] == '\\' else 1
+    return pos + 1
+
+
+def literal_runs(pattern):
+    """
+    Split a regular expression into the literal strings that every match of
+    it must contain, in order.
+
+    Returns None if the pattern has alternatives at the top level or
+    contains inline flags, as nothing can be said about the matches then.
+    """
+
+    if RE_INLINE_FLAGS.search(pattern):
+        return None
+
+    runs = []
+    run = ''
+    depth = 0
+    pos = 0
+
+    while pos < len(pattern):
+        char = pattern[pos]
+        pos += 1
+
+        if char == '\\':
+            pos += 1
+        elif char == '[':
+            pos = _skip_class(pattern, pos - 1)
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth > 0:
+            continue
+        elif char == '|':
+            return None
+        elif char in LITERAL_CHARS:
+            run += char
+            continue
+        elif char in QUANTIFIERS:
+            # The quantified character is optional or repeated
+            run = run[:-1]
+            if char == '{':
+                repeat = RE_REPEAT.match(pattern, pos - 1)
+                if repeat:
+                    pos = repeat.end()
+
+        runs.append(run)
+        run = ''
+
+    runs.append(run)
+
+    return [run for run in runs if run]
+
+
+def required_words(pattern):
+    """
+    The set of words any sentence matched by the regular expression must
+    contain, as returned by sentence_words().
+
+    Only the words surrounded by other literal characters are considered, so
+    that a partial word at the edge of a literal is never required.
+    """
+
+    runs = literal_runs(pattern)
+    if not runs:
+        return set()
+
+    return set(
+        word.group()
+        for run in runs
+        for word in RE_WORD.finditer(run.lower())
+        if word.start() > 0 and word.end() < len(run)
+    )
+
+
+class StepIndex(object):
+    """
+    An index of step definitions by a word their sentences must contain.
+
+    Matching a sentence only needs to try the definitions indexed by the
+    sentence words, and the ones without any required words.
+    """
+
+    def __init__(self, steps):
+        """
+        Index the (regex, function) pairs, remembering their order.
+        """
+
+        self.by_word = {}
+        self.unindexed = []
+
+        for position, (regex, func) in enumerate(steps):
+            entry = (position, regex, func)
+            words = required_words(regex.pattern)
+            if words:
+                # Longer words are likely to be more selective
+                word = max(sorted(words), key=len)
+                self.by_word.setdefault(word, []).append(entry)
+            else:
+                self.unindexed.append(entry)
+
+    def candidates(self, sentence):
+        """
+        The (regex, function) pairs that can match a sentence, in the order
+        they were indexed in.
+        """
+
+        entries = list(self.unindexed)
+        for word in sentence_words(sentence):
+            entries.extend(self.by_word.get(word, ()))
+
+        entries.sort(key=itemgetter(0))
+
+        return [(regex, func) for _, regex, func in entries]
+
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+
 class StepDict(object):
     """
     A mapping of step sentences to their definitions.
     """
 
+    match_cache_size = 4096
+    """The maximum number of sentences to remember the matches for."""
+
     def __init__(self):
         self.steps = dict()
 
+        self.version = 0
+        """Incremented every time the registered steps change."""
+
+        self.fallback = None
+        """
+        Called with a sentence no step definition matches, to load more
+        step definitions; returns whether it did, to match the sentence
+        again.
+        """
+
+        self._index = None
+        self._match_cache = OrderedDict()
+        # Guards the steps, their index and the match cache when the
+        # scenarios run in threads
+        self._lock = threading.RLock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def _changed(self):
+        """Invalidate everything computed from the registered steps."""
+        with self._lock:
+            self.version += 1
+            self._index = None
+            self._match_cache.clear()
+
+    def cache_info(self):
+        """
+        Statistics of the sentence match cache, in the same form as
+        :func:`functools.lru_cache` reports them.
+        """
+
+        return CacheInfo(self._cache_hits, self._cache_misses,
+                         self.match_cache_size, len(self._match_cache))
+
     def load(self, sentence, func):
         """Add a mapping between a step sentence and a function."""
 
         step_re = self._assert_is_step(sentence, func)
-        self.steps[step_re.pattern] = (step_re, func)
+        with self._lock:
+            self.steps[step_re.pattern] = (step_re, func)
+            self._changed()
 
         try:
             func.sentence = sentence
@@ -215,25 +457,51 @@ class StepDict(object):
 
     def unload(self, sentence):
         """Remove a mapping for a given step sentence, if it exists."""
-        try:
-            del self.steps[sentence]
-        except KeyError:
-            pass
+        with self._lock:
+            try:
+                del self.steps[sentence]
+            except KeyError:
+                pass
+            else:
+                self._changed()
 
     def unload_func(self, func):
         """Remove any mappings for a given function."""
 
-        sentences_to_remove = list(
-            sentence
-            for sentence, (_, step_func) in self.steps.items()
-            if step_func == func
-        )
-        for sentence in sentences_to_remove:
-            del self.steps[sentence]
+        with self._lock:
+            sentences_to_remove = list(
+                sentence
+                for sentence, (_, step_func) in self.steps.items()
+                if step_func == func
+            )
+            for sentence in sentences_to_remove:
+                del self.steps[sentence]
+            if sentences_to_remove:
+                self._changed()
+
+    def unload_module(self, module_name):
+        """
+        Remove the steps defined in the given module. Returns whether there
+        were any.
+        """
+
+        with self._lock:
+            funcs = set(
+                func
+                for _, func in self.steps.values()
+                if function_module(func) == module_name
+            )
+        for func in funcs:
+            self.unload_func(func)
+
+        return bool(funcs)
 
     def clear(self):
-        """Remove all registered steps."""
-        self.steps.clear()
+        """Remove all registered steps, and the fallback loading them."""
+        with self._lock:
+            self.steps.clear()
+            self.fallback = None
+            self._changed()
 
     def __len__(self):
         """Number of registered step sentences."""
@@ -288,10 +556,50 @@ class StepDict(object):
         Find a function and arguments to call for a specified Step.
 
         Returns a tuple of (function, args, kwargs).
+
+        Only the definitions that can possibly match the sentence are tried,
+        in the order they were registered. The results for the recently seen
+        sentences are remembered until the registered steps change.
         """
 
-        for regex, func in self.steps.values():
-            matched = regex.search(step_.sentence)
+        sentence = step_.sentence
+
+        with self._lock:
+            try:
+                func, args, kwargs = self._match_cache[sentence]
+            except KeyError:
+                self._cache_misses += 1
+                version = self.version
+            else:
+                self._cache_hits += 1
+                self._match_cache.move_to_end(sentence)
+                return (func, args, dict(kwargs))
+
+        func, args, kwargs = self._match_sentence(sentence)
+
+        with self._lock:
+            # Don't remember a match made while the steps changed, e.g. in
+            # another thread
+            if self.version == version:
+                self._match_cache[sentence] = (func, args, kwargs)
+                if len(self._match_cache) > self.match_cache_size:
+                    self._match_cache.popitem(last=False)
+
+        return (func, args, dict(kwargs))
+
+    def _match_sentence(self, sentence):
+        """
+        Find a function and arguments to call for a step sentence.
+        """
+
+        # Another thread can invalidate the index while it's in use
+        with self._lock:
+            index = self._index
+            if index is None:
+                index = self._index = StepIndex(self.steps.values())
+
+        for regex, func in index.candidates(sentence):
+            matched = regex.search(sentence)
             if matched:
                 kwargs = matched.groupdict()
                 if kwargs:
@@ -300,6 +608,9 @@ class StepDict(object):
                     args = matched.groups()
                     return (func, args, {})
 
+        if self.fallback is not None and self.fallback(sentence):
+            return self._match_sentence(sentence)
+
         return (undefined_step, (), {})
 
     def step(self, step_func_or_sentence):
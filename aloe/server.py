@@ -0,0 +1,350 @@
+"""
+A server keeping the step definitions loaded to run the features quickly.
+
+"aloe serve" loads the step definitions and runs the "before all" callbacks
+once, then listens on a Unix socket. For each "aloe run --server", it forks
+a child process that inherits the loaded steps and the world, runs the
+requested features and sends the output back.
+
+When the step definition files change, the server loads them again (running
+the "all" callbacks again) before the next run.
+"""
+
+import argparse
+import io
+import json
+import os
+import select
+import socket
+import sys
+import traceback
+
+from aloe import world
+from aloe.cache import DEFAULT_CACHE_DIR
+from aloe.client import EXIT, STDERR, STDOUT, default_socket, send_frame
+from aloe.eventloop import close_event_loops
+from aloe.fs import FeatureLoader, discover_feature_directories
+from aloe.native import NativeRunner
+from aloe.registry import CALLBACK_REGISTRY, STEP_REGISTRY
+from aloe.terminal import Terminal
+
+# How often to reap the finished child processes, in seconds
+POLL_INTERVAL = 0.5
+
+
+class FrameStream(io.TextIOBase):
+    """A text stream sending what is written as frames of the given kind."""
+
+    def __init__(self, connection, kind):
+        super().__init__()
+        self.connection = connection
+        self.kind = kind
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            send_frame(self.connection, self.kind, data.encode('utf-8'))
+        return len(data)
+
+
+class ServedRunner(NativeRunner):
+    """
+    A runner for a run requested from the server, in a child process of it.
+
+    The step definitions are already loaded and the "all" callbacks have
+    already run in the server.
+    """
+
+    def run_on_server(self, argv):
+        # Already running on the server
+        self.configure()
+        return self.run_tests()
+
+    def configure(self):
+        super().configure()
+
+        if self.options.processes:
+            self.stream.write(
+                "Running the features in a single process on the server.\n")
+            self.options.processes = 0
+
+    def load_step_definitions(self):
+        pass
+
+    def run_in_process(self, runner, features):
+        return runner.run(self.load_tests(features))
+
+
+class Server(object):
+    """
+    Load the step definitions once and run the features requested by the
+    clients in child processes.
+
+    :param argv: the command line, including the program name
+    :param stream: a stream to write the messages into (default: stderr)
+    :param env: the environment to take the option defaults from
+    """
+
+    runner_class = ServedRunner
+
+    def __init__(self, argv=None, stream=None, env=None):
+        if argv is None:
+            argv = sys.argv
+        if env is None:
+            env = os.environ
+
+        self.stream = stream or sys.stderr
+        self.options = self.make_parser(env).parse_args(argv[1:])
+        self.path = self.options.socket or \
+            default_socket(self.options.cache_dir)
+
+        # The modification times of the step definition files by path
+        self.step_files = {}
+        self.after_all = None
+        # The running child processes
+        self.children = set()
+
+        self.serve()
+
+    @classmethod
+    def make_parser(cls, env):
+        """The parser for the command line options."""
+
+        parser = argparse.ArgumentParser(
+            prog='aloe serve',
+            description="Keep the step definitions loaded to run the "
+            "features with 'aloe run --server'",
+        )
+        parser.add_argument(
+            '--socket', action='store',
+            dest='socket',
+            default=env.get('NOSE_GHERKIN_SOCKET'),
+            metavar='PATH',
+            help='The Unix socket to listen on (default: server.sock in the '
+            'cache directory)',
+        )
+        parser.add_argument(
+            '--cache-dir', action='store',
+            dest='cache_dir',
+            default=env.get('NOSE_GHERKIN_CACHE_DIR', DEFAULT_CACHE_DIR),
+            metavar='DIR',
+            help='Directory to keep the caches between runs in',
+        )
+        parser.add_argument(
+            '--feature-root', action='append',
+            dest='feature_roots',
+            default=[],
+            metavar='DIR',
+            help='Look for the feature directories under DIR instead of the '
+            'current directory (or the feature_roots in setup.cfg)',
+        )
+        parser.add_argument(
+            '--exclude-dir', action='append',
+            dest='exclude_dirs',
+            default=[],
+            metavar='GLOB',
+            help='Skip the directories matching GLOB when looking for the '
+            'feature directories, in addition to the exclude in setup.cfg',
+        )
+
+        return parser
+
+    def find_step_files(self):
+        """The step definition files and their modification times."""
+
+        files = {}
+        for feature_dir in self.feature_dirs:
+            for path, _, filenames in os.walk(feature_dir):
+                for filename in filenames:
+                    if filename.endswith('.py'):
+                        filename = os.path.join(path, filename)
+                        try:
+                            files[filename] = os.stat(filename).st_mtime_ns
+                        except OSError:
+                            pass
+
+        return files
+
+    def warm(self):
+        """Load the step definitions and run the "before all" callbacks."""
+
+        # Step modules are imported relative to the current directory
+        if os.getcwd() not in sys.path:
+            sys.path.insert(0, os.getcwd())
+
+        self.feature_dirs = sorted(discover_feature_directories(
+            self.options.feature_roots, self.options.exclude_dirs))
+        self.step_files = self.find_step_files()
+
+        for feature_dir in self.feature_dirs:
+            FeatureLoader.find_and_load_step_definitions(feature_dir)
+
+        before_all, self.after_all = CALLBACK_REGISTRY.before_after('all')
+        before_all()
+
+    def cool(self):
+        """
+        Run the "after all" callbacks and forget the step definition modules,
+        with their steps and hooks.
+        """
+
+        after_all, self.after_all = self.after_all, None
+        try:
+            if after_all is not None:
+                after_all()
+        finally:
+            close_event_loops()
+
+        world.__dict__.clear()
+
+        # The steps and hooks of the other modules, e.g. the step libraries
+        # the step definitions import, stay registered as the modules aren't
+        # imported again
+        step_files = set(map(os.path.abspath, self.step_files))
+        for name, module in list(sys.modules.items()):
+            filename = getattr(module, '__file__', None)
+            if filename and os.path.abspath(filename) in step_files:
+                STEP_REGISTRY.unload_module(name)
+                CALLBACK_REGISTRY.unload_module(name)
+                del sys.modules[name]
+
+    def rewarm_if_changed(self):
+        """Load the step definitions again if any of the files changed."""
+
+        if self.find_step_files() == self.step_files:
+            return
+
+        self.stream.write("Step definitions changed, loading them again.\n")
+
+        # The running features might depend on the "all" callbacks
+        while self.children:
+            self.reap(block=True)
+
+        self.cool()
+        self.warm()
+
+    def reap(self, block=False):
+        """Collect the finished child processes."""
+
+        for pid in list(self.children):
+            try:
+                finished, _ = os.waitpid(pid, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                finished = pid
+
+            if finished:
+                self.children.discard(pid)
+                if block:
+                    return
+
+    def listen(self):
+        """Create the listening socket, replacing a stale one."""
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        if os.path.exists(self.path):
+            try:
+                listener.connect(self.path)
+            except OSError:
+                os.unlink(self.path)
+            else:
+                listener.close()
+                raise SystemExit(
+                    "A server is already listening at {0}.".format(
+                        self.path))
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        listener.bind(self.path)
+        listener.listen()
+        return listener
+
+    def serve(self):
+        """Accept the runs until interrupted."""
+
+        listener = self.listen()
+        try:
+            self.warm()
+            self.stream.write("Listening on {0}.\n".format(self.path))
+            self.stream.flush()
+
+            while True:
+                readable, _, _ = select.select([listener], [], [],
+                                               POLL_INTERVAL)
+                self.reap()
+                if not readable:
+                    continue
+
+                connection, _ = listener.accept()
+                with connection:
+                    self.rewarm_if_changed()
+                    self.fork(listener, connection)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.close()
+            os.unlink(self.path)
+
+            try:
+                self.cool()
+            finally:
+                while self.children:
+                    self.reap(block=True)
+
+    def fork(self, listener, connection):
+        """Run the features requested on the connection in a child."""
+
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return
+
+        status = 1
+        try:
+            listener.close()
+            status = self.run(connection)
+        except BaseException:  # pylint:disable=broad-except
+            try:
+                send_frame(connection, STDERR,
+                           traceback.format_exc().encode('utf-8'))
+            except OSError:
+                pass
+        finally:
+            try:
+                send_frame(connection, EXIT, str(status).encode())
+            except OSError:
+                pass
+            # Don't run the cleanup of the server
+            os._exit(status)  # pylint:disable=protected-access
+
+    def run(self, connection):
+        """Run the features requested on the connection."""
+
+        with connection.makefile('rb') as reader:
+            request = json.loads(reader.readline().decode('utf-8'))
+
+        stdout = FrameStream(connection, STDOUT)
+        stderr = FrameStream(connection, STDERR)
+
+        if request['cwd'] != os.getcwd():
+            stderr.write(
+                "The server runs in {0}, not in {1}.\n".format(
+                    os.getcwd(), request['cwd']))
+            return 2
+
+        sys.stdout, sys.stderr = stdout, stderr
+        Terminal.is_a_tty = request['tty']
+
+        try:
+            runner = self.runner_class(['aloe run'] + request['args'],
+                                       stream=stderr, exit=False)
+        except SystemExit as exc:
+            # Invalid options
+            return exc.code if isinstance(exc.code, int) else 2
+
+        return int(not runner.success)
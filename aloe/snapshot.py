@@ -0,0 +1,106 @@
+"""
+Saving and restoring the state of a scenario, to run the steps it shares
+with the other scenarios only once.
+
+The state is a deep copy of :data:`aloe.world`, and whatever the registered
+snapshot hooks save (e.g. the contents of an in-memory database). Steps
+with the effects the snapshots can't restore are marked with side_effect.
+"""
+
+import copy
+from collections import OrderedDict
+
+from aloe import world
+from aloe.registry import CallbackDict
+
+
+class SnapshotHooks(OrderedDict):
+    """
+    The pairs of functions saving and restoring the state that is not in
+    aloe.world, by the save function.
+    """
+
+    def register(self, save, restore):
+        """
+        Register a function returning the state to save, and a function
+        restoring it given the value returned. Registering the same save
+        function again replaces the pair.
+        """
+
+        # pylint:disable=protected-access
+        self[CallbackDict._function_id(save)] = (save, restore)
+
+    def save(self):
+        """The states saved by all the hooks."""
+        return [save() for save, _ in self.values()]
+
+    def restore(self, states):
+        """Restore the states saved by the hooks."""
+
+        for (_, restore), state in zip(self.values(), states):
+            restore(state)
+
+
+SNAPSHOT_HOOKS = SnapshotHooks()
+
+
+def snapshot_hook(restore):
+    """
+    Decorate a function saving some state for the snapshots, registering it
+    with the given function to restore the state::
+
+        def load_database(rows):
+            database.load(rows)
+
+        @snapshot_hook(load_database)
+        def dump_database():
+            return database.dump()
+    """
+
+    def decorator(save):
+        """Register the function."""
+        SNAPSHOT_HOOKS.register(save, restore)
+        return save
+
+    return decorator
+
+
+def side_effect(func):
+    """
+    Mark a step definition as having effects the snapshots can't restore,
+    so that the steps from it onwards always run::
+
+        @step(r'I send an email')
+        @side_effect
+        def send_email(self):
+            ...
+    """
+
+    func.side_effect = True
+    return func
+
+
+def has_side_effect(func):
+    """Whether the step definition is marked with side_effect."""
+    return getattr(func, 'side_effect', False)
+
+
+class Snapshot(object):
+    """
+    A copy of aloe.world and the states saved by the snapshot hooks.
+
+    Raises an exception if any of them can't be copied.
+    """
+
+    def __init__(self):
+        self.world = copy.deepcopy(dict(world.__dict__))
+        self.states = copy.deepcopy(SNAPSHOT_HOOKS.save())
+
+    def restore(self):
+        """Restore the saved state, keeping the snapshot intact."""
+
+        attributes = world.__dict__
+        attributes.clear()
+        attributes.update(copy.deepcopy(self.world))
+
+        SNAPSHOT_HOOKS.restore(copy.deepcopy(self.states))
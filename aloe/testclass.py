@@ -3,13 +3,24 @@ Base test class for tests generated from scenarios.
 """
 
 import ast
+import sys
+import threading
+import time
+import traceback
 import unittest
+from collections import OrderedDict
 from contextlib import contextmanager
+from copy import copy
+from textwrap import dedent
 
-from nose.plugins.attrib import attr
-
-from aloe.codegen import make_function
+from aloe.codegen import (
+    make_function,
+    make_function_from_template,
+    set_line,
+)
+from aloe.exceptions import ExamplesFailed
 from aloe.fs import path_to_module_name
+from aloe.history import CACHED_PASS
 from aloe.parser import (
     Background,
     Feature,
@@ -81,6 +92,63 @@ class TestFeature(Feature):
     scenario_class = TestScenario
 
 
+class BehaveAsCache(object):
+    """
+    The steps parsed and matched for the strings passed to behave_as, by the
+    feature language, the kind of the step container and the string.
+
+    The entries are discarded when the step registry changes.
+    """
+
+    max_size = 1024
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.version = None
+        # Guards the entries when the scenarios run in threads
+        self.lock = threading.Lock()
+
+    def steps(self, context_step, string):
+        """
+        Return the steps described by the string in the context of the step,
+        as a tuple of (step, (func, args, kwargs)).
+
+        The steps are shared between the calls and must be copied before
+        running.
+        """
+
+        key = (
+            context_step.feature.language,
+            hasattr(context_step, 'scenario'),
+            string,
+        )
+
+        with self.lock:
+            if self.version != STEP_REGISTRY.version:
+                self.entries.clear()
+                self.version = STEP_REGISTRY.version
+
+            steps = self.entries.get(key)
+            if steps is not None:
+                self.entries.move_to_end(key)
+                return steps
+
+        steps = tuple(
+            (step, STEP_REGISTRY.match_step(step))
+            for step in context_step.parse_steps_from_string(string)
+        )
+
+        with self.lock:
+            self.entries[key] = steps
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+        return steps
+
+
+BEHAVE_AS_CACHE = BehaveAsCache()
+
+
 class TestCase(unittest.TestCase):
     """
     The base test class for tests compiled from Gherkin features.
@@ -88,6 +156,24 @@ class TestCase(unittest.TestCase):
 
     feature = None  # Will be supplied when constructing derived classes
 
+    code_cache = None
+    """
+    The cache of the compiled functions (an aloe.cache.CodeCache), or None
+    to compile them on every run.
+    """
+
+    pass_history = None
+    """
+    The scenarios that passed before (an aloe.history.PassHistory), to skip
+    while their inputs don't change, or None to run all of them.
+    """
+
+    batch_outlines = False
+    """
+    Whether to run all the selected examples of each scenario outline in a
+    single test, each as a subtest, instead of a test for each example.
+    """
+
     @classmethod
     def before_feature(cls, feature):
         """Call feature-level before callbacks."""
@@ -118,10 +204,12 @@ class TestCase(unittest.TestCase):
         step.
         """
 
-        steps = context_step.parse_steps_from_string(string)
+        steps = BEHAVE_AS_CACHE.steps(context_step, string)
 
         # Copy necessary attributes onto new steps
-        for step in steps:
+        for template, match in steps:
+            step = copy(template)
+            step.filename = context_step.filename
             step.test = self
 
             try:
@@ -129,12 +217,41 @@ class TestCase(unittest.TestCase):
             except AttributeError:
                 step.background = context_step.background
 
-            definition = self.prepare_step(step)
+            definition = self.prepare_matched_step(step, *match)
 
             definition['func'](definition['step'],
                                *definition['args'],
                                **definition['kwargs'])
 
+    def run(self, result=None):
+        """
+        Run the test, reporting its duration to the result if it supports
+        it, as Python 3.12 does.
+
+        If pass_history is set and the scenario passed before with the same
+        inputs, it is skipped as a cached pass instead.
+        """
+
+        if self.pass_history is not None and result is not None and \
+                self.pass_history.unchanged(self):
+            result.startTest(self)
+            try:
+                result.addSkip(self, CACHED_PASS)
+            finally:
+                result.stopTest(self)
+            return result
+
+        if sys.version_info >= (3, 12):
+            return super().run(result)
+
+        start = time.perf_counter()
+        try:
+            return super().run(result)
+        finally:
+            add_duration = getattr(result, 'addDuration', None)
+            if add_duration is not None:
+                add_duration(self, time.perf_counter() - start)
+
     def shortDescription(self):
         return str(self)
 
@@ -149,39 +266,64 @@ class TestCase(unittest.TestCase):
     # Methods for generating test classes
 
     @classmethod
-    def from_file(cls, file_):
+    def from_file(cls, file_, scenario_filter=None):
         """
         Construct a test class from a feature file.
+
+        If given, scenario_filter(testclass, scenario, index, outline) is
+        called before compiling each scenario or outline example (outline is
+        None for a scenario without examples); only the ones for which it
+        returns True are added to the class.
+
+        If code_cache is set, the compiled functions are reused from it.
         """
 
-        feature = TestFeature.from_file(file_)
+        if cls.code_cache is None:
+            return cls.compile_feature(file_, scenario_filter)
 
-        background = cls.make_background(feature.background)
-        scenarios = [
-            example
-            for i, scenario in enumerate(feature.scenarios)
-            for example in cls.make_examples(scenario, i + 1)
-        ]
+        with cls.code_cache.feature(file_):
+            return cls.compile_feature(file_, scenario_filter)
+
+    @classmethod
+    def compile_feature(cls, file_, scenario_filter=None):
+        """
+        Construct a test class from a feature file, see from_file.
+        """
+
+        feature = TestFeature.from_file(file_)
 
         before_feature, after_feature = \
             CALLBACK_REGISTRY.before_after('feature')
 
         members = {
             'feature': feature,
-            'background': background,
             'before_feature': staticmethod(before_feature),
             'after_feature': staticmethod(after_feature),
         }
 
-        members.update({
-            scenario.__name__: scenario
-            for scenario in scenarios
-        })
-
         class_name = feature.name
 
         testclass = type(class_name, (cls,), members)
         testclass.feature.testclass = testclass
+
+        def selected(scenario, index, outline=None):
+            """Whether to add the scenario or example to the class."""
+            return scenario_filter is None or \
+                scenario_filter(testclass, scenario, index, outline)
+
+        scenarios = [
+            example
+            for i, scenario in enumerate(feature.scenarios)
+            for example in cls.make_examples(scenario, i + 1,
+                                             selected=selected)
+        ]
+
+        if scenarios:
+            testclass.background = cls.make_background(feature.background)
+
+        for scenario in scenarios:
+            setattr(testclass, scenario.__name__, scenario)
+
         return testclass
 
     @classmethod
@@ -200,45 +342,49 @@ class TestCase(unittest.TestCase):
         return result
 
     @classmethod
-    def make_examples(cls, scenario, index):
+    def make_examples(cls, scenario, index, selected=None):
         """
         Construct methods for running all the examples of a scenario.
 
         index is the 1-based number of the scenario in the feature.
+
+        If given, selected(scenario, index, outline) is called before
+        constructing each example, and the ones it returns False for are
+        skipped.
+
+        If batch_outlines is set, the selected examples of an outline are
+        run by a single method, see make_batch.
         """
 
+        if selected is None:
+            def selected(*_):
+                """Select all the examples."""
+                return True
+
         if scenario.outlines:
-            for i, (outline, steps) in enumerate(scenario.evaluated, 1):
-                # Create a function calling the real scenario example to show
-                # the right location in the outline
-                source = """
-def run_example(self):
-    outline(self)
-                """
-                source = ast.parse(source)
-
-                # Set location of the call
-                for node in ast.walk(source.body[0].body[0]):
-                    node.lineno = outline.line
-
-                context = {
-                    'outline': cls.make_steps(scenario,
-                                              steps,
-                                              is_background=False,
-                                              outline=outline)
-                }
-
-                yield cls.make_example(
-                    make_function(
-                        source=source,
-                        context=context,
-                        source_file=scenario.feature.filename,
-                        name='{}: Example {}'.format(scenario.name, i),
-                    ),
-                    scenario,
-                    index,
+            outlines = [
+                (i, outline)
+                for i, outline in enumerate(scenario.outlines, 1)
+                if selected(scenario, index, outline)
+            ]
+
+            if outlines:
+                # The examples are prepared when they run, but their code is
+                # compiled with the feature, for the code cache
+                make_function_from_template(
+                    cls.steps_source,
+                    cls.steps_template(scenario, scenario.steps, False),
+                    context={},
                 )
-        else:
+
+            if cls.batch_outlines:
+                if outlines:
+                    yield cls.make_batch(scenario, index, outlines)
+                return
+
+            for i, outline in outlines:
+                yield cls.make_outline_example(scenario, index, i, outline)
+        elif selected(scenario, index, None):
             yield cls.make_example(
                 cls.make_steps(
                     scenario,
@@ -250,17 +396,125 @@ def run_example(self):
             )
 
     @classmethod
-    def make_example(cls, method, scenario, index):
+    def make_outline_example(cls, scenario, index, i, outline):
+        """
+        Construct a method running the i-th (1-based) example of a scenario
+        outline.
+
+        The steps of the example are only substituted and prepared when it
+        runs, and released when it finishes, so that the examples not
+        running don't keep copies of the steps.
+        """
+
+        def prepare_steps():
+            """Prepare the steps of the example, see make_steps."""
+
+            return cls.make_steps(scenario,
+                                  scenario.evaluate(outline),
+                                  is_background=False,
+                                  outline=outline)
+
+        # Create a function calling the real scenario example to show the
+        # right location in the outline
+        method = cls.make_example(
+            make_function_from_template(
+                cls.example_source,
+                (),
+                context={'prepare': prepare_steps},
+                source_file=scenario.feature.filename,
+                name='{}: Example {}'.format(scenario.name, i),
+                firstlineno=outline.line,
+            ),
+            scenario,
+            index,
+            example_index=i,
+        )
+        method.prepare_steps = prepare_steps
+
+        return method
+
+    @classmethod
+    def make_batch(cls, scenario, index, outlines):
+        """
+        Construct a method running the given examples of a scenario outline,
+        as pairs of the 1-based example number and the outline, one after
+        another, each as a subtest.
+
+        The steps of each example are only prepared when it runs; the
+        examples share the compiled code.
+
+        If the test result doesn't support subtests (e.g. with Nose), all the
+        examples still run, and their failures are reported together.
+        """
+
+        def run_outline(self):
+            """Run each example as a subtest."""
+
+            # pylint:disable=protected-access
+            subtests = getattr(self._outcome, 'result_supports_subtests',
+                               False)
+            failures = []
+
+            for i, outline in outlines:
+                with self.subTest(example=i):
+                    example = self.make_outline_example(scenario, index,
+                                                        i, outline)
+                    if subtests:
+                        example(self)
+                        continue
+
+                    try:
+                        example(self)
+                    except unittest.SkipTest:
+                        raise
+                    except Exception:  # pylint:disable=broad-except
+                        failures.append((i, sys.exc_info()))
+
+            if failures:
+                raise self.examples_failed(failures)
+
+        run_outline.__name__ = run_outline.__qualname__ = scenario.name
+
+        method = cls.make_example(run_outline, scenario, index)
+        method.outlines = outlines
+
+        return method
+
+    def examples_failed(self, failures):
+        """
+        The exception reporting the failures of a batched outline, given as
+        pairs of the example number and the exception information: a failure
+        if all the examples failed their assertions, an error otherwise.
+        """
+
+        message = '\n'.join(
+            'Example {0}:\n{1}'.format(
+                i, ''.join(traceback.format_exception(*exc_info)))
+            for i, exc_info in failures
+        )
+
+        if all(issubclass(exc_info[0], self.failureException)
+               for _, exc_info in failures):
+            return self.failureException(message)
+
+        return ExamplesFailed(message)
+
+    @classmethod
+    def make_example(cls, method, scenario, index, example_index=None):
         """
         Set the method attributes to associate it with given scenario and index.
+
+        example_index is the 1-based number of the outline example, if any.
         """
 
         method.is_example = True
         method.scenario = scenario
         method.scenario_index = index
+        method.example_index = example_index
 
+        # Tags are set as attributes for the attribute selector
         for tag in scenario.tags:
-            method = attr(tag)(method)
+            setattr(method, tag, True)
 
         return method
 
@@ -275,7 +529,16 @@ def run_example(self):
         - args and kwargs are the arguments to pass to the function
         """
 
-        func, args, kwargs = STEP_REGISTRY.match_step(step)
+        return cls.prepare_matched_step(step, *STEP_REGISTRY.match_step(step))
+
+    @classmethod
+    def prepare_matched_step(cls, step, func, args, kwargs):
+        """
+        Prepare a step for which the definition is already found.
+
+        Returns the same dictionary as prepare_step().
+        """
+
         func = CALLBACK_REGISTRY.wrap('step', func, step)
 
         return {
@@ -303,32 +566,6 @@ def run_example(self):
             for step in steps
         ]
 
-        source = 'def run_steps(self):\n'
-        if not is_background:
-            source += '    self.background()\n'
-        source += '\n'.join(
-            # This has to be a single statement, in order to set its source
-            # location as a whole below
-            """
-    try:
-        step{i}.test = self
-        func{i}(step{i}, *args{i}, **kwargs{i})
-    finally:
-        step{i}.test = None
-            """.format(i=i)
-            for i in range(len(step_definitions))
-        )
-        source = ast.parse(source)
-
-        # Set locations of the steps
-        step_source = source.body[0].body
-        if not is_background:
-            # There is no source for the background() call
-            step_source = step_source[1:]
-        for step, step_call in zip(steps, step_source):
-            for node in ast.walk(step_call):
-                node.lineno = step.line
-
         # Supply all the step functions and arguments
         context = {
             k + str(i): v
@@ -341,19 +578,87 @@ def run_example(self):
         else:
             func_name = step_container.name
 
-        run_steps = make_function(
-            source=source,
+        run_steps = make_function_from_template(
+            cls.steps_source,
+            cls.steps_template(step_container, steps, is_background),
             context=context,
             source_file=step_container.filename,
             name=func_name,
+            firstlineno=step_container.line,
         )
 
         if not is_background:
             run_steps = CALLBACK_REGISTRY.wrap('example', run_steps,
                                                step_container, outline, steps)
 
+        # To run the steps one by one, e.g. when sharing them between the
+        # scenarios
+        run_steps.step_definitions = step_definitions
+
         return run_steps
 
+    @staticmethod
+    def steps_template(step_container, steps, is_background):
+        """
+        The arguments to steps_source for the steps of a container. Steps at
+        the same lines relative to the container share the compiled code.
+        """
+
+        offsets = tuple(step.line - step_container.line for step in steps)
+        return (is_background, offsets)
+
+    @staticmethod
+    def example_source():
+        """
+        The source of an outline example method, preparing and calling the
+        scenario method from line 1.
+        """
+
+        source = ast.parse(dedent(
+            """
+            def run_example(self):
+                prepare()(self)
+            """
+        ))
+        set_line(source, 1)
+
+        return source
+
+    @staticmethod
+    def steps_source(is_background, offsets):
+        """
+        The source of a method calling the steps, located at the given line
+        offsets from its first line, where the background is called.
+        """
+
+        source = 'def run_steps(self):\n'
+        if not is_background:
+            source += '    self.background()\n'
+        source += '\n'.join(
+            # This has to be a single statement, in order to set its source
+            # location as a whole below
+            """
+    try:
+        step{i}.test = self
+        func{i}(step{i}, *args{i}, **kwargs{i})
+    finally:
+        step{i}.test = None
+            """.format(i=i)
+            for i in range(len(offsets))
+        )
+        source = ast.parse(source)
+
+        # Set locations of the steps
+        set_line(source.body[0], 1)
+        step_source = source.body[0].body
+        if not is_background:
+            # The background() call stays at the first line
+            step_source = step_source[1:]
+        for offset, step_call in zip(offsets, step_source):
+            set_line(step_call, 1 + offset)
+
+        return source
+
     @classmethod
     def scenarios(cls):
         """
@@ -12,6 +12,7 @@ from functools import wraps
 
 from aloe import world
 from aloe.fs import path_to_module_name
+from aloe.native import NativeRunner
 from aloe.plugin import GherkinPlugin
 from aloe.registry import (
     CALLBACK_REGISTRY,
@@ -19,6 +20,7 @@ from aloe.registry import (
     STEP_REGISTRY,
 )
 from aloe.runner import Runner
+from aloe.snapshot import SNAPSHOT_HOOKS
 
 
 @contextmanager
@@ -209,11 +211,33 @@ class TestRunner(Runner):
         return config
 
 
+class TestNativeRunner(NativeRunner):
+    """
+    A test native runner to store information about the tests run.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.tests_run = []
+        super().__init__(*args, **kwargs)
+
+    def feature_files(self):
+        """
+        Record which tests were run.
+        """
+
+        for filename in super().feature_files():
+            yield filename
+            self.tests_run.append(os.path.abspath(filename))
+
+
 class FeatureTest(unittest.TestCase):
     """
     Base class for tests running Gherkin features.
     """
 
+    runner_class = TestRunner
+    """The runner to run the features with."""
+
     def setUp(self):
         """
         Ensure inner Nose doesn't redirect output.
@@ -260,6 +284,7 @@ class FeatureTest(unittest.TestCase):
         # affect each other
         CALLBACK_REGISTRY.clear(priority_class=PriorityClass.USER)
         STEP_REGISTRY.clear()
+        SNAPSHOT_HOOKS.clear()
         world.__dict__.clear()
 
         argv = ['aloe']
@@ -275,7 +300,7 @@ class FeatureTest(unittest.TestCase):
         # Save the loaded module list to restore later
         old_modules = set(sys.modules.keys())
 
-        result = TestRunner(exit=False, argv=argv, stream=stream)
+        result = self.runner_class(exit=False, argv=argv, stream=stream)
         result.captured_stream = stream
 
         # To avoid affecting the (outer) testsuite and its subsequent tests,
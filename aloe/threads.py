@@ -0,0 +1,420 @@
+"""
+Running the scenarios of a feature in multiple threads.
+
+The steps of each scenario run in a single thread, and each scenario has a
+separate aloe.world, starting with the attributes set by the "all" and
+feature callbacks.
+"""
+
+import asyncio
+import io
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from aloe import world
+from aloe.eventloop import delegate_to, get_event_loop
+from aloe.terminal import Terminal, TERMINAL
+from aloe.utils import CONTEXT_VARS, ContextVar, isolated
+
+
+class ThreadStream(object):
+    """
+    A stream writing to the buffer set for the current thread (or context,
+    including the asyncio tasks started from it), or to the original
+    stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        if CONTEXT_VARS:
+            self.buffer = ContextVar('buffer', default=None)
+        else:  # pragma: no cover
+            self.local = threading.local()
+
+    def __getattr__(self, name):
+        return getattr(self.current, name)
+
+    @property
+    def current(self):
+        """The stream to write to from the current thread."""
+        if CONTEXT_VARS:
+            buffer = self.buffer.get()
+        else:  # pragma: no cover
+            buffer = getattr(self.local, 'buffer', None)
+        return self.stream if buffer is None else buffer
+
+    def write(self, data):
+        """Write to the stream of the current thread."""
+        return self.current.write(data)
+
+    def flush(self):
+        """Flush the stream of the current thread."""
+        self.current.flush()
+
+    @contextmanager
+    def redirect(self, buffer):
+        """Write to a different stream from the current thread."""
+
+        if not CONTEXT_VARS:  # pragma: no cover
+            previous = getattr(self.local, 'buffer', None)
+            self.local.buffer = buffer
+            try:
+                yield
+            finally:
+                self.local.buffer = previous
+            return
+
+        token = self.buffer.set(buffer)
+        try:
+            yield
+        finally:
+            self.buffer.reset(token)
+
+
+@contextmanager
+def thread_streams():
+    """
+    Replace the standard output and error with the streams that can be
+    redirected for each thread.
+    """
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = ThreadStream(stdout), ThreadStream(stderr)
+    try:
+        yield sys.stdout, sys.stderr
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+class RecordingResult(object):
+    """
+    A test result recording the events of a test to report to the real
+    result later, all at once.
+
+    The errors are formatted immediately, with the captured output of the
+    test if there is any.
+    """
+
+    EVENTS = (
+        'startTest',
+        'stopTest',
+        'addSuccess',
+        'addSkip',
+        'addUnexpectedSuccess',
+        'addDuration',
+    )
+
+    def __init__(self, result, captured=None):
+        self.result = result
+        self.captured = captured
+        self.events = []
+
+    def __getattr__(self, name):
+        if name in self.EVENTS:
+            return lambda *args: self.events.append((name, args))
+
+        return getattr(self.result, name)
+
+    def format_error(self, test, err):
+        """Format the error, with the captured output."""
+
+        # pylint:disable=protected-access
+        error = self.result._exc_info_to_string(err, test)
+        output = self.captured and self.captured.getvalue()
+        if output:
+            if not output.endswith('\n'):
+                output += '\n'
+            error += '\nStdout:\n' + output
+
+        return error
+
+    def addError(self, test, err):  # pylint:disable=invalid-name
+        """Record an error."""
+        self.events.append(('addError', (test, self.format_error(test, err))))
+
+    def addFailure(self, test, err):  # pylint:disable=invalid-name
+        """Record a failure."""
+        self.events.append(
+            ('addFailure', (test, self.format_error(test, err))))
+
+    def addExpectedFailure(self, test, err):  # pylint:disable=invalid-name
+        """Record an expected failure."""
+        self.events.append(
+            ('addExpectedFailure', (test, self.format_error(test, err))))
+
+    def addSubTest(self, test, subtest, err):  # pylint:disable=invalid-name
+        """Record a failed subtest as a separate test."""
+
+        if err is None:
+            return
+
+        if issubclass(err[0], test.failureException):
+            self.addFailure(subtest, err)
+        else:
+            self.addError(subtest, err)
+
+    def replay(self):
+        """Report the recorded events to the real result."""
+
+        for name, args in self.events:
+            method = getattr(self.result, name, None)
+            if method is not None:
+                method(*args)
+
+
+class ErrorHolder(object):
+    """
+    A placeholder for a test to report an error in a class fixture, as
+    unittest does.
+    """
+
+    failureException = None
+
+    def __init__(self, description):
+        self.description = description
+
+    def id(self):  # pylint:disable=invalid-name
+        """The identifier of the test."""
+        return self.description
+
+    def shortDescription(self):  # pylint:disable=invalid-name
+        """No further description."""
+        return None
+
+    def __str__(self):
+        return self.description
+
+
+class ThreadedSuite(object):
+    """
+    A test suite running the scenarios of a single feature in a pool of
+    threads, with the class fixtures (and so the feature callbacks) running
+    once around them.
+
+    The output of each scenario, including the step display, is buffered
+    and written in one piece when the scenario finishes.
+
+    :param tests: the tests of a single test class
+    :param threads: the number of threads to run
+    :param capture: whether to capture the standard output of the tests
+        instead of displaying it with the steps
+    """
+
+    def __init__(self, tests, threads, capture=True):
+        self.tests = list(tests)
+        self.threads = threads
+        self.capture = capture
+        self.lock = threading.Lock()
+
+    def __iter__(self):
+        return iter(self.tests)
+
+    def countTestCases(self):  # pylint:disable=invalid-name
+        """The number of tests in the suite."""
+        return len(self.tests)
+
+    def __call__(self, result):
+        return self.run(result)
+
+    def run_fixture(self, result, testclass, name):
+        """
+        Run a class fixture, reporting an error in it. Returns whether it
+        succeeded.
+        """
+
+        try:
+            getattr(testclass, name)()
+        except Exception:  # pylint:disable=broad-except
+            test = ErrorHolder('{0} ({1})'.format(
+                name, testclass.__qualname__))
+            result.startTest(test)
+            result.addError(test, sys.exc_info())
+            result.stopTest(test)
+            return False
+
+        return True
+
+    def finish_previous_class(self, result):
+        """
+        Tear down the class of the tests a regular suite ran before, as it
+        would do before running another class, since the class fixtures of
+        these tests run outside of unittest's tracking.
+        """
+
+        # pylint:disable=protected-access
+        unittest.TestSuite()._tearDownPreviousClass(None, result)
+        result._previousTestClass = None
+
+    def batches(self):
+        """The groups of tests to run, one group after another."""
+        yield self.tests
+
+    def wait(self, futures):
+        """Wait for a group of tests to finish."""
+
+        for future in futures:
+            future.result()
+
+    def test_context(self, initial_world):
+        """The context to run a test in."""
+        return isolated(world, initial_world)
+
+    # pylint:disable=too-many-arguments
+    def run_test(self, test, result, initial_world, stdout, stderr):
+        """Run a test in the current thread and report it when done."""
+
+        if result.shouldStop:
+            return
+
+        with self.test_context(initial_world):
+            self.run_isolated(test, result, stdout, stderr)
+
+    def run_isolated(self, test, result, stdout, stderr):
+        """Run a test in its context, see run_test."""
+
+        recorder, output = self.run_buffered(test, result, stdout, stderr)
+
+        with self.lock:
+            self.report(recorder, output, stdout)
+
+    def run_buffered(self, test, result, stdout, stderr):
+        """
+        Run a test with its output buffered, returning the RecordingResult
+        with its events and the output to show.
+        """
+
+        block = io.StringIO()
+        captured = io.StringIO() if self.capture else block
+        recorder = RecordingResult(result, captured if self.capture else None)
+
+        terminal = TERMINAL[0]
+        if terminal is not None:
+            terminal = Terminal(stream=block,
+                                force_styling=terminal.does_styling)
+
+        with TERMINAL.redirect(terminal), \
+                stdout.redirect(captured), stderr.redirect(captured):
+            test(recorder)
+
+        return recorder, block.getvalue()
+
+    def report(self, recorder, output, stdout):
+        """Show the output of a test and report its recorded events."""
+
+        if TERMINAL[0] is not None:
+            TERMINAL[0].write(output)
+        elif not self.capture:
+            stdout.stream.write(output)
+        recorder.replay()
+
+    def run(self, result):
+        """Run the tests in the thread pool."""
+
+        if not self.tests:
+            return result
+
+        self.finish_previous_class(result)
+
+        testclass = type(self.tests[0])
+        if not self.run_fixture(result, testclass, 'setUpClass'):
+            return result
+
+        # The world as set up by the callbacks so far
+        initial_world = dict(world.__dict__)
+
+        # The output is captured by the suite instead
+        buffer = getattr(result, 'buffer', False)
+        result.buffer = False
+
+        try:
+            with thread_streams() as (stdout, stderr), \
+                    ThreadPoolExecutor(self.threads) as executor:
+                for batch in self.batches():
+                    self.wait([
+                        executor.submit(self.run_test, test, result,
+                                        initial_world, stdout, stderr)
+                        for test in batch
+                    ])
+        finally:
+            result.buffer = buffer
+            self.run_fixture(result, testclass, 'tearDownClass')
+
+        return result
+
+
+def is_concurrent(test):
+    """Whether the test is for a scenario tagged @concurrent."""
+
+    # pylint:disable=protected-access
+    method = getattr(test, test._testMethodName)
+    return 'concurrent' in method.scenario.tags
+
+
+class ConcurrentSuite(ThreadedSuite):
+    """
+    A test suite running the scenarios of a single feature concurrently,
+    with their coroutines on the event loop of the running thread, which
+    is the one the "all" and feature callbacks use.
+
+    Each scenario runs its synchronous code in one of the threads, so the
+    number of threads limits how many scenarios run at once. The world of
+    each scenario is separate, also for its coroutines.
+
+    :param tests: the tests of a single test class
+    :param concurrency: the number of scenarios to run at once
+    :param capture: whether to capture the standard output of the tests
+    :param all_concurrent: whether to run all the scenarios concurrently,
+        instead of only the ones tagged @concurrent, which otherwise run
+        concurrently with the tagged scenarios next to them; the others run
+        one at a time
+    """
+
+    def __init__(self, tests, concurrency, capture=True,
+                 all_concurrent=False):
+        super().__init__(tests, concurrency, capture=capture)
+        self.all_concurrent = all_concurrent
+        self.loop = None
+
+    def batches(self):
+        if self.all_concurrent:
+            yield self.tests
+            return
+
+        batch = []
+        for test in self.tests:
+            if not is_concurrent(test):
+                if batch:
+                    yield batch
+                    batch = []
+                yield [test]
+            else:
+                batch.append(test)
+
+        if batch:
+            yield batch
+
+    def wait(self, futures):
+        async def wait_all():
+            """Wait for all the tests."""
+            await asyncio.gather(*(
+                asyncio.wrap_future(future)
+                for future in futures
+            ))
+
+        # Run the loop until all the tests finish
+        self.loop.run_until_complete(wait_all())
+
+    @contextmanager
+    def test_context(self, initial_world):
+        with super().test_context(initial_world), delegate_to(self.loop):
+            yield
+
+    def run(self, result):
+        self.loop = get_event_loop()
+        try:
+            return super().run(result)
+        finally:
+            self.loop = None
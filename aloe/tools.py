@@ -6,6 +6,7 @@ See also :class:`aloe.world`.
 
 import re
 import inspect
+import threading
 from datetime import datetime
 from functools import wraps
 
@@ -84,8 +85,8 @@ def hook_not_reentrant(func):
     """
 
     # closure-scoped variable to track whether this hook has been
-    # entered
-    entered = [False]
+    # entered, separately for each thread
+    entered = threading.local()
 
     @wraps(func)
     def inner(*args, **kwargs):
@@ -99,24 +100,24 @@ def hook_not_reentrant(func):
             Hide the generator in a separate function
             because Python 2 can't support "returning from generators"
             """
-            if entered[0]:
+            if getattr(entered, 'value', False):
                 yield
             else:
                 try:
-                    entered[0] = True
+                    entered.value = True
                     for val in func(*args, **kwargs):
                         yield val
                 finally:
-                    entered[0] = False
+                    entered.value = False
 
         if inspect.isgeneratorfunction(func):
             return generator_func()
         else:
-            if not entered[0]:
+            if not getattr(entered, 'value', False):
                 try:
-                    entered[0] = True
+                    entered.value = True
                     return func(*args, **kwargs)
                 finally:
-                    entered[0] = False
+                    entered.value = False
 
     return inner
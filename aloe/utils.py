@@ -3,10 +3,21 @@ Miscellaneous utilities used internally by Aloe.
 """
 
 import re
+import threading
 
 from functools import lru_cache
 from contextlib import contextmanager
 
+try:
+    from contextvars import ContextVar
+except ImportError:  # pragma: no cover
+    ContextVar = None  # pylint:disable=invalid-name
+
+# Whether there are context variables to keep the world of each concurrent
+# scenario separate. They were added in Python 3.7; before that, the world is
+# a threading.local, and the scenarios can't run concurrently.
+CONTEXT_VARS = ContextVar is not None
+
 
 @contextmanager
 def dummy_cm():
@@ -35,6 +46,20 @@ def unwrap_function(func):
         return func
 
 
+def function_module(func):
+    """
+    The name of the module defining the (possibly decorated) function, or
+    None if it isn't known.
+    """
+
+    try:
+        func = unwrap_function(func)
+    except AttributeError:
+        pass
+
+    return getattr(func, '__module__', None)
+
+
 RE_CAMEL_CASE = re.compile(r'(((?<=[a-z])[A-Z])|([A-Z](?![A-Z]|$)))')
 
 
@@ -76,3 +101,71 @@ class memoizedtype(type):  # pylint:disable=invalid-name
     def __call__(cls, *args, **kwargs):
         # On Python 2, newsuper can't deal with metaclasses
         return super(memoizedtype, cls).__call__(*args, **kwargs)
+
+
+class ContextLocal(object):
+    """
+    An object with attributes separate for each thread, like
+    threading.local, which can also be given separate attributes in a
+    context (and the asyncio tasks started from it) with isolated().
+    """
+
+    __slots__ = ('_local', '_context')
+
+    def __init__(self):
+        object.__setattr__(self, '_local', threading.local())
+        object.__setattr__(self, '_context',
+                           ContextVar('context_local', default=None))
+
+    @property
+    def __dict__(self):
+        """The attributes for the current context or thread."""
+
+        attributes = self._context.get()
+        if attributes is None:
+            attributes = self._local.__dict__
+        return attributes
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self.__dict__[name] = value
+
+    def __delattr__(self, name):
+        try:
+            del self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+@contextmanager
+def isolated(local, attributes=()):
+    """
+    Give a ContextLocal a copy of the given attributes in the current
+    context, until the end of the block.
+
+    Without context variables, give a threading.local the copy in the
+    current thread instead.
+    """
+
+    if not isinstance(local, ContextLocal):
+        saved = dict(local.__dict__)
+        local.__dict__.clear()
+        local.__dict__.update(attributes)
+        try:
+            yield local
+        finally:
+            local.__dict__.clear()
+            local.__dict__.update(saved)
+        return
+
+    # pylint:disable=protected-access
+    token = local._context.set(dict(attributes))
+    try:
+        yield local
+    finally:
+        local._context.reset(token)
@@ -0,0 +1,365 @@
+"""
+Running the features again when they or the step definitions change.
+
+The process is kept alive between the runs: the "all" callbacks run once,
+the changed step definition modules are reloaded in place, and the features
+which didn't change keep their parsed and compiled form.
+"""
+
+import os
+import sys
+import time
+import traceback
+import unittest
+
+from aloe.eventloop import close_event_loops
+from aloe.exceptions import undefined_step
+from aloe.fs import FeatureLoader
+from aloe.history import DurationHistory
+from aloe.parser import Feature
+from aloe.registry import CALLBACK_REGISTRY, STEP_REGISTRY
+from aloe.utils import function_module
+
+# How often to check the files for changes, in seconds
+POLL_INTERVAL = 0.5
+
+
+def modification_times(filenames):
+    """The modification times of the existing files among the given ones."""
+
+    times = {}
+    for filename in filenames:
+        try:
+            times[filename] = os.stat(filename).st_mtime_ns
+        except OSError:
+            pass
+
+    return times
+
+
+def callback_modules():
+    """The names of the modules defining any callbacks."""
+
+    return set(
+        function_module(function)
+        for what_dict in CALLBACK_REGISTRY.values()
+        for when_dict in what_dict.values()
+        for callback_list in when_dict.values()
+        for function in callback_list.values()
+    )
+
+
+class MemoryParseCache(object):
+    """
+    A cache of the parsed Gherkin documents kept in memory, in front of
+    another parse cache (e.g. aloe.cache.ParseCache), if given.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        # The modification time, size and document of each file and
+        # language, only for the latest version of the file
+        self.documents = {}
+
+    def parse(self, filename, language, parse):
+        """
+        Return the Gherkin document for the file, parsing it only if it
+        changed since the last time.
+        """
+
+        stat = os.stat(filename)
+        key = (os.path.abspath(filename), language)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self.documents.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        if self.cache is not None:
+            document = self.cache.parse(filename, language, parse)
+        else:
+            with open(filename, 'rb') as feature_file:
+                document = parse(feature_file.read().decode('utf-8'))
+
+        self.documents[key] = (version, document)
+        return document
+
+    def prune(self):
+        """Prune the underlying cache."""
+
+        if self.cache is not None:
+            self.cache.prune()
+
+
+class Watcher(object):
+    """
+    Run the features selected by the runner options, then run the changed
+    ones again whenever the feature files or the step definitions change,
+    until interrupted.
+
+    When a step definition file changes, its module is imported again,
+    replacing the steps and hooks it defined, and the features using its
+    steps run again. If the module defines any hooks, all the features run
+    again.
+
+    :param runner: the NativeRunner with the options to use
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.stream = runner.stream
+
+        # The modification times of the files, by file name
+        self.feature_times = {}
+        self.step_times = {}
+
+        # The module name of each loaded step definition file
+        self.step_modules = {}
+
+        # The compiled test classes of the unchanged features
+        self.testclasses = {}
+
+        # The names of the modules defining the steps each feature uses,
+        # including None if some steps are undefined
+        self.feature_modules = {}
+
+    def find_step_definitions(self):
+        """The step definition files and their module names."""
+
+        return {
+            filename: module_name
+            for feature_dir in self.runner.feature_dirs
+            for filename, module_name
+            in FeatureLoader.find_step_definitions(feature_dir)
+        }
+
+    def load_step_definitions(self):
+        """Load all the step definitions, remembering their modules."""
+
+        self.step_modules = self.find_step_definitions()
+        self.step_times = modification_times(self.step_modules)
+
+        for filename, module_name in self.step_modules.items():
+            FeatureLoader.load_step_definitions(filename, module_name)
+
+    def reload_step_definitions(self, changed, removed):
+        """
+        Unload the steps and hooks of the changed and removed step
+        definition files, and import the changed ones again.
+
+        Returns the names of the reloaded modules and whether any of them
+        had or has hooks.
+        """
+
+        step_modules = self.find_step_definitions()
+
+        modules = set()
+        hooks = False
+
+        for filename in list(changed) + list(removed):
+            module_name = self.step_modules.pop(filename, None)
+            if module_name is None:
+                continue
+            modules.add(module_name)
+
+            STEP_REGISTRY.unload_module(module_name)
+            hooks |= CALLBACK_REGISTRY.unload_module(module_name)
+            sys.modules.pop(module_name, None)
+
+        for filename in changed:
+            module_name = step_modules[filename]
+            modules.add(module_name)
+            self.step_modules[filename] = module_name
+            FeatureLoader.load_step_definitions(filename, module_name)
+
+        hooks |= bool(modules & callback_modules())
+
+        self.forget_sources()
+
+        return modules, hooks
+
+    def step_definitions_changed(self):
+        """
+        Reload the changed step definitions, returning the features to run
+        again because of them.
+        """
+
+        times = modification_times(self.find_step_definitions())
+        changed = [
+            filename for filename, mtime in times.items()
+            if self.step_times.get(filename) != mtime
+        ]
+        removed = [
+            filename for filename in self.step_times
+            if filename not in times
+        ]
+        self.step_times = times
+
+        if not changed and not removed:
+            return set()
+
+        modules, hooks = self.reload_step_definitions(changed, removed)
+
+        return set(
+            filename
+            for filename, used in self.feature_modules.items()
+            if hooks or None in used or used & modules
+        )
+
+    def changed_features(self):
+        """The selected features to run again, in the order to run them."""
+
+        rerun = self.step_definitions_changed()
+
+        features = self.runner.select_features()
+        times = modification_times(features)
+        rerun.update(
+            filename for filename, mtime in times.items()
+            if self.feature_times.get(filename) != mtime
+        )
+        self.feature_times = times
+
+        for filename in rerun:
+            self.testclasses.pop(filename, None)
+
+        if rerun:
+            self.forget_sources()
+
+        return [filename for filename in features if filename in rerun]
+
+    def forget_sources(self):
+        """Make the pass history read the changed source files again."""
+
+        pass_history = self.runner.test_class.pass_history
+        if pass_history is not None:
+            pass_history.forget_sources()
+
+    def used_modules(self, feature):
+        """The names of the modules defining the steps the feature uses."""
+
+        containers = []
+        if feature.background is not None:
+            containers.append(feature.background.steps)
+        for scenario in feature.scenarios:
+            if scenario.outlines:
+                containers.extend(
+                    scenario.evaluate(outline)
+                    for outline in scenario.outlines
+                )
+            else:
+                containers.append(scenario.steps)
+
+        modules = set()
+        for steps in containers:
+            for step in steps:
+                func = STEP_REGISTRY.match_step(step)[0]
+                if func is undefined_step:
+                    modules.add(None)
+                else:
+                    modules.add(function_module(func))
+
+        return modules
+
+    def load_feature(self, filename):
+        """
+        Build the test suite of a feature file, compiling it only if it
+        changed.
+        """
+
+        testclass = self.testclasses.get(filename)
+        if testclass is None:
+            testclass = self.runner.load_testclass(filename)
+            self.testclasses[filename] = testclass
+            self.feature_modules[filename] = \
+                self.used_modules(testclass.feature)
+
+        return self.runner.make_suite(testclass)
+
+    def run_features(self, features):
+        """Run the given feature files."""
+
+        suite = unittest.TestSuite(
+            self.load_feature(filename)
+            for filename in features
+        )
+
+        result = self.runner.make_test_runner().run(suite)
+        self.runner.record_result(result)
+
+        return result
+
+    def check_changes(self):
+        """
+        The features to run again because of the changes, reporting the
+        errors reloading the step definitions.
+        """
+
+        try:
+            return self.changed_features()
+        except Exception:  # pylint:disable=broad-except
+            # Wait for the step definitions to be fixed
+            traceback.print_exc(file=self.stream)
+            return []
+
+    def wait_for_changes(self):
+        """Wait until any of the files change, and reload them."""
+
+        self.stream.write("\nWatching for changes, press Ctrl+C to stop.\n")
+        self.stream.flush()
+
+        while True:
+            time.sleep(POLL_INTERVAL)
+
+            features = self.check_changes()
+            if features:
+                return features
+
+    def run(self):
+        """
+        Run the features until interrupted, returning the result of the
+        last run.
+        """
+
+        runner = self.runner
+        runner.configure()
+        runner.find_feature_directories()
+
+        if runner.options.processes:
+            self.stream.write(
+                "Running the features in a single process when watching.\n")
+
+        # Changed features are parsed again, but not the others
+        Feature.parse_cache = MemoryParseCache(Feature.parse_cache)
+        runner.history = DurationHistory(runner.options.cache_dir)
+
+        self.load_step_definitions()
+
+        # The "all" callbacks run once, even if their modules are reloaded
+        before_all, after_all = CALLBACK_REGISTRY.before_after('all')
+        before_all()
+
+        result = unittest.TestResult()
+        features = runner.select_features()
+        self.feature_times = modification_times(features)
+
+        try:
+            while True:
+                if features:
+                    try:
+                        result = self.run_features(features)
+                    except Exception:  # pylint:disable=broad-except
+                        # Wait for the features to be fixed
+                        traceback.print_exc(file=self.stream)
+
+                features = self.wait_for_changes()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            try:
+                after_all()
+            finally:
+                close_event_loops()
+                Feature.parse_cache.prune()
+                Feature.parse_cache = Feature.parse_cache.cache
+
+        return result
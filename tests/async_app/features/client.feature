@@ -0,0 +1,15 @@
+Feature: Asynchronous steps
+
+    Scenario: Request a page
+        When I request "index"
+        Then the response is "index"
+        And the request was made in a transaction
+
+    Scenario Outline: Request other pages
+        When I request "<page>"
+        Then the response is "<page>"
+
+        Examples:
+            | page    |
+            | about   |
+            | contact |
@@ -0,0 +1,14 @@
+@concurrent
+Feature: Concurrent scenarios
+
+    Scenario: Request the first page
+        When I request "first" along with 2 other requests
+        Then the response is "first"
+
+    Scenario: Request the second page
+        When I request "second" along with 2 other requests
+        Then the response is "second"
+
+    Scenario: Request the third page
+        When I request "third" along with 2 other requests
+        Then the response is "third"
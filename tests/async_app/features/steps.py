@@ -0,0 +1,110 @@
+"""
+Asynchronous steps and hooks using a client bound to the event loop.
+"""
+
+import asyncio
+
+from aloe import after, around, before, step, world
+
+# pylint:disable=unused-argument
+
+
+class Client(object):
+    """
+    A client which, like most connection pools, can only be used on the
+    event loop it was created on.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_event_loop()
+        self.requests = 0
+        self.started = 0
+        self.closed = False
+
+    async def get(self, path):
+        """Pretend to request a page."""
+
+        assert asyncio.get_event_loop() is self.loop, \
+            "Client used on a different event loop."
+        assert not self.closed, "Client is closed."
+
+        await asyncio.sleep(0.01)
+        self.requests += 1
+        return path
+
+    async def get_together(self, path, count):
+        """
+        Pretend to request a page, waiting until the given number of
+        requests have started.
+        """
+
+        self.started += 1
+        for _ in range(100):
+            if self.started >= count:
+                return await self.get(path)
+            await asyncio.sleep(0.01)
+
+        raise AssertionError(
+            "Only {0} requests were started.".format(self.started))
+
+    async def close(self):
+        """Close the client."""
+        assert asyncio.get_event_loop() is self.loop, \
+            "Client closed on a different event loop."
+        self.closed = True
+
+
+@before.all
+async def open_client():
+    """Open the client for all the features."""
+    world.client = Client()
+
+
+@after.all
+async def close_client():
+    """Close the client."""
+    await world.client.close()
+
+
+class Transaction(object):
+    """An asynchronous context manager wrapping the block in a transaction."""
+
+    async def __aenter__(self):
+        await world.client.get('begin')
+        world.transaction = True
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        world.transaction = False
+        await world.client.get('commit')
+
+
+@around.each_example
+def transaction(scenario, outline, steps):
+    """Run each example in a transaction."""
+    return Transaction()
+
+
+@step(r'I request "(\w+)"$')
+async def request(self, path):
+    """Request a page."""
+    world.response = await world.client.get(path)
+
+
+@step(r'I request "(\w+)" along with (\d+) other requests')
+async def request_together(self, path, count):
+    """Request a page while other scenarios do the same."""
+    print("Requesting {0}".format(path))
+    world.response = await world.client.get_together(path, int(count) + 1)
+
+
+@step(r'the response is "(\w+)"')
+def check_response(self, expected):
+    """Check the last response."""
+    assert world.response == expected, \
+        "Expected {0}, got {1}.".format(expected, world.response)
+
+
+@step(r'the request was made in a transaction')
+def check_transaction(self):
+    """Check the example is wrapped in a transaction."""
+    assert world.transaction
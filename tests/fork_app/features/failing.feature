@@ -0,0 +1,15 @@
+@fork_background
+Feature: Failing forked scenarios
+
+  Background:
+    Given I seed the fixture
+
+  Scenario: Fail
+    When I add an item
+    Then there are 2 items
+
+  Scenario: Exit
+    When the process exits
+
+  Scenario: Pass
+    Then there are 0 items
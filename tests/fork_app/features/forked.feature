@@ -0,0 +1,21 @@
+@fork_background
+Feature: Forked background
+
+  Background:
+    Given I seed the fixture
+
+  Scenario: Add an item
+    When I add an item
+    Then there is 1 item
+    And the fixture was seeded once in another process
+
+  Scenario Outline: Add items
+    When I add an item
+    And I add an item
+    Then there are <count> items
+    And the fixture was seeded once in another process
+
+    Examples:
+      | count |
+      | 2     |
+      | 2     |
@@ -0,0 +1,45 @@
+"""
+Steps checking the background runs once and the scenarios start from the
+state it leaves.
+"""
+
+import os
+
+from aloe import step, world
+
+# pylint:disable=unused-argument
+
+
+@step(r'I seed the fixture')
+def seed_fixture(self):
+    """Seed the fixture, remembering how many times it was done."""
+
+    world.seeds = getattr(world, 'seeds', 0) + 1
+    world.seed_pid = os.getpid()
+    world.items = []
+
+
+@step(r'I add an item')
+def add_item(self):
+    """Add an item to the fixture."""
+    world.items.append(len(world.items))
+
+
+@step(r'there (?:is|are) (\d+) items?')
+def check_items(self, count):
+    """Check the number of items in the fixture."""
+    assert len(world.items) == int(count), world.items
+
+
+@step(r'the fixture was seeded once in another process')
+def check_seeded(self):
+    """Check the background only ran once, in the parent process."""
+
+    assert world.seeds == 1, world.seeds
+    assert world.seed_pid != os.getpid()
+
+
+@step(r'the process exits')
+def exit_process(self):
+    """Exit the scenario process without reporting the result."""
+    os._exit(3)  # pylint:disable=protected-access
@@ -0,0 +1,12 @@
+Feature: Untagged background
+
+  Background:
+    Given I seed the fixture
+
+  Scenario: Add an item
+    When I add an item
+    Then the fixture was seeded once in another process
+
+  Scenario: Add another item
+    When I add an item
+    Then the fixture was seeded once in another process
@@ -0,0 +1,90 @@
+"""
+Test asynchronous steps and hooks.
+"""
+
+import io
+import re
+import unittest
+
+from aloe import testing
+from aloe.testing import in_directory
+from aloe.utils import CONTEXT_VARS
+
+# The scenarios can only run concurrently with context variables
+CONCURRENT = unittest.skipUnless(CONTEXT_VARS, "Needs Python 3.7.")
+
+
+@in_directory('tests/async_app')
+class AsyncTest(testing.FeatureTest):
+    """
+    Test running asynchronous steps and hooks.
+    """
+
+    def test_async(self):
+        """Test the steps and hooks share the event loop."""
+
+        self.assert_feature_success('features/client.feature')
+
+
+class NativeAsyncTest(AsyncTest):
+    """
+    Test running asynchronous steps and hooks with the native runner.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    def test_threads(self):
+        """Test running the asynchronous steps in threads."""
+
+        # The client is created on the main thread's loop, so it can't be
+        # used from the other threads
+        result = self.assert_feature_fail('--threads', '2',
+                                          'features/client.feature')
+
+        self.assertEqual(len(result.result.errors)
+                         + len(result.result.failures), 3)
+
+    @CONCURRENT
+    def test_concurrent(self):
+        """Test running the scenarios tagged @concurrent concurrently."""
+
+        result = self.assert_feature_success('features/concurrent.feature')
+
+        self.assertEqual(result.result.testsRun, 3)
+
+    @CONCURRENT
+    def test_concurrency(self):
+        """Test limiting the number of concurrent scenarios."""
+
+        result = self.assert_feature_fail('--concurrency', '2',
+                                          'features/concurrent.feature')
+
+        # Only the first two scenarios ran together
+        self.assertEqual(len(result.result.failures), 2)
+
+    @CONCURRENT
+    def test_concurrent_option(self):
+        """Test running all the scenarios concurrently."""
+
+        self.assert_feature_success('--concurrent', 'features/client.feature')
+
+    @CONCURRENT
+    def test_concurrent_output(self):
+        """Test the output of each scenario is written in one piece."""
+
+        stream = io.StringIO()
+
+        self.assert_feature_success('features/concurrent.feature',
+                                    verbosity=3, stream=stream)
+
+        output = stream.getvalue()
+
+        for page in ('first', 'second', 'third'):
+            self.assertRegex(output, re.compile(
+                r'^  Scenario: Request the {0} page.*\n'
+                # The output of the coroutine run on the main thread
+                r'Requesting {0}\n'
+                r'    When I request "{0}" along with 2 other requests\n'
+                r'    Then the response is "{0}"\n'.format(page),
+                re.MULTILINE,
+            ))
@@ -0,0 +1,109 @@
+"""
+Test running the examples of each outline in a single test.
+"""
+
+import io
+import re
+
+from aloe import testing
+from aloe.testing import in_directory
+
+
+@in_directory('tests/simple_app')
+class BatchOutlinesTest(testing.FeatureTest):
+    """
+    Test running the examples of each outline in a single test.
+    """
+
+    def run_count(self, *args):
+        """Run the features successfully, returning the number of tests."""
+
+        stream = io.StringIO()
+        self.assert_feature_success(*args, stream=stream)
+
+        return int(re.search(r'^Ran (\d+) tests? ', stream.getvalue(),
+                             re.MULTILINE).group(1))
+
+    def test_batch_outlines(self):
+        """Test running the examples of an outline as subtests."""
+
+        self.assertEqual(
+            self.run_count('--batch-outlines', 'features/outlines.feature'),
+            1)
+
+    def test_not_batched(self):
+        """Test running each example as a test by default."""
+
+        self.assertEqual(self.run_count('features/outlines.feature'), 2)
+
+    def test_failures(self):
+        """Test reporting the failures of all the examples together."""
+
+        stream = io.StringIO()
+        failing_feature = 'features/wrong_expectations.feature'
+
+        self.assert_feature_fail('--batch-outlines', '-n', '2',
+                                 failing_feature, stream=stream)
+
+        output = stream.getvalue()
+        self.assertIn('Ran 1 test ', output)
+        self.assertIn('FAILED (failures=1)', output)
+
+        # Each example is shown with its location
+        for line, example in ((22, 1), (23, 2)):
+            self.assertIn('Example {0}:'.format(example), output)
+            self.assertIn(
+                'line {0}, in Fail repeatedly: Example {1}'.format(
+                    line, example),
+                output)
+
+
+class NativeBatchOutlinesTest(BatchOutlinesTest):
+    """
+    Test running the examples of each outline in a single test with the
+    native runner.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    def test_failures(self):
+        """Test reporting the failure of each example."""
+
+        stream = io.StringIO()
+        failing_feature = 'features/wrong_expectations.feature'
+
+        result = self.assert_feature_fail('--batch-outlines', '-n', '2',
+                                          failing_feature, stream=stream)
+
+        self.assertEqual(result.result.testsRun, 1)
+        self.assertEqual(
+            [str(test) for test, _ in result.result.failures],
+            [
+                'Fail repeatedly (features.wrong_expectations: '
+                'Wrong expectations) (example=1)',
+                'Fail repeatedly (features.wrong_expectations: '
+                'Wrong expectations) (example=2)',
+            ]
+        )
+
+        # Each example is shown with its location
+        output = stream.getvalue()
+        for line, example in ((22, 1), (23, 2)):
+            self.assertIn(
+                'FAIL: Fail repeatedly (features.wrong_expectations: '
+                'Wrong expectations) (example={0})'.format(example),
+                output)
+            self.assertIn(
+                'line {0}, in Fail repeatedly: Example {1}'.format(
+                    line, example),
+                output)
+
+    def test_selected_examples(self):
+        """Test running only the selected examples."""
+
+        result = self.assert_feature_fail(
+            '--batch-outlines', 'features/wrong_expectations.feature:22')
+
+        self.assertEqual(result.result.testsRun, 1)
+        self.assertEqual(len(result.result.failures), 1)
+        self.assertIn('(example=1)', str(result.result.failures[0][0]))
@@ -0,0 +1,48 @@
+"""
+Test running the background once and each scenario in a forked process.
+"""
+
+import io
+
+from aloe import testing
+from aloe.testing import in_directory
+
+
+@in_directory('tests/fork_app')
+class ForkBackgroundTest(testing.FeatureTest):
+    """
+    Test running the background once and each scenario in a forked process.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    def test_tag(self):
+        """Test forking the scenarios of the tagged features."""
+
+        result = self.assert_feature_success('features/forked.feature')
+        self.assertEqual(result.result.testsRun, 3)
+
+    def test_option(self):
+        """Test forking the scenarios of all the features."""
+
+        self.assert_feature_fail('features/untagged.feature')
+
+        result = self.assert_feature_success('--fork-background',
+                                             'features/untagged.feature')
+        self.assertEqual(result.result.testsRun, 2)
+
+    def test_failure(self):
+        """Test reporting the failures of the forked scenarios."""
+
+        stream = io.StringIO()
+        result = self.assert_feature_fail('features/failing.feature',
+                                          stream=stream)
+
+        self.assertEqual(result.result.testsRun, 3)
+        self.assertEqual(len(result.result.failures), 1)
+        self.assertEqual(len(result.result.errors), 1)
+
+        output = stream.getvalue()
+        self.assertIn('AssertionError: [0]', output)
+        self.assertIn('Scenario process exited unexpectedly with status',
+                      output)
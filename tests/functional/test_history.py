@@ -0,0 +1,308 @@
+"""
+Test using the history of the previous runs.
+"""
+
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from aloe import testing
+from aloe.testing import in_directory
+
+FEATURES = (
+    'features/calculator.feature',
+    'features/outlines.feature',
+    'features/background.feature',
+)
+
+
+@in_directory('tests/simple_app')
+class DurationsTest(testing.FeatureTest):
+    """
+    Test recording the durations and using them to balance the work.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        super().tearDown()
+
+    def run_features(self, *features, **kwargs):
+        return super().run_features('--cache-dir', self.cache_dir,
+                                    *features, **kwargs)
+
+    def read_durations(self):
+        """The recorded durations."""
+
+        with open(os.path.join(self.cache_dir, 'durations.json')) \
+                as history_file:
+            return json.load(history_file)['features']
+
+    def test_record(self):
+        """Test recording the durations of the scenarios."""
+
+        self.assert_feature_success('--record-durations', *FEATURES)
+
+        durations = self.read_durations()
+        self.assertEqual(
+            {feature: sorted(scenarios)
+             for feature, scenarios in durations.items()},
+            {
+                'features/calculator.feature': ['Add two numbers'],
+                'features/outlines.feature': [
+                    'Add two numbers: Example 1',
+                    'Add two numbers: Example 2',
+                ],
+                'features/background.feature': ['Add two numbers'],
+            }
+        )
+
+    def test_record_processes(self):
+        """Test recording the durations from the worker processes."""
+
+        self.assert_feature_success('--record-durations',
+                                    '--processes', '2', *FEATURES)
+
+        self.assertEqual(len(self.read_durations()), 3)
+
+    def test_shard(self):
+        """Test running the features in shards."""
+
+        self.assert_feature_success('--record-durations', *FEATURES)
+
+        tests_run = []
+        for index in (1, 2):
+            result = self.assert_feature_success(
+                '--shard', '{0}/2'.format(index), *FEATURES)
+            self.assertTrue(result.result.testsRun)
+            tests_run.append(result.result.testsRun)
+
+        self.assertEqual(sum(tests_run), 4)
+
+
+MIXED_FEATURE = """
+Feature: Mixed results
+
+    Scenario: Pass at adding
+        Given I have entered 10 into the calculator
+        And I have entered 20 into the calculator
+        When I press add
+        Then the result should be 30 on the screen
+
+    Scenario: Fail at adding
+        Given I have entered 10 into the calculator
+        And I have entered 20 into the calculator
+        When I press add
+        Then the result should be 40 on the screen
+"""
+
+
+@in_directory('tests/simple_app')
+class LastFailedTest(testing.FeatureTest):
+    """
+    Test running the scenarios that failed last time.
+    """
+
+    feature = 'features/last_failed.feature'
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.mkdtemp()
+
+        with open(self.feature, 'w') as feature_file:
+            feature_file.write(MIXED_FEATURE)
+
+    def tearDown(self):
+        os.unlink(self.feature)
+        shutil.rmtree(self.cache_dir)
+        super().tearDown()
+
+    def run_scenarios(self, *features):
+        """Run the features, returning the names of the scenarios run."""
+
+        stream = io.StringIO()
+        self.run_features('--cache-dir', self.cache_dir, *features,
+                          verbosity=2, stream=stream)
+
+        return re.findall(r'^(.*) \(.*\) \.\.\. ', stream.getvalue(),
+                          re.MULTILINE)
+
+    def test_last_failed(self):
+        """Test running only the failed scenarios."""
+
+        features = (
+            'features/calculator.feature',
+            'features/wrong_expectations.feature',
+        )
+
+        # No failures recorded yet, all the scenarios run
+        self.assertEqual(
+            self.run_scenarios('--last-failed', *features),
+            [
+                'Add two numbers',
+                'Fail at adding',
+                'Fail repeatedly',
+                'Fail repeatedly',
+            ]
+        )
+
+        self.assertEqual(
+            self.run_scenarios('--last-failed', *features),
+            [
+                'Fail at adding',
+                'Fail repeatedly',
+                'Fail repeatedly',
+            ]
+        )
+
+        # The failures of the other features are kept
+        self.run_scenarios('features/calculator.feature')
+        self.assertEqual(
+            self.run_scenarios('--last-failed', *features),
+            [
+                'Fail at adding',
+                'Fail repeatedly',
+                'Fail repeatedly',
+            ]
+        )
+
+    def test_failed_first(self):
+        """Test running the failed scenarios first."""
+
+        self.assertEqual(self.run_scenarios('--failed-first', self.feature),
+                         ['Pass at adding', 'Fail at adding'])
+
+        self.assertEqual(self.run_scenarios('--failed-first', self.feature),
+                         ['Fail at adding', 'Pass at adding'])
+
+        self.assertEqual(self.run_scenarios(self.feature),
+                         ['Pass at adding', 'Fail at adding'])
+
+
+class NativeLastFailedTest(LastFailedTest):
+    """
+    Test running the scenarios that failed last time with the native
+    runner.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    def test_failed_first_features(self):
+        """Test running the features with failed scenarios first."""
+
+        features = (
+            'features/calculator.feature',
+            'features/wrong_expectations.feature',
+        )
+
+        self.run_scenarios(*features)
+        self.assertEqual(
+            self.run_scenarios('--failed-first', *features),
+            [
+                'Fail at adding',
+                'Fail repeatedly',
+                'Fail repeatedly',
+                'Add two numbers',
+            ]
+        )
+
+
+@in_directory('tests/simple_app')
+class IncrementalTest(testing.FeatureTest):
+    """
+    Test skipping the scenarios that passed before.
+    """
+
+    feature = 'features/incremental.feature'
+
+    # How the runner reports the skipped scenarios
+    cached = 'SKIP: cached pass'
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.write_feature(MIXED_FEATURE)
+
+    def tearDown(self):
+        os.unlink(self.feature)
+        shutil.rmtree(self.cache_dir)
+        super().tearDown()
+
+    def write_feature(self, text):
+        """Write the feature file."""
+
+        with open(self.feature, 'w') as feature_file:
+            feature_file.write(text)
+
+    def run_scenarios(self, *args):
+        """
+        Run the feature, returning the names and the outcomes of the
+        scenarios run.
+        """
+
+        stream = io.StringIO()
+        self.run_features('--cache-dir', self.cache_dir, *args + (
+            self.feature,), verbosity=2, stream=stream)
+
+        return re.findall(r'^(.*) \(.*\) \.\.\. (.*)$', stream.getvalue(),
+                          re.MULTILINE)
+
+    def test_incremental(self):
+        """Test skipping the unchanged scenarios that passed."""
+
+        self.assertEqual(self.run_scenarios('--incremental'), [
+            ('Pass at adding', 'ok'),
+            ('Fail at adding', 'FAIL'),
+        ])
+
+        self.assertEqual(self.run_scenarios('--incremental'), [
+            ('Pass at adding', self.cached),
+            ('Fail at adding', 'FAIL'),
+        ])
+
+        # Without the option, all the scenarios run
+        self.assertEqual(self.run_scenarios(), [
+            ('Pass at adding', 'ok'),
+            ('Fail at adding', 'FAIL'),
+        ])
+
+        # A changed scenario runs again
+        self.write_feature(MIXED_FEATURE.replace('20 into', '5 into')
+                           .replace('be 30', 'be 15'))
+        self.assertEqual(self.run_scenarios('--incremental'), [
+            ('Pass at adding', 'ok'),
+            ('Fail at adding', 'FAIL'),
+        ])
+
+        self.assertEqual(self.run_scenarios('--incremental',
+                                            '--clear-incremental'), [
+            ('Pass at adding', 'ok'),
+            ('Fail at adding', 'FAIL'),
+        ])
+
+
+class NativeIncrementalTest(IncrementalTest):
+    """
+    Test skipping the scenarios that passed before with the native runner.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    cached = "skipped 'cached pass'"
+
+    def test_processes(self):
+        """Test recording the passed scenarios in the worker processes."""
+
+        self.run_scenarios('--incremental', '--processes', '2')
+        self.assertEqual(self.run_scenarios('--incremental'), [
+            ('Pass at adding', self.cached),
+            ('Fail at adding', 'FAIL'),
+        ])
@@ -0,0 +1,143 @@
+"""
+Test importing the step definitions only when needed.
+"""
+
+import os
+import shutil
+import tempfile
+
+from aloe import testing, world
+
+STEPS = """
+from aloe import step, world
+
+world.imported = getattr(world, 'imported', set()) | {{__name__}}
+
+
+@step(r'the {0} step')
+def {0}_step(self):
+    pass
+"""
+
+FEATURE = """
+Feature: {0}
+
+    Scenario: Use the steps
+{1}
+"""
+
+
+class LazyStepsTest(testing.FeatureTest):
+    """
+    Test importing the step definitions only when needed.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+
+        for package in ('app1', 'app1/features', 'app2', 'app2/features'):
+            self.write(os.path.join(package, '__init__.py'), '')
+
+        self.write('app1/features/first.py', STEPS.format('first'))
+        self.write('app2/features/second.py', STEPS.format('second'))
+        self.write('app2/features/third.py', STEPS.format('third'))
+
+        self.write('app1/features/one.feature', FEATURE.format('One', """
+        Given the first step
+        Then the second step
+        """))
+        self.write('app2/features/two.feature', FEATURE.format('Two', """
+        Given the second step
+        Then the third step
+        """))
+
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def write(self, filename, content):
+        """Write a file in the application directory."""
+
+        filename = os.path.join(self.directory, filename)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        with open(filename, 'w') as output:
+            output.write(content)
+
+    def run_lazily(self, *args):
+        """
+        Run the features, importing the step definitions lazily, and return
+        the step definition modules imported.
+        """
+
+        world.imported = set()
+        cache_dir = os.path.join(self.directory, 'cache')
+        self.assert_feature_success('--lazy-steps', '--cache-dir', cache_dir,
+                                    *args)
+        return world.imported
+
+    def test_all_steps(self):
+        """Test importing all the step definitions by default."""
+
+        self.assert_feature_success('app1/features/one.feature')
+        self.assertEqual(world.imported, {
+            'app1.features.first',
+            'app2.features.second',
+            'app2.features.third',
+        })
+
+    def test_lazy_steps(self):
+        """Test importing the other step definitions when needed."""
+
+        # Without knowing the sentences of the other files, all of them are
+        # imported for the step they define
+        self.assertEqual(self.run_lazily('app1/features/one.feature'), {
+            'app1.features.first',
+            'app2.features.second',
+            'app2.features.third',
+        })
+
+        # The file defining it is known the next time
+        self.assertEqual(self.run_lazily('app1/features/one.feature'), {
+            'app1.features.first',
+            'app2.features.second',
+        })
+
+        # Only the steps of the selected directory are needed
+        self.assertEqual(self.run_lazily('app2/features/two.feature'), {
+            'app2.features.second',
+            'app2.features.third',
+        })
+
+        # All the steps are imported for all the features
+        self.assertEqual(self.run_lazily(), {
+            'app1.features.first',
+            'app2.features.second',
+            'app2.features.third',
+        })
+
+    def test_step_library(self):
+        """Test always importing the step libraries."""
+
+        self.assertEqual(
+            self.run_lazily('--step-library', 'app2/features/second.py',
+                            'app1/features/one.feature'),
+            {
+                'app1.features.first',
+                'app2.features.second',
+            })
+
+
+class NativeLazyStepsTest(LazyStepsTest):
+    """
+    Test importing the step definitions only when needed with the native
+    runner.
+    """
+
+    runner_class = testing.TestNativeRunner
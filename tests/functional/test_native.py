@@ -0,0 +1,35 @@
+"""
+Test running the features with the native runner.
+"""
+
+from aloe import testing
+
+from tests.functional import (
+    test_callbacks,
+    test_simple,
+    test_step_loading,
+)
+
+
+class NativeSimpleScenarioTest(test_simple.SimpleScenarioTest):
+    """
+    Test that basic feature running works with the native runner.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+
+class NativeStepLoadingTest(test_step_loading.StepLoadingTest):
+    """
+    Test step loading with the native runner.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+
+class NativeCallbackTest(test_callbacks.CallbackTest):
+    """
+    Test callbacks with the native runner.
+    """
+
+    runner_class = testing.TestNativeRunner
@@ -0,0 +1,93 @@
+"""
+Test running the features in multiple processes.
+"""
+
+import queue
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from aloe import testing
+from aloe.parallel import ProcessPool
+from aloe.testing import in_directory
+
+FEATURES = (
+    'features/calculator.feature',
+    'features/outlines.feature',
+    'features/background.feature',
+)
+
+
+@in_directory('tests/simple_app')
+class ParallelTest(testing.FeatureTest):
+    """
+    Test running the features in worker processes.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    def test_success(self):
+        """Test running the features in multiple processes."""
+
+        serial = self.assert_feature_success(*FEATURES)
+        parallel = self.assert_feature_success('--processes', '2',
+                                               *FEATURES)
+
+        self.assertEqual(parallel.result.testsRun, serial.result.testsRun)
+
+    def test_recycle(self):
+        """Test replacing the workers after each feature."""
+
+        result = self.assert_feature_success(
+            '--processes', '1', '--process-max-features', '1', *FEATURES)
+
+        self.assertEqual(result.result.testsRun, 4)
+
+    def test_failure(self):
+        """Test reporting the failures from the workers."""
+
+        result = self.assert_feature_fail(
+            '--processes', '2', 'features/wrong_expectations.feature',
+            *FEATURES)
+
+        self.assertEqual(len(result.result.failures), 3)
+
+        (test, error), = result.result.failures[:1]
+        self.assertIn('features.wrong_expectations', str(test))
+        self.assertIn('wrong_expectations.feature", line', error)
+
+    def test_stop(self):
+        """Test stopping all the workers after the first failure."""
+
+        result = self.assert_feature_fail(
+            '--processes', '1', '-x',
+            'features/wrong_expectations.feature', *FEATURES)
+
+        self.assertEqual(len(result.result.failures), 1)
+        self.assertEqual(result.result.testsRun, 1)
+
+
+class ProcessPoolTest(unittest.TestCase):
+    """
+    Test managing the worker processes.
+    """
+
+    def test_exited_worker(self):
+        """Test a worker exiting before its last message is handled."""
+
+        runner = SimpleNamespace(options=SimpleNamespace(stop=False))
+        pool = ProcessPool(runner, [], 1)
+        pool.messages = queue.Queue()
+
+        pool.workers[0] = (Mock(**{'is_alive.return_value': False}), None)
+        pool.messages.put(('exit', 0, ''))
+
+        result = unittest.TestResult()
+        pool.check_workers(result)
+
+        self.assertEqual(pool.workers, {})
+        self.assertEqual(result.errors, [])
+
+        # A late message from a worker already gone is ignored
+        pool.handle(result, ('exit', 0, ''))
+        self.assertEqual(result.errors, [])
@@ -0,0 +1,40 @@
+"""
+Test running the steps the scenarios start with once.
+"""
+
+from aloe import testing
+from aloe.testing import in_directory
+
+
+@in_directory('tests/prefix_app')
+class SharePrefixesTest(testing.FeatureTest):
+    """
+    Test running the steps the scenarios start with once.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    def test_share_prefixes(self):
+        """Test restoring the state after the shared steps."""
+
+        self.assert_feature_fail('features/shared.feature')
+
+        result = self.assert_feature_success('--share-prefixes',
+                                             'features/shared.feature')
+        self.assertEqual(result.result.testsRun, 4)
+
+    def test_side_effects(self):
+        """Test running the steps with side effects again."""
+
+        self.assert_feature_success('--share-prefixes',
+                                    'features/side_effects.feature')
+
+    def test_failure(self):
+        """Test the steps are run again after a failure."""
+
+        result = self.assert_feature_fail('--share-prefixes',
+                                          'features/failing.feature')
+
+        self.assertEqual(result.result.testsRun, 2)
+        self.assertEqual(len(result.result.failures), 1)
+        self.assertIn('Fail', str(result.result.failures[0][0]))
@@ -0,0 +1,189 @@
+"""
+Test running the features on the server.
+"""
+
+import io
+import os
+import shutil
+import signal
+import tempfile
+
+from aloe import testing
+from aloe.server import Server
+
+STEPS = """
+import os
+
+from aloe import before, step, world
+
+ANSWER = {answer}
+
+
+@before.all
+def remember_process():
+    world.server_pid = os.getpid()
+
+
+@step(r'the answer is (\\d+)')
+def check_answer(self, value):
+    assert int(value) == ANSWER
+
+
+@step(r'the steps were loaded by the server')
+def check_server(self):
+    assert world.server_pid != os.getpid()
+"""
+
+FEATURE = """
+Feature: Served
+
+    Scenario: Use the loaded steps
+        Then the answer is 42
+        And the steps were loaded by the server
+"""
+
+LIBRARY = """
+from aloe import step
+
+
+@step(r'the library step works')
+def library_step(self):
+    pass
+"""
+
+LIBRARY_STEPS = """
+import served_library  # pylint:disable=unused-import
+"""
+
+LIBRARY_FEATURE = """
+Feature: Served library
+
+    Scenario: Use the library steps
+        Then the library step works
+"""
+
+
+class ServerTest(testing.FeatureTest):
+    """
+    Test running the features on the server.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    def setUp(self):
+        super().setUp()
+
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        self.socket = os.path.join(self.directory, 'server.sock')
+
+        os.mkdir(os.path.join(self.directory, 'features'))
+        open(os.path.join(self.directory, 'features', '__init__.py'),
+             'w').close()
+        self.write_steps(42)
+        with open(os.path.join(self.directory, 'features', 'served.feature'),
+                  'w') as feature_file:
+            feature_file.write(FEATURE)
+
+        os.chdir(self.directory)
+        self.server_pid = None
+
+    def tearDown(self):
+        if self.server_pid is not None:
+            os.kill(self.server_pid, signal.SIGINT)
+            os.waitpid(self.server_pid, 0)
+
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def write_steps(self, answer):
+        """Write the step definitions."""
+
+        filename = os.path.join(self.directory, 'features', 'steps.py')
+        with open(filename, 'w') as steps_file:
+            steps_file.write(STEPS.format(answer=answer))
+
+        # Make sure the change is noticed even within the timer resolution
+        mtime = os.stat(filename).st_mtime + answer
+        os.utime(filename, (mtime, mtime))
+
+    def start_server(self):
+        """Start the server in a child process."""
+
+        read_fd, write_fd = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                with os.fdopen(write_fd, 'w') as stream:
+                    Server(['aloe serve', '--socket', self.socket],
+                           stream=stream)
+            finally:
+                os._exit(0)  # pylint:disable=protected-access
+
+        self.server_pid = pid
+        os.close(write_fd)
+
+        with os.fdopen(read_fd) as stream:
+            self.assertEqual(stream.readline(),
+                             "Listening on {0}.\n".format(self.socket))
+
+    def run_served(self, *args):
+        """Run the features on the server."""
+
+        stream = io.StringIO()
+        result = self.run_features('--server', '--socket', self.socket,
+                                   *args, stream=stream)
+        return result, stream.getvalue()
+
+    def test_server(self):
+        """Test running the features on the server."""
+
+        self.start_server()
+
+        for _ in range(2):
+            result, output = self.run_served('features/served.feature')
+            self.assertTrue(result.success, output)
+            self.assertIn('Ran 1 test', output)
+
+        # The changed steps are loaded again
+        self.write_steps(41)
+        result, output = self.run_served('features/served.feature')
+        self.assertFalse(result.success)
+        self.assertIn('AssertionError', output)
+
+    def test_step_library(self):
+        """Test the steps of a library stay loaded with the changed steps."""
+
+        with open(os.path.join(self.directory, 'served_library.py'),
+                  'w') as library_file:
+            library_file.write(LIBRARY)
+        with open(os.path.join(self.directory, 'features', 'library.py'),
+                  'w') as steps_file:
+            steps_file.write(LIBRARY_STEPS)
+        with open(os.path.join(self.directory, 'features',
+                               'library.feature'), 'w') as feature_file:
+            feature_file.write(LIBRARY_FEATURE)
+
+        self.start_server()
+
+        result, output = self.run_served('features/library.feature')
+        self.assertTrue(result.success, output)
+
+        # Loading the changed steps keeps the library steps
+        self.write_steps(43)
+        result, output = self.run_served('features/library.feature')
+        self.assertTrue(result.success, output)
+
+    def test_no_server(self):
+        """Test running the features without a server."""
+
+        result, output = self.run_served('features/served.feature')
+
+        # The steps are loaded here, and fail to find the server
+        self.assertFalse(result.success)
+        self.assertIn(
+            "No server is listening on {0}".format(self.socket), output)
+        self.assertIn('Ran 1 test', output)
@@ -323,6 +323,37 @@ AssertionError
         self.assert_feature_success(feature, '-n', '3')
         self.assertEqual(world.all_results, [30, 40])
 
+    def test_scenario_lines(self):
+        """
+        Test specifying the lines of the scenarios to run.
+        """
+
+        feature = 'features/scenario_index.feature'
+
+        # Run a scenario by its line
+        self.assert_feature_success(feature + ':13')
+        self.assertEqual(world.all_results, [20])
+
+        # Run scenarios by the lines of their steps
+        self.assert_feature_success(feature + ':11:14')
+        self.assertEqual(world.all_results, [10, 20])
+
+        # Run a single outline example
+        self.assert_feature_success(feature + ':24')
+        self.assertEqual(world.all_results, [40])
+
+        # Run all the outline examples
+        self.assert_feature_success(feature + ':17')
+        self.assertEqual(world.all_results, [30, 40])
+
+        # Combine with the scenario indices
+        self.assert_feature_success(feature + ':10:13', '-n', '2')
+        self.assertEqual(world.all_results, [20])
+
+        # Nothing at the given line
+        self.assert_feature_success(feature + ':1')
+        self.assertEqual(world.all_results, [])
+
     def test_tags(self):
         """
         Test specifying the tags to run.
@@ -0,0 +1,115 @@
+"""
+Test running the scenarios in multiple threads.
+"""
+
+import io
+import re
+import unittest
+
+from aloe import testing
+from aloe.testing import in_directory
+from aloe.threads import ThreadedSuite
+
+FEATURES = (
+    'features/calculator.feature',
+    'features/outlines.feature',
+    'features/background.feature',
+)
+
+
+@in_directory('tests/simple_app')
+class ThreadsTest(testing.FeatureTest):
+    """
+    Test running the scenarios of each feature in threads.
+    """
+
+    runner_class = testing.TestNativeRunner
+
+    def test_success(self):
+        """Test running the scenarios in multiple threads."""
+
+        serial = self.assert_feature_success(*FEATURES)
+        threaded = self.assert_feature_success('--threads', '3', *FEATURES)
+
+        self.assertEqual(threaded.result.testsRun, serial.result.testsRun)
+
+    def test_failure(self):
+        """Test reporting the failures from the threads."""
+
+        result = self.assert_feature_fail(
+            '--threads', '3', 'features/wrong_expectations.feature')
+
+        self.assertEqual(len(result.result.failures), 3)
+
+    def test_output(self):
+        """Test the output of each scenario is written in one piece."""
+
+        stream = io.StringIO()
+
+        self.assert_feature_fail(
+            '--threads', '3', 'features/wrong_expectations.feature',
+            verbosity=3, stream=stream)
+
+        output = stream.getvalue()
+
+        for result in (40, 50, 60):
+            self.assertRegex(output, re.compile(
+                r'^  Scenario.*\n'
+                r'(.*\n)*?'  # outline example table
+                r'    Given I have entered 10 into the calculator\n'
+                r'    And I have entered 20 into the calculator\n'
+                r'    When I press add\n'
+                r'    Then the result should be {0} on the screen\n'.format(
+                    result),
+                re.MULTILINE,
+            ))
+
+
+class SuiteFixturesTest(unittest.TestCase):
+    """
+    Test the order of the class fixtures between the threaded suites and the
+    regular ones.
+    """
+
+    def test_order(self):
+        """Test finishing each class before setting up the next one."""
+
+        events = []
+
+        def make_class(name):
+            """A test class recording its fixtures and tests."""
+
+            class Test(unittest.TestCase):
+                """A test class."""
+
+                @classmethod
+                def setUpClass(cls):
+                    events.append(('before', name))
+
+                @classmethod
+                def tearDownClass(cls):
+                    events.append(('after', name))
+
+                def test(self):
+                    """A test."""
+                    events.append(('test', name))
+
+            Test.__qualname__ = name
+            return Test
+
+        first, threaded, last = map(make_class, ('first', 'threaded', 'last'))
+
+        suite = unittest.TestSuite([
+            unittest.TestSuite([first('test')]),
+            ThreadedSuite([threaded('test')], 2),
+            unittest.TestSuite([last('test')]),
+        ])
+        result = unittest.TestResult()
+        suite.run(result)
+
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(events, [
+            (event, name)
+            for name in ('first', 'threaded', 'last')
+            for event in ('before', 'test', 'after')
+        ])
@@ -0,0 +1,214 @@
+"""
+Test running the features again when they change.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from aloe import testing
+from aloe.watch import MemoryParseCache, Watcher
+
+ANSWER_STEPS = """
+from aloe import step
+
+ANSWER = {0}
+
+
+@step(r'the answer is (\\d+)')
+def check_answer(self, value):
+    assert int(value) == ANSWER
+"""
+
+QUESTION_STEPS = """
+from aloe import step
+
+
+@step(r'the question is "([^"]*)"')
+def ask_question(self, question):
+    assert question.endswith('?'){0}
+"""
+
+ANSWER_FEATURE = """
+Feature: Answer
+
+    Scenario: Check the answer
+        Then the answer is 42
+"""
+
+QUESTION_FEATURE = """
+Feature: Question
+
+    Scenario: Ask the question
+        Then the question is "What do you get if you multiply six by nine?"
+"""
+
+
+class ScriptedWatcher(Watcher):
+    """
+    A watcher making the changes given by the test instead of waiting for
+    them, and recording the features run each time.
+    """
+
+    changes = ()
+    runs = None
+
+    def run_features(self, features):
+        result = super().run_features(features)
+        self.runs.append((sorted(map(os.path.relpath, features)),
+                          result.wasSuccessful()))
+        return result
+
+    def wait_for_changes(self):
+        if not self.changes:
+            raise KeyboardInterrupt()
+
+        change, self.changes = self.changes[0], self.changes[1:]
+        change()
+        return self.check_changes()
+
+
+class WatchingRunner(testing.TestNativeRunner):
+    """A runner using the scripted watcher."""
+
+    def watch(self):
+        return ScriptedWatcher(self).run()
+
+
+class WatchTest(testing.FeatureTest):
+    """
+    Test running the features again when they change.
+    """
+
+    runner_class = WatchingRunner
+
+    def setUp(self):
+        super().setUp()
+
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        self.changes = 0
+
+        self.write('features/__init__.py', '')
+        self.write('features/answer.py', ANSWER_STEPS.format(42))
+        self.write('features/question.py', QUESTION_STEPS.format(''))
+        self.write('features/answer.feature', ANSWER_FEATURE)
+        self.write('features/question.feature', QUESTION_FEATURE)
+
+        os.chdir(self.directory)
+
+        ScriptedWatcher.runs = []
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def write(self, filename, content):
+        """Write a file in the application directory."""
+
+        filename = os.path.join(self.directory, filename)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.mkdir(os.path.dirname(filename))
+
+        with open(filename, 'w') as output:
+            output.write(content)
+
+        # Make sure the change is noticed even within the timer resolution
+        self.changes += 1
+        mtime = os.stat(filename).st_mtime + self.changes
+        os.utime(filename, (mtime, mtime))
+
+    def test_watch(self):
+        """Test running the changed features again."""
+
+        ScriptedWatcher.changes = (
+            lambda: self.write('features/answer.feature',
+                               ANSWER_FEATURE + '\n'),
+            lambda: self.write('features/answer.py', ANSWER_STEPS.format(41)),
+            lambda: self.write('features/question.py',
+                               QUESTION_STEPS.format(' and False')),
+            lambda: self.write('features/answer.py', ANSWER_STEPS.format(42)),
+        )
+
+        self.run_features('--watch')
+
+        self.assertEqual(ScriptedWatcher.runs, [
+            (['features/answer.feature', 'features/question.feature'], True),
+            (['features/answer.feature'], True),
+            (['features/answer.feature'], False),
+            (['features/question.feature'], False),
+            (['features/answer.feature'], True),
+        ])
+
+    def test_incremental(self):
+        """Test the changed steps are noticed by the pass history."""
+
+        ScriptedWatcher.changes = (
+            lambda: self.write('features/answer.py', ANSWER_STEPS.format(41)),
+            lambda: self.write('features/answer.py', ANSWER_STEPS.format(42)),
+        )
+
+        self.run_features('--watch', '--incremental',
+                          '--cache-dir', os.path.join(self.directory, 'cache'))
+
+        self.assertEqual(ScriptedWatcher.runs, [
+            (['features/answer.feature', 'features/question.feature'], True),
+            (['features/answer.feature'], False),
+            (['features/answer.feature'], True),
+        ])
+
+    def test_broken_steps(self):
+        """Test waiting for the broken step definitions to be fixed."""
+
+        ScriptedWatcher.changes = (
+            lambda: self.write('features/answer.py', 'ANSWER = ('),
+            lambda: self.write('features/answer.py', ANSWER_STEPS.format(42)),
+        )
+
+        self.run_features('--watch')
+
+        self.assertEqual(ScriptedWatcher.runs, [
+            (['features/answer.feature', 'features/question.feature'], True),
+            (['features/answer.feature'], True),
+        ])
+
+
+class MemoryParseCacheTest(unittest.TestCase):
+    """
+    Test keeping the parsed documents in memory.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'test.feature')
+        self.parsed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def parse(self, content):
+        """Pretend to parse the content, remembering it."""
+        self.parsed.append(content)
+        return {'content': content}
+
+    def write(self, content, mtime):
+        """Write the feature file with the given modification time."""
+
+        with open(self.filename, 'w') as feature_file:
+            feature_file.write(content)
+        os.utime(self.filename, (mtime, mtime))
+
+    def test_parse(self):
+        """Test parsing only the changed files, keeping the latest one."""
+
+        cache = MemoryParseCache()
+
+        for content, mtime in (('one', 1000), ('one', 1000), ('two', 2000)):
+            self.write(content, mtime)
+            self.assertEqual(cache.parse(self.filename, 'en', self.parse),
+                             {'content': content})
+
+        self.assertEqual(self.parsed, ['one', 'two'])
+        self.assertEqual(len(cache.documents), 1)
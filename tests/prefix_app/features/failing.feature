@@ -0,0 +1,14 @@
+Feature: Failing prefix
+
+  Background:
+    Given I open an account
+
+  Scenario: Fail
+    Given I deposit 10
+    And the bank opens on try 2
+    Then deposit ran 1 time
+
+  Scenario: Pass
+    Given I deposit 10
+    And the bank opens on try 2
+    Then deposit ran 2 times
@@ -0,0 +1,27 @@
+Feature: Shared prefixes
+
+  Background:
+    Given I open an account
+
+  Scenario: Deposit
+    Given I deposit 10
+    Then the balance is 10 with 1 ledger entries
+    And open ran 1 time
+
+  Scenario: Withdraw
+    Given I deposit 10
+    When I withdraw 5
+    Then the balance is 5 with 2 ledger entries
+    And open ran 1 time
+    And deposit ran 1 time
+
+  Scenario Outline: Deposit more
+    Given I deposit 10
+    And I deposit <amount>
+    Then the balance is <balance> with 2 ledger entries
+    And deposit ran <deposits> times
+
+    Examples:
+      | amount | balance | deposits |
+      | 5      | 15      | 2        |
+      | 7      | 17      | 3        |
@@ -0,0 +1,15 @@
+Feature: Side effects
+
+  Background:
+    Given I open an account
+
+  Scenario: First statement
+    Given I send a statement
+    And I deposit 10
+    Then statement ran 1 time
+
+  Scenario: Second statement
+    Given I send a statement
+    And I deposit 10
+    Then statement ran 2 times
+    And open ran 1 time
@@ -0,0 +1,84 @@
+"""
+Steps counting how many times they run, with a ledger outside the world
+saved by a snapshot hook.
+"""
+
+from collections import Counter
+
+from aloe import step, world
+from aloe.snapshot import side_effect, snapshot_hook
+
+# pylint:disable=unused-argument
+
+# The number of times each kind of step ran
+CALLS = Counter()
+
+# The amounts deposited and withdrawn, kept outside of the world
+LEDGER = []
+
+
+def restore_ledger(entries):
+    """Restore the ledger entries."""
+    LEDGER[:] = entries
+
+
+@snapshot_hook(restore_ledger)
+def save_ledger():
+    """Save the ledger entries."""
+    return list(LEDGER)
+
+
+@step(r'I open an account')
+def open_account(self):
+    """Start with an empty account."""
+
+    CALLS['open'] += 1
+    world.balance = 0
+    LEDGER.clear()
+
+
+@step(r'I deposit (\d+)')
+def deposit(self, amount):
+    """Deposit an amount."""
+
+    CALLS['deposit'] += 1
+    world.balance += int(amount)
+    LEDGER.append(int(amount))
+
+
+@step(r'I withdraw (\d+)')
+def withdraw(self, amount):
+    """Withdraw an amount."""
+
+    CALLS['withdraw'] += 1
+    world.balance -= int(amount)
+    LEDGER.append(-int(amount))
+
+
+@step(r'I send a statement')
+@side_effect
+def send_statement(self):
+    """Send a statement, which can't be taken back."""
+    CALLS['statement'] += 1
+
+
+@step(r'the balance is (\d+) with (\d+) ledger entries')
+def check_balance(self, balance, entries):
+    """Check the balance and the ledger."""
+
+    assert world.balance == int(balance), world.balance
+    assert len(LEDGER) == int(entries), LEDGER
+
+
+@step(r'(\w+) ran (\d+) times?')
+def check_calls(self, name, count):
+    """Check how many times the steps ran."""
+    assert CALLS[name] == int(count), CALLS
+
+
+@step(r'the bank opens on try (\d+)')
+def bank_opens(self, attempt):
+    """Fail until tried the given number of times."""
+
+    CALLS['bank'] += 1
+    assert CALLS['bank'] >= int(attempt), "The bank is closed."
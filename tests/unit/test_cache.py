@@ -0,0 +1,165 @@
+"""
+Test caches persisted between runs.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aloe import codegen, testclass
+from aloe.cache import CodeCache, ParseCache
+from aloe.parser import Feature
+
+FEATURE = """
+Feature: Cached feature
+    Scenario: Cached scenario
+        Given I have {count} apples
+"""
+
+
+class ParseCacheTest(unittest.TestCase):
+    """
+    Test caching the parsed feature files.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.cache = ParseCache(self.cache_dir)
+        self.feature_file = os.path.join(self.directory, 'test.feature')
+
+        Feature.parse_cache = self.cache
+
+    def tearDown(self):
+        Feature.parse_cache = None
+        shutil.rmtree(self.directory)
+
+    def write_feature(self, count):
+        """Write the feature file with the given number of apples."""
+
+        with open(self.feature_file, 'w') as feature_file:
+            feature_file.write(FEATURE.format(count=count))
+
+    def parse_sentence(self):
+        """Parse the feature file and return the step sentence."""
+
+        feature = Feature.from_file(self.feature_file)
+        return feature.scenarios[0].steps[0].sentence
+
+    def cached_paths(self):
+        """The paths to all the cache entries."""
+
+        return [
+            os.path.join(self.cache.directory, name)
+            for name in os.listdir(self.cache.directory)
+        ]
+
+    def test_cache(self):
+        """Test storing and reusing the parsed documents."""
+
+        self.write_feature(3)
+        self.assertEqual(self.parse_sentence(), 'Given I have 3 apples')
+        self.assertEqual(len(self.cached_paths()), 1)
+
+        # The cached document is used without parsing
+        def fail_parse(content):
+            """Fail if the file is parsed again."""
+            raise AssertionError("The file should not be parsed.")
+
+        document = self.cache.parse(self.feature_file, None, fail_parse)
+        self.assertEqual(document['feature']['name'], 'Cached feature')
+
+        # Changing the file invalidates the entry
+        self.write_feature(5)
+        self.assertEqual(self.parse_sentence(), 'Given I have 5 apples')
+        self.assertEqual(len(self.cached_paths()), 1)
+
+        # Different languages are cached separately
+        Feature.from_file(self.feature_file, language='en')
+        self.assertEqual(len(self.cached_paths()), 2)
+
+    def test_prune(self):
+        """Test removing the stale entries."""
+
+        self.write_feature(3)
+        self.parse_sentence()
+
+        # Entries in use are kept
+        self.cache.prune()
+        self.assertEqual(len(self.cached_paths()), 1)
+
+        # Entries for changed files are removed
+        self.write_feature(10)
+        os.utime(self.feature_file, ns=(0, 0))
+        ParseCache(self.cache_dir).prune()
+        self.assertEqual(self.cached_paths(), [])
+
+        # Entries for removed files are removed
+        self.parse_sentence()
+        os.unlink(self.feature_file)
+        ParseCache(self.cache_dir).prune()
+        self.assertEqual(self.cached_paths(), [])
+
+
+@unittest.skipUnless(codegen.RELOCATABLE, "Code can't be relocated.")
+class CodeCacheTest(unittest.TestCase):
+    """
+    Test caching the code compiled for the scenarios.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.feature_file = os.path.join(self.directory, 'test.feature')
+
+        with open(self.feature_file, 'w') as feature_file:
+            feature_file.write(FEATURE.format(count=3))
+
+        self.templates = dict(codegen.TEMPLATES)
+
+    def tearDown(self):
+        codegen.TEMPLATES.clear()
+        codegen.TEMPLATES.update(self.templates)
+        shutil.rmtree(self.directory)
+
+    def compile_feature(self):
+        """Make the test class for the feature file using a new cache."""
+
+        class CachedTestCase(testclass.TestCase):
+            """A test case using the code cache."""
+            code_cache = CodeCache(self.cache_dir)
+
+        return CachedTestCase.from_file(self.feature_file)
+
+    def test_cache(self):
+        """Test storing and reusing the compiled code."""
+
+        codegen.TEMPLATES.clear()
+        self.compile_feature()
+        self.assertEqual(
+            len(os.listdir(os.path.join(self.cache_dir, 'code'))), 1)
+
+        # The stored code is used without compiling
+        codegen.TEMPLATES.clear()
+        with patch('aloe.codegen.make_function',
+                   side_effect=AssertionError("Code should not be compiled.")):
+            test = self.compile_feature()
+
+        self.assertTrue(codegen.TEMPLATES)
+        self.assertTrue(hasattr(test, 'Cached scenario'))
+
+    def test_aloe_version(self):
+        """Test the code compiled by another version of Aloe isn't used."""
+
+        with patch('aloe.cache.distribution_version', return_value='1.0'):
+            self.compile_feature()
+
+        codegen.TEMPLATES.clear()
+        with patch('aloe.cache.distribution_version', return_value='2.0'), \
+                patch('aloe.codegen.make_function',
+                      wraps=codegen.make_function) as make_function:
+            self.compile_feature()
+
+        self.assertTrue(make_function.called)
@@ -2,15 +2,26 @@
 Test code generation utilities.
 """
 
+import traceback
 import unittest
 from contextlib import contextmanager
 
 from aloe.codegen import (
+    RELOCATABLE,
+    TEMPLATES,
     make_function,
+    make_function_from_template,
     multi_manager,
+    template_name,
 )
 
 
+def failing_source(count):
+    """A function source raising an exception after the given lines."""
+
+    return 'def fail():\n' + '    pass\n' * count + '    raise error()\n'
+
+
 class TestCodegen(unittest.TestCase):
     """
     Test code generation.
@@ -40,6 +51,59 @@ class TestCodegen(unittest.TestCase):
         self.assertEqual(adder(10, 3), 23)
         self.assertEqual(adder.__name__, 'adder')
 
+    def test_templates(self):
+        """Test generating functions from templates."""
+
+        def make(value, firstlineno):
+            """Make a function returning the given value."""
+            return make_function_from_template(
+                failing_source, (2,),
+                context={'error': lambda: ValueError(value)},
+                source_file='file{0}'.format(value),
+                name='func{0}'.format(value),
+                firstlineno=firstlineno,
+            )
+
+        func1 = make(1, 10)
+        func2 = make(2, 20)
+
+        if RELOCATABLE:
+            self.assertIn((template_name(failing_source), (2,)), TEMPLATES)
+
+        for func, value, line in ((func1, 1, 13), (func2, 2, 23)):
+            self.assertEqual(func.__name__, 'func{0}'.format(value))
+
+            try:
+                func()
+            except ValueError as exc:
+                self.assertEqual(str(exc), str(value))
+                frame = traceback.extract_tb(exc.__traceback__)[-1]
+                self.assertEqual(
+                    (frame.filename, frame.lineno, frame.name),
+                    ('file{0}'.format(value), line, 'func{0}'.format(value)),
+                )
+            else:
+                raise AssertionError("The function did not raise.")
+
+    def test_template_name(self):
+        """Test the template names change with the source function."""
+
+        def make_source():
+            """Make a function returning 1."""
+            return 'def func(): return 1'
+
+        def changed_source():
+            """Make a function returning 2."""
+            return 'def func(): return 2'
+
+        changed_source.__qualname__ = make_source.__qualname__
+
+        name = template_name(make_source)
+        self.assertTrue(name.startswith(
+            '{0}.{1}:'.format(__name__, make_source.__qualname__)))
+        self.assertEqual(template_name(make_source), name)
+        self.assertNotEqual(template_name(changed_source), name)
+
 
 class TestMultiManager(unittest.TestCase):
     """
@@ -0,0 +1,145 @@
+"""
+Test running coroutines on the event loop.
+"""
+
+import asyncio
+import threading
+import unittest
+
+from aloe.eventloop import (
+    close_event_loops,
+    get_event_loop,
+    run_coroutine,
+    sync_function,
+    sync_manager,
+)
+
+
+class EventLoopTest(unittest.TestCase):
+    """
+    Test the event loops running the coroutines.
+    """
+
+    def tearDown(self):
+        close_event_loops()
+
+    def test_loop_kept(self):
+        """Test the loop is kept between the coroutines."""
+
+        async def running_loop():
+            """The running event loop."""
+            return asyncio.get_event_loop()
+
+        loop = run_coroutine(running_loop())
+        self.assertIs(run_coroutine(running_loop()), loop)
+
+        # The tasks started by a coroutine keep running on the loop
+        event = asyncio.Event()
+
+        async def start_task():
+            """Start a task setting the event."""
+            asyncio.get_event_loop().call_soon(event.set)
+
+        run_coroutine(start_task())
+        run_coroutine(event.wait())
+
+        close_event_loops()
+        self.assertTrue(loop.is_closed())
+
+        # A new loop is created for the later coroutines
+        self.assertIsNot(run_coroutine(running_loop()), loop)
+
+    def test_threads(self):
+        """Test each thread has its own loop."""
+
+        loops = []
+
+        thread = threading.Thread(
+            target=lambda: loops.append(get_event_loop()))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(loops[0], get_event_loop())
+
+        close_event_loops()
+        self.assertTrue(loops[0].is_closed())
+
+    def test_pending_tasks(self):
+        """Test cancelling the tasks still running when closing the loops."""
+
+        cancelled = []
+
+        async def wait_forever():
+            """Wait until cancelled."""
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def start_task():
+            """Start the waiting task."""
+            asyncio.ensure_future(wait_forever())
+            await asyncio.sleep(0)
+
+        run_coroutine(start_task())
+        close_event_loops()
+
+        self.assertEqual(cancelled, [True])
+
+    def test_sync_function(self):
+        """Test running coroutine functions as regular ones."""
+
+        async def add(first, second):
+            """Add the numbers asynchronously."""
+            await asyncio.sleep(0)
+            return first + second
+
+        self.assertEqual(sync_function(add)(1, second=2), 3)
+
+        # Regular functions are not changed
+        self.assertIs(sync_function(len), len)
+
+    def test_sync_manager(self):
+        """Test using asynchronous context managers as regular ones."""
+
+        sequence = []
+
+        class Manager(object):
+            """An asynchronous context manager."""
+
+            def __init__(self, name, suppress):
+                self.name = name
+                self.suppress = suppress
+
+            async def __aenter__(self):
+                sequence.append('enter')
+                return self.name
+
+            async def __aexit__(self, exc_type, exc_value, traceback):
+                if exc_type is None:
+                    sequence.append('exit')
+                elif issubclass(exc_type, ValueError):
+                    sequence.append('error')
+                    return self.suppress
+                return False
+
+        def manager(name, suppress=False):
+            """Make an asynchronous context manager."""
+            return Manager(name, suppress)
+
+        with sync_manager(manager)('value') as value:
+            self.assertEqual(value, 'value')
+
+        with self.assertRaises(ValueError):
+            with sync_manager(manager)('value'):
+                raise ValueError()
+
+        with sync_manager(manager)('value', suppress=True):
+            raise ValueError()
+
+        self.assertEqual(sequence, [
+            'enter', 'exit',
+            'enter', 'error',
+            'enter', 'error',
+        ])
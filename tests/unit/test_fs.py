@@ -2,9 +2,20 @@
 Test filesystem-related functions.
 """
 
+import os
+import shutil
+import tempfile
 import unittest
+from unittest.mock import patch
 
-from aloe.fs import path_to_module_name
+from aloe.cache import FeatureManifest
+from aloe.fs import (
+    DirectorySet,
+    FeatureLoader,
+    discovery_config,
+    path_to_module_name,
+    selected_feature_directories,
+)
 
 
 class PathToModuleNameTest(unittest.TestCase):
@@ -24,3 +35,174 @@ class PathToModuleNameTest(unittest.TestCase):
             'one.two',
             path_to_module_name('one/two/__init__.py')
         )
+
+
+class FindFeatureDirectoriesTest(unittest.TestCase):
+    """
+    Test finding the feature directories.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        for path in (
+                'features',
+                'app/__init__.py',
+                'app/features',
+                'app/sub/__init__.py',
+                'app/sub/features',
+                'app/node_modules/__init__.py',
+                'app/node_modules/features',
+                'notpackage/features',
+        ):
+            path = os.path.join(self.directory, path)
+            if path.endswith('.py'):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, 'w').close()
+            else:
+                os.makedirs(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def find(self, *exclude):
+        """The feature directories found, relative to the root."""
+
+        return sorted(
+            os.path.relpath(feature_dir, self.directory)
+            for feature_dir in FeatureLoader.find_feature_directories(
+                self.directory, exclude)
+        )
+
+    def test_find(self):
+        """Test finding the feature directories in the packages."""
+
+        self.assertEqual(self.find(), [
+            'app/features',
+            'app/node_modules/features',
+            'app/sub/features',
+            'features',
+        ])
+
+    def test_exclude(self):
+        """Test excluding directories by name or path."""
+
+        self.assertEqual(self.find('node_modules'), [
+            'app/features',
+            'app/sub/features',
+            'features',
+        ])
+
+        self.assertEqual(self.find('app/s*'), [
+            'app/features',
+            'app/node_modules/features',
+            'features',
+        ])
+
+    def test_selected(self):
+        """Test selecting the feature directories of the named features."""
+
+        feature_dirs = list(FeatureLoader.find_feature_directories(
+            self.directory))
+
+        def selected(*names):
+            """The selected feature directories, relative to the root."""
+
+            return sorted(
+                os.path.relpath(feature_dir, self.directory)
+                for feature_dir in selected_feature_directories(
+                    feature_dirs,
+                    [os.path.join(self.directory, name) for name in names])
+            )
+
+        feature = os.path.join(self.directory, 'app/features/a.feature')
+        open(feature, 'w').close()
+
+        self.assertEqual(selected('app/features/a.feature'),
+                         ['app/features'])
+        self.assertEqual(selected('app/features/a.feature:1'),
+                         ['app/features'])
+        self.assertEqual(selected('app/sub', 'features'),
+                         ['app/sub/features', 'features'])
+        self.assertEqual(len(selected('')), 4)
+        self.assertEqual(len(selected('app/features/missing.feature')), 4)
+
+    def test_manifest(self):
+        """Test remembering the feature directories."""
+
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+
+        manifest = FeatureManifest(cache_dir)
+        found = manifest.feature_directories(self.directory)
+        self.assertEqual(len(found), 4)
+
+        # The directories aren't searched again while they don't change
+        with patch.object(FeatureLoader, 'find_feature_directories') \
+                as find:
+            self.assertEqual(
+                FeatureManifest(cache_dir).feature_directories(
+                    self.directory),
+                found)
+            find.assert_not_called()
+
+        # A new package is found
+        package = os.path.join(self.directory, 'notpackage', '__init__.py')
+        open(package, 'w').close()
+        self.assertEqual(
+            len(FeatureManifest(cache_dir).feature_directories(
+                self.directory)),
+            5)
+
+        # Different exclude globs need searching again
+        self.assertEqual(
+            len(FeatureManifest(cache_dir).feature_directories(
+                self.directory, ['app'])),
+            2)
+
+
+class DiscoveryConfigTest(unittest.TestCase):
+    """
+    Test reading the discovery configuration.
+    """
+
+    def test_config(self):
+        """Test reading the roots and exclude globs from setup.cfg."""
+
+        with tempfile.NamedTemporaryFile('w', suffix='.cfg') as config:
+            config.write(
+                "[aloe]\n"
+                "feature_roots =\n"
+                "    services\n"
+                "    apps\n"
+                "exclude = node_modules, build\n"
+            )
+            config.flush()
+
+            self.assertEqual(discovery_config(config.name), (
+                ['services', 'apps'],
+                ['node_modules', 'build'],
+            ))
+
+        self.assertEqual(discovery_config('nonexistent.cfg'), ([], []))
+
+
+class DirectorySetTest(unittest.TestCase):
+    """
+    Test the set of directories.
+    """
+
+    def test_directory_set(self):
+        """Test checking the paths against the directories."""
+
+        directories = DirectorySet(['app/features', 'other/features'])
+
+        self.assertIn('app/features', directories)
+        self.assertIn('app/features/sub', directories)
+        self.assertNotIn('app', directories)
+        self.assertNotIn('app/features2', directories)
+
+        self.assertTrue(directories.leads_to('app'))
+        self.assertTrue(directories.leads_to('.'))
+        self.assertFalse(directories.leads_to('app/features'))
+        self.assertFalse(directories.leads_to('app/feat'))
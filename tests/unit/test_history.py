@@ -0,0 +1,333 @@
+"""
+Test the history of the previous runs.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aloe.history import DurationHistory, FailureHistory, PassHistory
+
+FEATURES = [
+    'features/a.feature',
+    'features/b.feature',
+    'features/c.feature',
+    'features/d.feature',
+]
+
+
+class DurationHistoryTest(unittest.TestCase):
+    """
+    Test recording the scenario durations and balancing the features.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.history = DurationHistory(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self):
+        """Record the durations of some of the features."""
+
+        self.history.record({
+            ('features/a.feature', 'Quick'): 1.0,
+            ('features/b.feature', 'Slow'): 6.0,
+            ('features/b.feature', 'Outline: Example 1'): 2.0,
+            ('features/c.feature', 'Average'): 3.0,
+        })
+
+    def test_save(self):
+        """Test saving and reading the history."""
+
+        self.record()
+        self.history.save()
+
+        history = DurationHistory(self.directory)
+        self.assertEqual(history.durations, self.history.durations)
+        self.assertEqual(history.durations['features/b.feature'], {
+            'Slow': 6.0,
+            'Outline: Example 1': 2.0,
+        })
+
+        # The new durations replace the old ones
+        history.record({('features/a.feature', 'Quick'): 2.0})
+        self.assertEqual(history.durations['features/a.feature'],
+                         {'Quick': 2.0})
+
+    def test_corrupted(self):
+        """Test ignoring a corrupted history file."""
+
+        with open(os.path.join(self.directory, 'durations.json'), 'w') \
+                as history_file:
+            history_file.write('{')
+
+        self.assertEqual(DurationHistory(self.directory).durations, {})
+
+    def test_costs(self):
+        """Test the expected durations of the features."""
+
+        self.record()
+
+        self.assertEqual(self.history.feature_costs(FEATURES), {
+            'features/a.feature': 1.0,
+            'features/b.feature': 8.0,
+            'features/c.feature': 3.0,
+            # Features not run before take the average time
+            'features/d.feature': 4.0,
+        })
+
+        self.assertEqual(self.history.longest_first(FEATURES), [
+            'features/b.feature',
+            'features/d.feature',
+            'features/c.feature',
+            'features/a.feature',
+        ])
+
+    def test_no_history(self):
+        """Test balancing the features without any history."""
+
+        self.assertEqual(self.history.longest_first(FEATURES), FEATURES)
+
+        shards = [self.history.shard(FEATURES, index, 2)
+                  for index in (1, 2)]
+        self.assertEqual(shards, [
+            ['features/a.feature', 'features/c.feature'],
+            ['features/b.feature', 'features/d.feature'],
+        ])
+
+    def test_shard(self):
+        """Test balancing the features between the shards."""
+
+        self.record()
+
+        shards = [self.history.shard(FEATURES, index, 2)
+                  for index in (1, 2)]
+        self.assertEqual(shards, [
+            ['features/b.feature'],
+            ['features/a.feature', 'features/c.feature',
+             'features/d.feature'],
+        ])
+
+        # More shards than features
+        shards = [self.history.shard(FEATURES, index, 5)
+                  for index in range(1, 6)]
+        self.assertEqual(sorted(sum(shards, [])), FEATURES)
+        self.assertEqual(shards[4], [])
+
+
+class FailureHistoryTest(unittest.TestCase):
+    """
+    Test recording the failed scenarios.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.history = FailureHistory(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_record(self):
+        """Test recording the failures until the scenarios pass."""
+
+        self.assertFalse(self.history)
+
+        self.history.record({
+            ('features/a.feature', 1, None): True,
+            ('features/a.feature', 2, 1): False,
+            ('features/a.feature', 2, 2): True,
+            ('features/b.feature', 1, None): False,
+        })
+        self.history.save()
+
+        history = FailureHistory(self.directory)
+        self.assertTrue(history)
+        self.assertTrue(history.feature_failed('features/a.feature'))
+        self.assertFalse(history.scenario_failed('features/a.feature', 1))
+        self.assertTrue(history.scenario_failed('features/a.feature', 2, 1))
+        self.assertFalse(history.scenario_failed('features/a.feature', 2, 2))
+        self.assertTrue(history.scenario_failed('features/b.feature', 1))
+        self.assertFalse(history.feature_failed('features/c.feature'))
+
+        # Only the scenarios that ran are updated
+        history.record({
+            ('features/b.feature', 1, None): True,
+        })
+        history.save()
+
+        history = FailureHistory(self.directory)
+        self.assertTrue(history.scenario_failed('features/a.feature', 2, 1))
+        self.assertFalse(history.feature_failed('features/b.feature'))
+
+        self.assertEqual(
+            history.failed_first(FEATURES[::-1]),
+            [
+                'features/a.feature',
+                'features/d.feature',
+                'features/c.feature',
+                'features/b.feature',
+            ]
+        )
+
+    def test_batched_outline(self):
+        """Test the failures of the outlines run as a batch."""
+
+        self.history.record({
+            ('features/a.feature', 1, 1): False,
+            ('features/a.feature', 2, None): False,
+        })
+
+        # A failed batch selects all its examples
+        self.assertTrue(self.history.scenario_failed(
+            'features/a.feature', 2, 1))
+        self.assertTrue(self.history.scenario_failed(
+            'features/a.feature', 2, 2))
+        self.assertFalse(self.history.scenario_failed(
+            'features/a.feature', 1, 2))
+
+        # A passing batch passes all its examples
+        self.history.record({
+            ('features/a.feature', 1, None): True,
+        })
+        self.assertFalse(self.history.scenario_failed(
+            'features/a.feature', 1, 1))
+        self.assertTrue(self.history.scenario_failed(
+            'features/a.feature', 2, 1))
+
+        # The examples run one by one replace the failed batch
+        self.history.record({
+            ('features/a.feature', 2, 1): True,
+            ('features/a.feature', 2, 2): False,
+        })
+        self.assertFalse(self.history.scenario_failed(
+            'features/a.feature', 2, 1))
+        self.assertTrue(self.history.scenario_failed(
+            'features/a.feature', 2, 2))
+
+        self.history.record({
+            ('features/a.feature', 2, 2): True,
+        })
+        self.assertFalse(self.history)
+
+    def test_unchanged(self):
+        """Test the file isn't written without failures."""
+
+        self.history.record({
+            ('features/a.feature', 1, None): True,
+        })
+        self.history.save()
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class FakeTest(object):
+    """A test of a scenario, with the scenario ID and digest given."""
+
+    _testMethodName = 'run_scenario'
+
+    def __init__(self, identity, digest):
+        self.scenario_id = identity
+        self.digest = digest
+
+    def __str__(self):
+        return 'Scenario {0}'.format(self.scenario_id[1])
+
+
+class FakePassHistory(PassHistory):
+    """A pass history taking the digests from the fake tests."""
+
+    def digest(self, test):
+        return test.digest
+
+
+class PassHistoryTest(unittest.TestCase):
+    """
+    Test recording the passed scenarios.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.history = FakePassHistory(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_record(self):
+        """Test recording the passes until the scenarios fail."""
+
+        first = FakeTest(('features/a.feature', 1, None), 'one')
+        second = FakeTest(('features/a.feature', 2, 1), 'two')
+
+        self.history.record(first, True)
+        self.history.record(second, True)
+        self.history.save()
+
+        history = FakePassHistory(self.directory)
+        self.assertTrue(history.unchanged(first))
+        self.assertTrue(history.unchanged(second))
+        self.assertFalse(history.unchanged(
+            FakeTest(('features/a.feature', 2, 2), 'two')))
+
+        # The scenario changed
+        self.assertFalse(history.unchanged(
+            FakeTest(('features/a.feature', 1, None), 'changed')))
+
+        history.record(second, False)
+        history.save()
+
+        history = FakePassHistory(self.directory)
+        self.assertTrue(history.unchanged(first))
+        self.assertFalse(history.unchanged(second))
+
+        history.clear()
+        self.assertFalse(history.unchanged(first))
+        self.assertFalse(FakePassHistory(self.directory).unchanged(first))
+
+    def test_close(self):
+        """Test the database connections are closed."""
+
+        connections = []
+        connect = PassHistory.connect
+
+        def tracking_connect(history):
+            """Open the database, remembering the connection."""
+            connection = connect(history)
+            connections.append(connection)
+            return connection
+
+        with patch.object(PassHistory, 'connect', tracking_connect):
+            history = FakePassHistory(self.directory)
+            history.record(FakeTest(('features/a.feature', 1, None), 'one'),
+                           True)
+            history.save()
+
+        self.assertEqual(len(connections), 2)
+        for connection in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                connection.execute('SELECT 1')
+
+    def test_source_digest(self):
+        """Test the digest of the source of the functions."""
+
+        module = os.path.join(self.directory, 'passmodule.py')
+        with open(module, 'w') as module_file:
+            module_file.write('def func():\n    pass\n')
+
+        namespace = {}
+        with open(module) as module_file:
+            # pylint:disable=exec-used
+            exec(compile(module_file.read(), module, 'exec'), namespace)
+
+        digest = PassHistory(self.directory).source_digest(namespace['func'])
+
+        with open(module, 'a') as module_file:
+            module_file.write('\n\ndef helper():\n    pass\n')
+
+        self.assertNotEqual(
+            PassHistory(self.directory).source_digest(namespace['func']),
+            digest)
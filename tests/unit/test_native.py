@@ -0,0 +1,156 @@
+"""
+Test the native runner helpers.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import aloe
+from aloe.native import NativeRunner, attributes_match, parse_attributes
+
+
+class AttributesTest(unittest.TestCase):
+    """
+    Test selecting the tests by attributes.
+    """
+
+    def test_parse_attributes(self):
+        """Test parsing the attribute options."""
+
+        self.assertEqual(parse_attributes(['one,!two', 'three=3']), [
+            [('one', True), ('two', False)],
+            [('three', '3')],
+        ])
+
+    def test_attributes_match(self):
+        """Test matching the methods and classes against the attributes."""
+
+        def method():
+            """A test method."""
+
+        method.one = True
+        method.three = 3
+
+        class Feature(object):
+            """A test class."""
+            two = True
+
+        def matches(*values):
+            """Whether the method matches the given options."""
+            return attributes_match(parse_attributes(values), method, Feature)
+
+        self.assertTrue(matches())
+        self.assertTrue(matches('one'))
+        self.assertTrue(matches('two'))
+        self.assertTrue(matches('three=3'))
+        self.assertFalse(matches('one,!two'))
+        self.assertTrue(matches('one,!two', '!four'))
+        self.assertFalse(matches('four'))
+
+
+class FindFeaturesTest(unittest.TestCase):
+    """
+    Test finding the feature files to run.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        for path in (
+                'app/__init__.py',
+                'app/features/a.feature',
+                'app/node_modules/__init__.py',
+                'app/node_modules/features/b.feature',
+                'notpackage/features/c.feature',
+                'other/features/d.feature',
+        ):
+            path = os.path.join(self.directory, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def find(self, *args, cwd=''):
+        """
+        The feature files found from the given directory, relative to the
+        temporary one.
+        """
+
+        previous = os.getcwd()
+        os.chdir(os.path.join(self.directory, cwd))
+        try:
+            runner = NativeRunner.__new__(NativeRunner)
+            runner.options = runner.make_parser({}).parse_args(
+                ['--no-manifest'] + list(args))
+            runner.feature_lines = {}
+            runner.configure()
+            runner.find_feature_directories()
+
+            return [
+                os.path.relpath(filename, self.directory).replace(os.sep, '/')
+                for filename in runner.feature_files()
+            ]
+        finally:
+            os.chdir(previous)
+
+    def test_all(self):
+        """Test finding the features in all the feature directories."""
+
+        self.assertEqual(self.find('--exclude-dir', 'node_modules'),
+                         ['app/features/a.feature'])
+        self.assertEqual(self.find(), [
+            'app/features/a.feature',
+            'app/node_modules/features/b.feature',
+        ])
+
+    def test_directory(self):
+        """Test only looking into the feature directories under a name."""
+
+        self.assertEqual(self.find('--exclude-dir', 'node_modules', 'app'),
+                         ['app/features/a.feature'])
+        self.assertEqual(self.find('--exclude-dir', 'node_modules', '.'),
+                         ['app/features/a.feature'])
+        self.assertEqual(self.find('app/node_modules'), [
+            'app/node_modules/features/b.feature',
+        ])
+
+        # The excluded directories are not looked into
+        walk = os.walk
+        walked = set()
+
+        def record_walk(top, *args, **kwargs):
+            """Record the directories walked through."""
+            for entry in walk(top, *args, **kwargs):
+                walked.add(os.path.relpath(entry[0], self.directory)
+                           .replace(os.sep, '/'))
+                yield entry
+
+        with patch('os.walk', record_walk):
+            self.find('--exclude-dir', 'node_modules', '.')
+
+        self.assertEqual(walked, {'.', 'app', 'app/features'})
+
+    def test_feature_root(self):
+        """Test finding the features under the given roots only."""
+
+        self.assertEqual(self.find('--feature-root', 'other'),
+                         ['other/features/d.feature'])
+        self.assertEqual(self.find('--feature-root', '../other', cwd='app'),
+                         ['other/features/d.feature'])
+
+
+class ExportsTest(unittest.TestCase):
+    """
+    Test the runners exported by the main module.
+    """
+
+    def test_runner(self):
+        """Test the Nose runner is still available from the main module."""
+
+        from aloe.runner import Runner
+
+        self.assertIs(aloe.Runner, Runner)
@@ -3,9 +3,10 @@
 Test Gherkin parser.
 """
 
+from gherkin.errors import ParserError
 from nose.tools import assert_equal, assert_raises
 
-from aloe.parser import Feature, Scenario, Background
+from aloe.parser import Feature, ParserPool, Scenario, Background
 from aloe.exceptions import AloeSyntaxError
 from aloe.testing import named_temporary_file
 
@@ -917,3 +918,35 @@ def test_feature_first_scenario_tags_extraction():
 
     assert feature.scenarios[0].tags == \
         ('onetag', 'another', '$%^&even-weird_chars')
+
+
+def test_parser_reuse():
+    """Parsers are reused, including after a syntax error."""
+
+    pool = ParserPool()
+
+    with pool.parser('en') as parse:
+        with assert_raises(ParserError):
+            parse("PARSE ERROR")
+
+    with pool.parser('en') as parse:
+        document = parse(FEATURE2)
+
+    assert_equal(document['feature']['name'], 'Division')
+    assert_equal(len(pool.free['en']), 1)
+
+    # Nested use gets a separate parser
+    with pool.parser('en'), pool.parser('en'):
+        pass
+
+    assert_equal(len(pool.free['en']), 2)
+
+
+def test_feature_dialect():
+    """The feature dialect is only looked up once."""
+
+    feature = Feature.from_string(FEATURE2)
+
+    assert feature.dialect is feature.dialect
+    assert_equal(feature.scenarios[0].steps[0].step_keyword('then'),
+                 'Then ')
@@ -3,6 +3,9 @@
 Test step and callback registry.
 """
 
+import asyncio
+import sys
+import threading
 import unittest
 
 from nose.tools import (
@@ -15,6 +18,7 @@ from aloe.registry import (
     CallbackDict,
     PriorityClass,
     StepDict,
+    required_words,
 )
 from aloe.exceptions import (
     StepLoadingError,
@@ -267,6 +271,265 @@ def test_unload_reload():
     assert_matches(steps, "My step 1", (step, ('1',), {}))
 
 
+def test_unload_module():
+    """
+    Test unloading the steps defined in a module.
+    """
+
+    def step():  # pylint:disable=missing-docstring
+        pass
+
+    def other_step():  # pylint:disable=missing-docstring
+        pass
+
+    other_step.__module__ = 'other_steps'
+
+    steps = StepDict()
+    steps.step(r'My step (\d)')(step)
+    steps.step(r'Other step (\d)')(other_step)
+
+    assert steps.unload_module('other_steps')
+    assert not steps.unload_module('other_steps')
+
+    assert_matches(steps, "My step 1", (step, ('1',), {}))
+    assert_no_match(steps, "Other step 1")
+
+
+def test_fallback():
+    """
+    Test loading more steps for the sentences nothing matches.
+    """
+
+    def step():  # pylint:disable=missing-docstring
+        pass
+
+    sentences = []
+
+    def fallback(sentence):
+        """Load the step the first time."""
+
+        sentences.append(sentence)
+        if len(sentences) > 1:
+            return False
+
+        steps.step(r'My step (\d)')(step)
+        return True
+
+    steps = StepDict()
+    steps.fallback = fallback
+
+    assert_matches(steps, "My step 1", (step, ('1',), {}))
+    assert_no_match(steps, "Other step 1")
+    assert_equal(sentences, ["My step 1", "Other step 1"])
+
+    steps.clear()
+    assert steps.fallback is None
+
+
+def test_required_words():
+    """
+    Test finding the words a step sentence must contain.
+    """
+
+    assert_equal(required_words(r'I am logged in as (\w+)'),
+                 {'am', 'logged', 'in', 'as'})
+    # Words at the edges of the literals can be parts of longer ones
+    assert_equal(required_words(r'I have (\d+) apples'), {'have'})
+    # Optional characters are not required
+    assert_equal(required_words(r'the colou?r is red'), {'is'})
+    assert_equal(required_words(r'I buy (\d+) items? now'), {'buy'})
+    assert_equal(required_words(r'I see x{1,2} more things'),
+                 {'see', 'more'})
+    # Groups and classes are skipped
+    assert_equal(required_words(r'(a|b) big [a-z ] dog is here'),
+                 {'big', 'dog', 'is'})
+    # Nothing can be said about top level alternatives or inline flags
+    assert_equal(required_words(r'I see a cat|I see a dog'), set())
+    assert_equal(required_words(r'(?x) I see a dog'), set())
+
+
+def test_index_keeps_order():
+    """
+    Test that the indexed matching keeps the registration order.
+    """
+
+    def func1():
+        """First function to register as a step."""
+        pass
+
+    def func2():
+        """Second function to register as a step."""
+        pass
+
+    def func3():
+        """Third function to register as a step."""
+        pass
+
+    steps = StepDict()
+    steps.load(r'I (\w+) a thing', func1)
+    steps.load(r'I buy a thing', func2)
+    steps.load(r'buy', func3)
+
+    assert_matches(steps, "Given I buy a thing", (func1, ('buy',), {}))
+    assert_matches(steps, "When I buy things", (func3, (), {}))
+
+    # Replacing a step keeps its position
+    steps.load(r'I (\w+) a thing', func3)
+    assert_matches(steps, "Given I buy a thing", (func3, ('buy',), {}))
+
+    # Unloading and reloading moves it to the end
+    steps.unload(r'I (\w+) a thing')
+    assert_matches(steps, "Given I buy a thing", (func2, (), {}))
+    steps.load(r'I (\w+) a thing', func1)
+    assert_matches(steps, "Given I buy a thing", (func2, (), {}))
+
+    steps.unload_func(func2)
+    assert_matches(steps, "Given I buy a thing", (func3, (), {}))
+
+    steps.clear()
+    assert_no_match(steps, "Given I buy a thing")
+
+
+def test_index_case_insensitive():
+    """
+    Test that the indexed matching ignores case like regular expressions.
+    """
+
+    def func():  # pylint:disable=missing-docstring
+        pass
+
+    steps = StepDict()
+    steps.load(r'I see the sign in button', func)
+
+    assert_matches(steps, "Then I SEE THE SIGN IN BUTTON", (func, (), {}))
+    # Characters matching ASCII letters regardless of case
+    assert_matches(steps, "Then I \u017fee the S\u0131GN IN button",
+                   (func, (), {}))
+    assert_no_match(steps, "Then I see the sig button")
+
+
+def test_match_cache():
+    """
+    Test remembering the matched sentences.
+    """
+
+    def func1():
+        """First function to register as a step."""
+        pass
+
+    def func2():
+        """Second function to register as a step."""
+        pass
+
+    steps = StepDict()
+    steps.load(r'I have (?P<count>\d+) apples', func1)
+    version = steps.version
+
+    assert_matches(steps, "Given I have 3 apples",
+                   (func1, (), {'count': '3'}))
+    assert_matches(steps, "Given I have 3 apples",
+                   (func1, (), {'count': '3'}))
+    assert_equal(steps.cache_info().hits, 1)
+    assert_equal(steps.cache_info().misses, 1)
+    assert_equal(steps.cache_info().currsize, 1)
+
+    # Changing the returned arguments doesn't affect the cached ones
+    steps.match_step(FakeStep("Given I have 3 apples"))[2].clear()
+    assert_matches(steps, "Given I have 3 apples",
+                   (func1, (), {'count': '3'}))
+
+    # Changing the registry invalidates the cache
+    steps.load(r'I have (\d+) apples', func2)
+    steps.unload(r'I have (?P<count>\d+) apples')
+    assert steps.version > version
+    assert_equal(steps.cache_info().currsize, 0)
+    assert_matches(steps, "Given I have 3 apples", (func2, ('3',), {}))
+
+    func2.unregister()  # pylint:disable=no-member
+    assert_no_match(steps, "Given I have 3 apples")
+
+    # The cache is bounded
+    steps.match_cache_size = 2
+    for count in range(5):
+        assert_no_match(steps, "Given I have {0} apples".format(count))
+    assert_equal(steps.cache_info().currsize, 2)
+
+
+def test_match_cache_changed():
+    """
+    Test not remembering the sentences matched while the steps change.
+    """
+
+    def func1():
+        """First function to register as a step."""
+        pass
+
+    def func2():
+        """Second function to register as a step."""
+        pass
+
+    # pylint:disable=protected-access
+    steps = StepDict()
+    steps.load(r'I have (\d+) apples', func1)
+
+    match_sentence = steps._match_sentence
+
+    def register_while_matching(sentence):
+        """Register another step during the match, as another thread."""
+        result = match_sentence(sentence)
+        steps.unload(r'I have (\d+) apples')
+        steps.load(r'I have (\d+) apples', func2)
+        return result
+
+    steps._match_sentence = register_while_matching
+    assert_matches(steps, "Given I have 3 apples", (func1, ('3',), {}))
+    assert_equal(steps.cache_info().currsize, 0)
+
+    steps._match_sentence = match_sentence
+    assert_matches(steps, "Given I have 3 apples", (func2, ('3',), {}))
+
+
+def test_match_while_changing():
+    """
+    Test matching the sentences in threads while the steps change.
+    """
+
+    def func():
+        """A function to register as a step."""
+        pass
+
+    steps = StepDict()
+    steps.load(r'I have (\d+) apples', func)
+
+    errors = []
+
+    def match():
+        """Match the sentences, remembering the errors."""
+        try:
+            for count in range(2000):
+                steps.match_step(FakeStep("I have {} apples".format(count)))
+        except Exception as exc:  # pylint:disable=broad-except
+            errors.append(exc)
+
+    # Switch the threads often to interleave the matching and the changes
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=match) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        for count in range(500):
+            steps.load(r'I have {} pears'.format(count), func)
+
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert_equal(errors, [])
+
+
 class CallbackDictTest(unittest.TestCase):
     """
     Test callback dictionary.
@@ -337,6 +600,104 @@ class CallbackDictTest(unittest.TestCase):
             ('after', 'after_arg1', 'after_arg2'),
         ])
 
+    def test_before_after_threads(self):
+        """
+        Test before_after in different threads at the same time.
+        """
+
+        sequence = []
+
+        self.around.all(before_after(
+            appender(sequence, 'around_before'),
+            appender(sequence, 'around_after')
+        ))
+
+        before, after = self.callbacks.before_after('all')
+
+        before('main')
+
+        thread = threading.Thread(target=lambda: (before('thread'),
+                                                  after('thread')))
+        thread.start()
+        thread.join()
+
+        after('main')
+
+        self.assertEqual(sequence, [
+            ('around_before', 'main'),
+            ('around_before', 'thread'),
+            ('around_after', 'thread'),
+            ('around_after', 'main'),
+        ])
+
+    def test_wrap_async(self):
+        """
+        Test wrapping coroutine functions with asynchronous hooks.
+        """
+
+        sequence = []
+        loops = set()
+
+        def async_appender(*args):
+            """An async function appending to the sequence."""
+
+            async def append(*append_args):
+                """Append the arguments, noting the event loop used."""
+                loops.add(asyncio.get_event_loop())
+                await asyncio.sleep(0)
+                sequence.append(args + append_args)
+
+            return append
+
+        class AroundHook(object):
+            """An asynchronous context manager."""
+
+            def __init__(self, *args):
+                self.args = args
+
+            async def __aenter__(self):
+                await async_appender('around_before')(*self.args)
+
+            async def __aexit__(self, exc_type, exc_value, traceback):
+                await async_appender('around_after')(*self.args)
+
+        def around_hook(*args):
+            """Make an asynchronous context manager."""
+            return AroundHook(*args)
+
+        self.before.all(async_appender('before'))
+        self.around.all(around_hook)
+        self.after.all(async_appender('after'))
+
+        wrap = self.callbacks.wrap('all', async_appender('wrapped'),
+                                   'hook_arg')
+
+        wrap('wrap_arg')
+        wrap('wrap_arg')
+
+        self.assertEqual(sequence, [
+            ('before', 'hook_arg'),
+            ('around_before', 'hook_arg'),
+            ('wrapped', 'wrap_arg'),
+            ('around_after', 'hook_arg'),
+            ('after', 'hook_arg'),
+        ] * 2)
+
+        # The same event loop is used for all the calls
+        self.assertEqual(len(loops), 1)
+
+        before, after = self.callbacks.before_after('all')
+        before('before_arg')
+        after('after_arg')
+
+        self.assertEqual(sequence[10:], [
+            ('before', 'before_arg'),
+            ('around_before', 'before_arg'),
+            ('around_after', 'before_arg'),
+            ('after', 'after_arg'),
+        ])
+        self.assertEqual(len(loops), 1)
+
     @staticmethod
     def before_after_hook(sequence, when):
         """A before/after hook appending to a sequence."""
@@ -428,6 +789,26 @@ class CallbackDictTest(unittest.TestCase):
             'afterZ1',
         ])
 
+    def test_unload_module(self):
+        """
+        Test unloading the callbacks defined in a module.
+        """
+
+        sequence = []
+
+        hook = appender(sequence, 'hook')
+        other_hook = appender(sequence, 'other_hook')
+        other_hook.__module__ = 'other_steps'
+
+        self.before.each_step(hook)
+        self.after.each_step(other_hook)
+
+        self.assertTrue(self.callbacks.unload_module('other_steps'))
+        self.assertFalse(self.callbacks.unload_module('other_steps'))
+
+        self.callbacks.wrap('step', appender(sequence, 'step'))()
+        self.assertEqual(sequence, [('hook',), ('step',)])
+
     def test_clear(self):
         """
         Test clearing the registry.
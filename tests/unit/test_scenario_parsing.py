@@ -65,6 +65,21 @@ Examples:
     | outline value |
 '''
 
+OUTLINED_SCENARIO_WITH_SPECIAL_KEYS = '''
+Scenario Outline: Fill in the values
+    Given the <a.b> and <x+y> and <unknown> values
+    And the table:
+        | Name |
+        | <x+y> |
+    And the unchanged table:
+        | Name |
+        | a.b |
+
+Examples:
+    | a.b | x+y |
+    | one | <a.b> |
+'''
+
 OUTLINED_FEATURE = """
     Feature: Do many things at once
         In order to automate tests
@@ -394,6 +409,26 @@ def test_scenario_multilines_are_solved_against_outlines():
     assert_equal(step.multiline, expected_multiline)
 
 
+def test_scenario_outline_templates():
+    """
+    Outline values are filled in once, and the steps without variables keep
+    their text
+    """
+
+    scenario = parse_scenario(OUTLINED_SCENARIO_WITH_SPECIAL_KEYS)
+    sentence, table, unchanged = scenario.evaluate(scenario.outlines[0])
+
+    # The unknown variables and the variables in the values are kept
+    assert_equal(sentence.sentence,
+                 'Given the one and <a.b> and <unknown> values')
+    assert_equal(table.table, (('Name',), ('<a.b>',)))
+
+    assert_equal(unchanged.sentence, scenario.steps[2].sentence)
+    assert unchanged.table is scenario.steps[2].table
+    assert unchanged is not scenario.steps[2]
+    assert_equal(unchanged.outline, scenario.outlines[0])
+
+
 def test_solved_steps_also_have_scenario_as_attribute():
     """
     Steps solved in scenario outlines also have scenario as attribute
@@ -0,0 +1,125 @@
+"""
+Test the base test class and its helpers.
+"""
+
+import gc
+import unittest
+import weakref
+from unittest.mock import patch
+
+from aloe.registry import STEP_REGISTRY
+from aloe import testclass
+
+FEATURE = """
+Feature: Composite steps
+
+    Background:
+        Given I do some setup
+
+    Scenario: Composite steps
+        Given I do a composite step
+"""
+
+OUTLINE_FEATURE = """
+Feature: Outline
+
+    Scenario Outline: Press the buttons
+        When I press <button>
+
+    Examples:
+        | button |
+        | add    |
+        | clear  |
+        | equals |
+"""
+
+
+class BehaveAsCacheTest(unittest.TestCase):
+    """
+    Test caching the steps for behave_as.
+    """
+
+    def setUp(self):
+        self.cache = testclass.BehaveAsCache()
+        self.feature = testclass.TestFeature.from_string(FEATURE)
+
+        # Don't match the steps left by the functional tests
+        STEP_REGISTRY.clear()
+        self.addCleanup(STEP_REGISTRY.unload, r'I press (\w+)')
+        STEP_REGISTRY.load(r'I press (\w+)', self.press)
+
+    def press(self, step, button):
+        """A step to match."""
+        pass
+
+    def test_cache(self):
+        """Test parsing and matching the steps once."""
+
+        context_step = self.feature.scenarios[0].steps[0]
+
+        steps = self.cache.steps(context_step, "When I press add")
+        ((step, match),) = steps
+
+        self.assertEqual(step.sentence, "When I press add")
+        self.assertEqual(match, (self.press, ('add',), {}))
+
+        self.assertIs(self.cache.steps(context_step, "When I press add"),
+                      steps)
+
+        # Background steps are parsed separately
+        background_step = self.feature.background.steps[0]
+        ((step, _),) = self.cache.steps(background_step, "When I press add")
+        self.assertTrue(hasattr(step, 'background'))
+
+        # Changing the registry discards the matches
+        STEP_REGISTRY.unload(r'I press (\w+)')
+        ((step, match),) = self.cache.steps(context_step,
+                                            "When I press add")
+        self.assertNotEqual(match[0], self.press)
+
+
+class OutlineExamplesTest(unittest.TestCase):
+    """
+    Test preparing the outline examples when they run.
+    """
+
+    def setUp(self):
+        self.feature = testclass.TestFeature.from_string(OUTLINE_FEATURE)
+        self.pressed = []
+
+        STEP_REGISTRY.clear()
+        self.addCleanup(STEP_REGISTRY.unload, r'I press (\w+)')
+        STEP_REGISTRY.load(r'I press (\w+)', self.press)
+
+    def press(self, step, button):
+        """Remember the steps run, without keeping them."""
+        self.pressed.append((weakref.ref(step), button))
+
+    def test_lazy_examples(self):
+        """Test the steps are only substituted while the example runs."""
+
+        scenario = self.feature.scenarios[0]
+
+        with patch.object(scenario, 'evaluate',
+                          wraps=scenario.evaluate) as evaluate:
+            examples = list(testclass.TestCase.make_examples(scenario, 1))
+            self.assertEqual(len(examples), 3)
+            self.assertEqual(evaluate.call_count, 0)
+
+            testcase = type('Outline', (testclass.TestCase,), {
+                'background': lambda self: None,
+                'runTest': lambda self: None,
+            })()
+
+            for example in examples:
+                example(testcase)
+
+            self.assertEqual(evaluate.call_count, 3)
+
+        self.assertEqual([button for _, button in self.pressed],
+                         ['add', 'clear', 'equals'])
+
+        # The steps are released when the examples finish
+        gc.collect()
+        self.assertEqual([step() for step, _ in self.pressed],
+                         [None, None, None])
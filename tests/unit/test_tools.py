@@ -2,10 +2,11 @@
 Test tool functions.
 """
 
+import threading
 import unittest
 from datetime import date
 
-from aloe.tools import guess_types
+from aloe.tools import guess_types, hook_not_reentrant
 
 
 class GuessTypesTest(unittest.TestCase):
@@ -65,3 +66,29 @@ class GuessTypesTest(unittest.TestCase):
 
         self.assertEqual(guess_types(input_),
                          output_)
+
+
+class HookNotReentrantTest(unittest.TestCase):
+    """Test hook_not_reentrant()"""
+
+    def test_reentrant(self):
+        """Test the hook is not reentered, unless from another thread."""
+
+        calls = []
+
+        @hook_not_reentrant
+        def hook(depth):
+            """Record the call and call the hook again."""
+
+            calls.append(depth)
+
+            if depth == 0:
+                hook(1)
+
+                thread = threading.Thread(target=hook, args=(2,))
+                thread.start()
+                thread.join()
+
+        hook(0)
+
+        self.assertEqual(calls, [0, 2])
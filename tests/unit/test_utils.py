@@ -2,13 +2,18 @@
 Test utility functions.
 """
 
+import asyncio
 import sys
+import threading
 import unittest
 
 from contextlib import contextmanager
 from functools import wraps
 
 from aloe.utils import (
+    CONTEXT_VARS,
+    ContextLocal,
+    isolated,
     unwrap_function,
     memoizedproperty,
     memoizedtype,
@@ -122,3 +127,87 @@ class MemoizedTest(unittest.TestCase):
 
         # Only two objects should have been created
         self.assertEqual(Memoized.counter, 2)
+
+
+@unittest.skipUnless(CONTEXT_VARS, "Needs Python 3.7.")
+class ContextLocalTest(unittest.TestCase):
+    """
+    Test the attributes separate for each thread and context.
+    """
+
+    def test_attributes(self):
+        """Test setting and deleting the attributes."""
+
+        local = ContextLocal()
+
+        local.value = 1
+        self.assertEqual(local.value, 1)
+        self.assertEqual(local.__dict__, {'value': 1})
+
+        del local.value
+        self.assertFalse(hasattr(local, 'value'))
+        with self.assertRaises(AttributeError):
+            del local.value
+
+    def test_threads(self):
+        """Test the attributes are separate for each thread."""
+
+        local = ContextLocal()
+        local.value = 'main'
+        values = []
+
+        def read_value():
+            """Read the value in another thread."""
+            values.append(getattr(local, 'value', None))
+            local.value = 'thread'
+
+        thread = threading.Thread(target=read_value)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(values, [None])
+        self.assertEqual(local.value, 'main')
+
+    def test_isolated(self):
+        """Test isolating the attributes in a context."""
+
+        local = ContextLocal()
+        local.value = 'outer'
+
+        async def read_value():
+            """Read the value in a task."""
+            return local.value
+
+        with isolated(local, {'value': 'inner'}):
+            local.other = 'inner'
+            self.assertEqual(local.__dict__,
+                             {'value': 'inner', 'other': 'inner'})
+
+            # The tasks started in the context see the same attributes
+            loop = asyncio.new_event_loop()
+            try:
+                self.assertEqual(loop.run_until_complete(read_value()),
+                                 'inner')
+            finally:
+                loop.close()
+
+        self.assertEqual(local.__dict__, {'value': 'outer'})
+
+
+class IsolatedTest(unittest.TestCase):
+    """
+    Test isolating the attributes of a threading.local.
+    """
+
+    def test_isolated(self):
+        """Test isolating the attributes in the current thread."""
+
+        local = threading.local()
+        local.value = 'outer'
+
+        with isolated(local, {'value': 'inner'}):
+            local.other = 'inner'
+            self.assertEqual(local.__dict__,
+                             {'value': 'inner', 'other': 'inner'})
+
+        self.assertEqual(local.__dict__, {'value': 'outer'})
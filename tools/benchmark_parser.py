@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""
+Measure the time taken to parse features and the steps for behave_as.
+"""
+
+import timeit
+
+from aloe.parser import Feature
+
+FEATURE = """
+Feature: Benchmark
+    Background:
+        Given I have a calculator
+
+    Scenario: Add numbers
+        Given I have entered 50 into the calculator
+        And I have entered 70 into the calculator
+        When I press add
+        Then the result should be 120 on the screen
+"""
+
+NUMBER = 2000
+
+
+def main():
+    """Print the time per parse of a feature and of a behave_as string."""
+
+    feature = Feature.from_string(FEATURE)
+    step = feature.scenarios[0].steps[0]
+
+    benchmarks = (
+        ('Feature.from_string', lambda: Feature.from_string(FEATURE)),
+        ('Step.parse_steps_from_string',
+         lambda: step.parse_steps_from_string('Given I press add')),
+    )
+
+    for name, func in benchmarks:
+        elapsed = min(timeit.repeat(func, number=NUMBER, repeat=3))
+        print("{0}: {1:.1f} us per call".format(
+            name, elapsed / NUMBER * 1e6))
+
+
+if __name__ == '__main__':
+    main()
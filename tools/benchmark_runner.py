@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Compare the import and startup time of the Nose and the native runners.
+
+Run from a directory with features, e.g. tests/simple_app, optionally
+passing the features to run.
+"""
+
+import subprocess
+import sys
+import time
+
+IMPORTS = (
+    ('Nose runner', 'import aloe.runner, aloe.plugin'),
+    ('native runner', 'import aloe.native'),
+)
+
+COMMANDS = (
+    ('aloe', []),
+    ('aloe run', ['run']),
+)
+
+REPEAT = 5
+
+
+def best_time(args):
+    """The best wall time of running a command, and its exit code."""
+
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        returncode = subprocess.call(args,
+                                     stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+
+    return min(times), returncode
+
+
+def main():
+    """Print the time to import each runner and to run the features."""
+
+    features = sys.argv[1:]
+
+    for name, statement in IMPORTS:
+        elapsed, _ = best_time([sys.executable, '-c', statement])
+        print("import {0}: {1:.0f} ms".format(name, elapsed * 1e3))
+
+    for name, args in COMMANDS:
+        elapsed, returncode = best_time([
+            sys.executable, '-c',
+            'import sys; from aloe import main; main(sys.argv)',
+        ] + args + features)
+        print("{0}: {1:.0f} ms (exit code {2})".format(
+            name, elapsed * 1e3, returncode))
+
+
+if __name__ == '__main__':
+    main()